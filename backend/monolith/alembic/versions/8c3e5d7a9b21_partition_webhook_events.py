@@ -0,0 +1,156 @@
+"""partition_webhook_events
+
+Revision ID: 8c3e5d7a9b21
+Revises: 4f2a9c1e7b3d
+Create Date: 2025-12-10 09:41:27.502316
+
+Rebuilds webhook_events as a table range-partitioned by month on
+created_at, stores raw_data as JSONB (lz4-compressed TOAST where the server
+supports it) and moves event_id uniqueness to webhook_event_keys, since a
+unique index on a partitioned table must include the partition key. Legacy
+"_duplicate_" audit rows are not carried over.
+"""
+from datetime import datetime, timezone
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '8c3e5d7a9b21'
+down_revision = '4f2a9c1e7b3d'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 2
+
+
+def _add_months(month_start: datetime, months: int) -> datetime:
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return month_start.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _create_partition(month_start: datetime) -> None:
+    name = f"webhook_events_p{month_start:%Y_%m}"
+    op.execute(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF webhook_events "
+        f"FOR VALUES FROM ('{month_start.isoformat()}') TO ('{_add_months(month_start, 1).isoformat()}')"
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    op.drop_index('ix_webhook_events_payment_reference', table_name='webhook_events')
+    op.drop_index('ix_webhook_events_event_id', table_name='webhook_events')
+    op.drop_index('ix_webhook_events_id', table_name='webhook_events')
+    op.rename_table('webhook_events', 'webhook_events_legacy')
+
+    op.execute("""
+        CREATE TABLE webhook_events (
+            id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+            event_id VARCHAR(255) NOT NULL,
+            event_type VARCHAR(50) NOT NULL,
+            payment_reference VARCHAR(100),
+            status VARCHAR(50),
+            raw_data JSONB NOT NULL,
+            processed_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    # lz4 TOAST compression needs PostgreSQL 14+ built with lz4; pglz otherwise
+    op.execute("""
+        DO $$
+        BEGIN
+            ALTER TABLE webhook_events ALTER COLUMN raw_data SET COMPRESSION lz4;
+        EXCEPTION WHEN OTHERS THEN
+            RAISE NOTICE 'lz4 compression unavailable, keeping default';
+        END $$
+    """)
+
+    # Monthly partitions from the oldest legacy row to a couple of months ahead
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM webhook_events_legacy")).scalar()
+    now = datetime.now(timezone.utc)
+    month = (oldest or now).astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    last = _add_months(now.replace(day=1, hour=0, minute=0, second=0, microsecond=0), MONTHS_AHEAD)
+    while month <= last:
+        _create_partition(month)
+        month = _add_months(month, 1)
+    op.execute("CREATE TABLE webhook_events_default PARTITION OF webhook_events DEFAULT")
+
+    op.create_index('ix_webhook_events_event_id', 'webhook_events', ['event_id'], unique=False)
+    op.create_index('ix_webhook_events_payment_reference', 'webhook_events', ['payment_reference'], unique=False)
+    # The batch worker only ever scans queued rows
+    op.create_index(
+        'ix_webhook_events_queued', 'webhook_events', ['id'], unique=False,
+        postgresql_where=sa.text("status = 'queued'")
+    )
+
+    op.execute("""
+        INSERT INTO webhook_events
+            (id, event_id, event_type, payment_reference, status, raw_data, processed_at, created_at)
+        OVERRIDING SYSTEM VALUE
+        SELECT id, event_id, event_type, payment_reference, status, raw_data::jsonb,
+               processed_at, COALESCE(created_at, now())
+        FROM webhook_events_legacy
+        WHERE status IS DISTINCT FROM 'duplicate'
+    """)
+    op.execute("""
+        SELECT setval(pg_get_serial_sequence('webhook_events', 'id'), max(id))
+        FROM webhook_events HAVING max(id) IS NOT NULL
+    """)
+
+    op.create_table(
+        'webhook_event_keys',
+        sa.Column('event_id', sa.String(length=255), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('event_id')
+    )
+    op.create_index(op.f('ix_webhook_event_keys_created_at'), 'webhook_event_keys', ['created_at'], unique=False)
+    op.execute("""
+        INSERT INTO webhook_event_keys (event_id, created_at)
+        SELECT event_id, created_at FROM webhook_events
+        ON CONFLICT (event_id) DO NOTHING
+    """)
+
+    op.drop_table('webhook_events_legacy')
+
+
+def downgrade() -> None:
+    op.rename_table('webhook_events', 'webhook_events_partitioned')
+    op.drop_index('ix_webhook_events_event_id', table_name='webhook_events_partitioned')
+    op.drop_index('ix_webhook_events_payment_reference', table_name='webhook_events_partitioned')
+    op.drop_index('ix_webhook_events_queued', table_name='webhook_events_partitioned')
+
+    op.create_table(
+        'webhook_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.String(length=255), nullable=False),
+        sa.Column('event_type', sa.String(length=50), nullable=False),
+        sa.Column('payment_reference', sa.String(length=100), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('raw_data', sa.Text(), nullable=False),
+        sa.Column('processed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("""
+        INSERT INTO webhook_events
+            (id, event_id, event_type, payment_reference, status, raw_data, processed_at, created_at)
+        SELECT DISTINCT ON (event_id) id, event_id, event_type, payment_reference, status, raw_data::text,
+               processed_at, created_at
+        FROM webhook_events_partitioned
+        ORDER BY event_id, id
+    """)
+    op.execute("""
+        SELECT setval(pg_get_serial_sequence('webhook_events', 'id'), max(id))
+        FROM webhook_events HAVING max(id) IS NOT NULL
+    """)
+    op.create_index(op.f('ix_webhook_events_id'), 'webhook_events', ['id'], unique=False)
+    op.create_index(op.f('ix_webhook_events_event_id'), 'webhook_events', ['event_id'], unique=True)
+    op.create_index(op.f('ix_webhook_events_payment_reference'), 'webhook_events', ['payment_reference'], unique=False)
+
+    op.drop_index(op.f('ix_webhook_event_keys_created_at'), table_name='webhook_event_keys')
+    op.drop_table('webhook_event_keys')
+    op.drop_table('webhook_events_partitioned')
@@ -0,0 +1,43 @@
+"""add_reconciliation_runs_table
+
+Revision ID: b71d2e4f6a08
+Revises: 8c3e5d7a9b21
+Create Date: 2025-12-11 14:22:05.918342
+
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'b71d2e4f6a08'
+down_revision = '8c3e5d7a9b21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'reconciliation_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), server_default='running', nullable=False),
+        sa.Column('checked', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('confirmed', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('orders_created', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('closed', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('errors', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('details', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_reconciliation_runs_id'), 'reconciliation_runs', ['id'], unique=False)
+    # Reconciliation pages through pending/expired checkouts by age
+    op.create_index('ix_pending_checkouts_status_created', 'pending_checkouts', ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pending_checkouts_status_created', table_name='pending_checkouts')
+    op.drop_index(op.f('ix_reconciliation_runs_id'), table_name='reconciliation_runs')
+    op.drop_table('reconciliation_runs')
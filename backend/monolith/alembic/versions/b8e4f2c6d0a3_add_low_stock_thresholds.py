@@ -0,0 +1,39 @@
+"""add_low_stock_thresholds
+
+Revision ID: b8e4f2c6d0a3
+Revises: a7d3e9b2c5f1
+Create Date: 2026-01-08 09:42:51.218734
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'b8e4f2c6d0a3'
+down_revision = 'a7d3e9b2c5f1'
+branch_labels = None
+depends_on = None
+
+# utils.constants.LOW_STOCK_INDEX_CEILING at the time of this migration
+LOW_STOCK_INDEX_CEILING = 100
+
+
+def upgrade() -> None:
+    # Nullable without a default: no table rewrite
+    op.add_column('productvariants', sa.Column('low_stock_threshold', sa.Integer(), nullable=True))
+    op.add_column('categories', sa.Column('low_stock_threshold', sa.Integer(), nullable=True))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_productvariants_low_stock', 'productvariants', ['stock_quantity', 'id'], unique=False,
+            postgresql_where=sa.text(f'is_active = true AND stock_quantity <= {LOW_STOCK_INDEX_CEILING}'),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_productvariants_low_stock', table_name='productvariants', postgresql_concurrently=True)
+    op.drop_column('categories', 'low_stock_threshold')
+    op.drop_column('productvariants', 'low_stock_threshold')
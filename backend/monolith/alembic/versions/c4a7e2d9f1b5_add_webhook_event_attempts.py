@@ -0,0 +1,25 @@
+"""add_webhook_event_attempts
+
+Revision ID: c4a7e2d9f1b5
+Revises: b8e4f2c6d0a3
+Create Date: 2026-01-12 10:17:32.604118
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'c4a7e2d9f1b5'
+down_revision = 'b8e4f2c6d0a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Constant default: no table rewrite; cascades to every partition
+    op.add_column('webhook_events', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('webhook_events', 'attempts')
@@ -0,0 +1,33 @@
+"""add_scheduler_leases_table
+
+Revision ID: d5e8a1c3f702
+Revises: b71d2e4f6a08
+Create Date: 2025-12-12 10:05:44.217630
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'd5e8a1c3f702'
+down_revision = 'b71d2e4f6a08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'scheduler_leases',
+        sa.Column('job_name', sa.String(length=100), nullable=False),
+        sa.Column('last_slot', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_status', sa.String(length=20), nullable=True),
+        sa.Column('last_duration_ms', sa.Numeric(precision=12, scale=1), nullable=True),
+        sa.PrimaryKeyConstraint('job_name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('scheduler_leases')
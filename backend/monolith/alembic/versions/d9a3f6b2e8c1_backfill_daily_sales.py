@@ -0,0 +1,58 @@
+"""backfill_daily_sales
+
+Revision ID: d9a3f6b2e8c1
+Revises: c4a7e2d9f1b5
+Create Date: 2026-01-13 11:02:44.381950
+
+Fills daily_sales from paid orders when it is still empty, so dashboards
+don't read an empty rollup until someone runs jobs/backfill_daily_sales.py.
+Mirrors sales_rollup_service.rebuild() as of this revision.
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'd9a3f6b2e8c1'
+down_revision = 'c4a7e2d9f1b5'
+branch_labels = None
+depends_on = None
+
+# utils.constants.PAYMENT_STATUS_PAID and
+# sales_rollup_service.ORDER_TOTALS_PRODUCT_ID at the time of this migration
+PAYMENT_STATUS_PAID = 'paid'
+ORDER_TOTALS_PRODUCT_ID = 0
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.execute(sa.text("SELECT 1 FROM daily_sales LIMIT 1")).first():
+        return
+
+    params = {"paid": PAYMENT_STATUS_PAID, "order_totals_id": ORDER_TOTALS_PRODUCT_ID}
+    bind.execute(sa.text("""
+        INSERT INTO daily_sales (sales_date, product_id, category, revenue, units, order_count, updated_at)
+        SELECT date(o.created_at), p.id, COALESCE(p.category, ''),
+               SUM(oi.total_price), SUM(oi.quantity), COUNT(DISTINCT o.id), CURRENT_TIMESTAMP
+        FROM orders o
+        JOIN orderitems oi ON oi.order_id = o.id
+        JOIN productvariants v ON v.id = oi.variant_id
+        JOIN products p ON p.id = v.product_id
+        WHERE o.payment_status = :paid
+        GROUP BY date(o.created_at), p.id, COALESCE(p.category, '')
+    """), params)
+    bind.execute(sa.text("""
+        INSERT INTO daily_sales (sales_date, product_id, category, revenue, units, order_count, updated_at)
+        SELECT date(o.created_at), :order_totals_id, '',
+               SUM(o.total_amount),
+               COALESCE(SUM((SELECT SUM(oi.quantity) FROM orderitems oi WHERE oi.order_id = o.id)), 0),
+               COUNT(*), CURRENT_TIMESTAMP
+        FROM orders o
+        WHERE o.payment_status = :paid
+        GROUP BY date(o.created_at)
+    """), params)
+
+
+def downgrade() -> None:
+    # Data only; the rows are kept in step by the application from here on
+    pass
@@ -0,0 +1,35 @@
+"""add_daily_sales_table
+
+Revision ID: e3b9f1a7c4d2
+Revises: d5e8a1c3f702
+Create Date: 2025-12-15 09:41:17.502381
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'e3b9f1a7c4d2'
+down_revision = 'd5e8a1c3f702'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'daily_sales',
+        sa.Column('sales_date', sa.Date(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('category', sa.String(length=100), nullable=False),
+        sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('order_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('sales_date', 'product_id', 'category')
+    )
+    # Populate with: python jobs/backfill_daily_sales.py
+
+
+def downgrade() -> None:
+    op.drop_table('daily_sales')
@@ -0,0 +1,42 @@
+"""backfill_customer_metrics
+
+Revision ID: e7c1f5a3b9d4
+Revises: d9a3f6b2e8c1
+Create Date: 2026-01-14 09:41:27.590312
+
+Fills customer_metrics from paid orders when it is still empty, so repeat
+rate and lifetime value don't read zero until someone runs
+jobs/backfill_customer_metrics.py. Mirrors customer_metrics_service.rebuild()
+as of this revision.
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'e7c1f5a3b9d4'
+down_revision = 'd9a3f6b2e8c1'
+branch_labels = None
+depends_on = None
+
+# utils.constants.PAYMENT_STATUS_PAID at the time of this migration
+PAYMENT_STATUS_PAID = 'paid'
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.execute(sa.text("SELECT 1 FROM customer_metrics LIMIT 1")).first():
+        return
+
+    bind.execute(sa.text("""
+        INSERT INTO customer_metrics (customer_id, first_order_at, last_order_at, order_count, total_spent, updated_at)
+        SELECT o.customer_id, MIN(o.created_at), MAX(o.created_at), COUNT(*), SUM(o.total_amount), CURRENT_TIMESTAMP
+        FROM orders o
+        WHERE o.payment_status = :paid
+        GROUP BY o.customer_id
+    """), {"paid": PAYMENT_STATUS_PAID})
+
+
+def downgrade() -> None:
+    # Data only; the rows are kept in step by the application from here on
+    pass
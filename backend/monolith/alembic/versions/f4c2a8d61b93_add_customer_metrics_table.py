@@ -0,0 +1,47 @@
+"""add_customer_metrics_table
+
+Revision ID: f4c2a8d61b93
+Revises: e3b9f1a7c4d2
+Create Date: 2025-12-18 14:06:52.118734
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'f4c2a8d61b93'
+down_revision = 'e3b9f1a7c4d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'customer_metrics',
+        sa.Column('customer_id', sa.Integer(), nullable=False),
+        sa.Column('first_order_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_order_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('order_count', sa.Integer(), nullable=False),
+        sa.Column('total_spent', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('customer_id')
+    )
+    op.create_index(op.f('ix_customer_metrics_first_order_at'), 'customer_metrics', ['first_order_at'], unique=False)
+    op.create_index(op.f('ix_customer_metrics_last_order_at'), 'customer_metrics', ['last_order_at'], unique=False)
+    # Per-customer refreshes and cohort activity look orders up by customer.
+    # CONCURRENTLY so checkout keeps writing orders while the index builds
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_orders_customer_id'), 'orders', ['customer_id'], unique=False, postgresql_concurrently=True
+        )
+    # Filled from paid orders by e7c1f5a3b9d4_backfill_customer_metrics
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_orders_customer_id'), table_name='orders', postgresql_concurrently=True)
+    op.drop_index(op.f('ix_customer_metrics_last_order_at'), table_name='customer_metrics')
+    op.drop_index(op.f('ix_customer_metrics_first_order_at'), table_name='customer_metrics')
+    op.drop_table('customer_metrics')
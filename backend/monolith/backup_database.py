@@ -0,0 +1,622 @@
+"""
+Database Backup Script for MAD RUSH
+PostgreSQL backups with streaming compression, checksums and rotation
+
+Full backups come in two modes:
+- stream (default): `pg_dump --format=custom` piped straight through zstd
+  (gzip if the zstandard package is missing). The SHA-256 is computed over
+  the compressed bytes as they are written, so the dump makes one pass and
+  never lands on disk uncompressed.
+- directory: `pg_dump --format=directory --jobs N`. Tables are dumped and
+  compressed by parallel workers and can be restored in parallel.
+
+Incremental backups COPY the rows of append-only tables (orders, orderitems,
+webhook_events) whose id is above the last exported watermark. They only
+capture new rows; changes to existing rows (e.g. order status) are covered
+by the next full backup.
+
+Every backup writes a JSON manifest with per-file checksums next to it.
+`--verify` re-hashes the files and reads the archive back through
+pg_restore; `--restore` loads it into DATABASE_URL or --target-url.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional
+from urllib.parse import quote
+
+try:
+    import zstandard
+except ImportError:  # gzip fallback
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+BACKUP_DIR = Path(os.getenv("BACKUP_DIR", Path(__file__).parent / "backups"))
+BACKUP_RETENTION_DAYS = int(os.getenv("BACKUP_RETENTION_DAYS", "30"))  # Keep backups for 30 days
+BACKUP_JOBS = int(os.getenv("BACKUP_JOBS", "4"))  # pg_dump/pg_restore workers in directory mode
+BACKUP_ZSTD_LEVEL = int(os.getenv("BACKUP_ZSTD_LEVEL", "6"))
+# pg_dump --compress for directory mode; use "zstd" with pg_dump 16+
+BACKUP_DIRECTORY_COMPRESSION = os.getenv("BACKUP_DIRECTORY_COMPRESSION", "6")
+PG_BIN_DIR = os.getenv("PG_BIN_DIR", "")  # Directory holding pg_dump/pg_restore if not on PATH
+
+# Append-only tables for incremental exports, in foreign-key order
+INCREMENTAL_TABLES = ("orders", "orderitems", "webhook_events")
+# Re-export this many ids below the watermark to catch rows whose
+# transaction committed after a higher id was already visible
+INCREMENTAL_OVERLAP_IDS = 1000
+INCREMENTAL_STATE_FILE = "incremental_state.json"
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def database_url() -> str:
+    """libpq connection URI from DATABASE_URL or the individual DATABASE_* variables"""
+    url = os.getenv("DATABASE_URL")
+    if url:
+        # Drop SQLAlchemy driver suffixes (postgresql+psycopg2://) and the postgres:// alias
+        return "postgresql://" + url.split("://", 1)[1]
+    user = quote(os.getenv("DATABASE_USER", "madrush_user"), safe="")
+    password = quote(os.getenv("DATABASE_PASSWORD", ""), safe="")
+    host = os.getenv("DATABASE_HOST", "localhost")
+    port = os.getenv("DATABASE_PORT", "5432")
+    name = os.getenv("DATABASE_NAME", "madrush_db")
+    return f"postgresql://{user}:{password}@{host}:{port}/{name}"
+
+
+# libpq connection parameters and the environment variables pg_dump and
+# pg_restore read them from
+LIBPQ_ENV_VARS = {
+    "host": "PGHOST", "hostaddr": "PGHOSTADDR", "port": "PGPORT", "dbname": "PGDATABASE",
+    "user": "PGUSER", "password": "PGPASSWORD", "passfile": "PGPASSFILE", "service": "PGSERVICE",
+    "options": "PGOPTIONS", "application_name": "PGAPPNAME", "connect_timeout": "PGCONNECT_TIMEOUT",
+    "client_encoding": "PGCLIENTENCODING", "target_session_attrs": "PGTARGETSESSIONATTRS",
+    "load_balance_hosts": "PGLOADBALANCEHOSTS", "channel_binding": "PGCHANNELBINDING",
+    "require_auth": "PGREQUIREAUTH", "requirepeer": "PGREQUIREPEER",
+    "sslmode": "PGSSLMODE", "sslnegotiation": "PGSSLNEGOTIATION", "sslcompression": "PGSSLCOMPRESSION",
+    "sslcert": "PGSSLCERT", "sslkey": "PGSSLKEY", "sslcertmode": "PGSSLCERTMODE",
+    "sslrootcert": "PGSSLROOTCERT", "sslcrl": "PGSSLCRL", "sslcrldir": "PGSSLCRLDIR", "sslsni": "PGSSLSNI",
+    "ssl_min_protocol_version": "PGSSLMINPROTOCOLVERSION", "ssl_max_protocol_version": "PGSSLMAXPROTOCOLVERSION",
+    "gssencmode": "PGGSSENCMODE", "krbsrvname": "PGKRBSRVNAME", "gsslib": "PGGSSLIB",
+    "gssdelegation": "PGGSSDELEGATION",
+}
+
+
+def _pg_env(url: str) -> Dict[str, str]:
+    """
+    Environment for pg_dump/pg_restore carrying every connection parameter
+    of `url` (TLS settings included); keeps the password off the command line
+    """
+    from psycopg2.extensions import parse_dsn
+
+    params = parse_dsn(url)
+    env = os.environ.copy()
+    for key, value in params.items():
+        if not value:
+            continue
+        if key in LIBPQ_ENV_VARS:
+            env[LIBPQ_ENV_VARS[key]] = value
+        else:
+            logger.warning(f"Connection parameter {key} has no libpq environment variable; ignored by backups")
+    return env
+
+
+def _pg_bin(name: str) -> str:
+    return os.path.join(PG_BIN_DIR, name) if PG_BIN_DIR else name
+
+
+def _compression_suffix() -> str:
+    return ".zst" if zstandard is not None else ".gz"
+
+
+class _HashingWriter:
+    """Counts and hashes bytes on their way to the underlying file"""
+
+    def __init__(self, fh: BinaryIO):
+        self.fh = fh
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.fh.write(data)
+
+    def flush(self) -> None:
+        self.fh.flush()
+
+
+def _compressor(writer: _HashingWriter):
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(
+            level=BACKUP_ZSTD_LEVEL, threads=-1, write_checksum=True
+        ).stream_writer(writer, closefd=False)
+    return gzip.GzipFile(fileobj=writer, mode="wb", compresslevel=6)
+
+
+def _open_decompressed(path: Path) -> BinaryIO:
+    if path.name.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("The zstandard package is required to read .zst backups")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return gzip.open(path, "rb")
+
+
+class _CompressedFile:
+    """Write-side pipeline: caller -> compressor -> hash -> `<path>.part`, renamed on success"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.part = path.with_name(path.name + ".part")
+
+    def __enter__(self):
+        self.raw = open(self.part, "wb")
+        self.hashed = _HashingWriter(self.raw)
+        self.stream = _compressor(self.hashed)
+        return self.stream
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.stream.close()
+        finally:
+            self.raw.close()
+        if exc_type is not None:
+            self.part.unlink(missing_ok=True)
+            return False
+        self.part.rename(self.path)
+        return False
+
+    def entry(self) -> Dict[str, Any]:
+        return {"sha256": self.hashed.sha256.hexdigest(), "size": self.hashed.size}
+
+
+def _file_digest(path: Path) -> Dict[str, Any]:
+    sha256 = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+            size += len(chunk)
+    return {"sha256": sha256.hexdigest(), "size": size}
+
+
+def _manifest_path(name: str) -> Path:
+    return BACKUP_DIR / f"{name}.json"
+
+
+def _write_manifest(manifest: Dict[str, Any]) -> None:
+    path = _manifest_path(manifest["name"])
+    tmp = path.with_name(path.name + ".part")
+    tmp.write_text(json.dumps(manifest, indent=2))
+    tmp.rename(path)
+
+
+def read_manifest(name: str) -> Dict[str, Any]:
+    return json.loads(_manifest_path(name).read_text())
+
+
+def _new_name(prefix: str) -> str:
+    return f"{prefix}_{datetime.now(timezone.utc):%Y%m%d_%H%M%S_%f}"
+
+
+def _run_pg_dump(args: List[str], env: Dict[str, str], stdout=None) -> subprocess.Popen:
+    # stderr goes to a temp file so a chatty pg_dump can never block on a full pipe
+    stderr = tempfile.TemporaryFile()
+    process = subprocess.Popen([_pg_bin("pg_dump"), *args], env=env, stdout=stdout, stderr=stderr)
+    process.stderr_file = stderr
+    return process
+
+
+def _finish(process: subprocess.Popen, what: str) -> None:
+    returncode = process.wait()
+    process.stderr_file.seek(0)
+    stderr = process.stderr_file.read().decode(errors="replace").strip()
+    process.stderr_file.close()
+    if returncode != 0:
+        raise RuntimeError(f"{what} exited with {returncode}: {stderr}")
+
+
+def _dump_stream(name: str, env: Dict[str, str]) -> Dict[str, Any]:
+    """pg_dump custom format streamed through the compressor in a single pass"""
+    filename = f"{name}.dump{_compression_suffix()}"
+    # Uncompressed archive: compressing once, outside pg_dump, is cheaper than twice
+    process = _run_pg_dump(["--format=custom", "--compress=0", "--no-owner"], env, stdout=subprocess.PIPE)
+    target = _CompressedFile(BACKUP_DIR / filename)
+    try:
+        with target as stream:
+            shutil.copyfileobj(process.stdout, stream, CHUNK_SIZE)
+        process.stdout.close()
+        _finish(process, "pg_dump")
+    except Exception:
+        process.kill()
+        process.wait()
+        (BACKUP_DIR / filename).unlink(missing_ok=True)
+        raise
+    return {"format": "custom", "compression": _compression_suffix().lstrip("."), "files": {filename: target.entry()}}
+
+
+def _dump_directory(name: str, env: Dict[str, str], jobs: int) -> Dict[str, Any]:
+    """pg_dump directory format with parallel workers"""
+    target = BACKUP_DIR / name
+    process = _run_pg_dump([
+        "--format=directory", f"--jobs={jobs}", f"--compress={BACKUP_DIRECTORY_COMPRESSION}",
+        "--no-owner", "--file", str(target)
+    ], env)
+    try:
+        _finish(process, "pg_dump")
+    except Exception:
+        shutil.rmtree(target, ignore_errors=True)
+        raise
+    files = {
+        str(path.relative_to(BACKUP_DIR)): _file_digest(path)
+        for path in sorted(target.iterdir())
+    }
+    return {"format": "directory", "compression": BACKUP_DIRECTORY_COMPRESSION, "jobs": jobs, "files": files}
+
+
+def create_backup(mode: str = "stream", jobs: int = BACKUP_JOBS) -> Optional[Dict[str, Any]]:
+    """Create a full database backup; returns its manifest, or None on failure"""
+    try:
+        BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+        name = _new_name("backup")
+        env = _pg_env(database_url())
+        logger.info(f"Starting {mode} database backup: {env.get('PGDATABASE')}")
+
+        started = datetime.now(timezone.utc)
+        if mode == "directory":
+            manifest = _dump_directory(name, env, jobs)
+        elif mode == "stream":
+            manifest = _dump_stream(name, env)
+        else:
+            raise ValueError(f"Unknown backup mode: {mode}")
+        manifest.update({
+            "name": name,
+            "kind": "full",
+            "created_at": started.isoformat(),
+            "duration_seconds": round((datetime.now(timezone.utc) - started).total_seconds(), 2)
+        })
+        _write_manifest(manifest)
+
+        size_mb = sum(entry["size"] for entry in manifest["files"].values()) / (1024 * 1024)
+        logger.info(f"✅ Backup created successfully: {name} ({size_mb:.2f} MB)")
+        return manifest
+
+    except Exception as e:
+        logger.error(f"❌ Backup failed: {e}")
+        return None
+
+
+def _load_state() -> Dict[str, int]:
+    path = BACKUP_DIR / INCREMENTAL_STATE_FILE
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def _save_state(state: Dict[str, int]) -> None:
+    path = BACKUP_DIR / INCREMENTAL_STATE_FILE
+    tmp = path.with_name(path.name + ".part")
+    tmp.write_text(json.dumps(state, indent=2))
+    tmp.rename(path)
+
+
+def create_incremental_backup(tables=INCREMENTAL_TABLES) -> Optional[Dict[str, Any]]:
+    """Export rows added to append-only tables since the last incremental backup"""
+    import psycopg2
+    from psycopg2 import sql
+
+    try:
+        BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+        name = _new_name("incremental")
+        state = _load_state()
+        new_state = dict(state)
+        manifest: Dict[str, Any] = {
+            "name": name, "kind": "incremental", "format": "copy",
+            "compression": _compression_suffix().lstrip("."),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "files": {}, "tables": {}
+        }
+
+        conn = psycopg2.connect(database_url())
+        try:
+            # One snapshot for every table, so orderitems never reference unexported orders
+            conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+            with conn.cursor() as cur:
+                for table in tables:
+                    watermark = state.get(table, 0)
+                    cur.execute(sql.SQL("SELECT max(id) FROM {}").format(sql.Identifier(table)))
+                    upto = cur.fetchone()[0] or 0
+                    if upto <= watermark:
+                        continue
+                    cur.execute(sql.SQL("SELECT * FROM {} LIMIT 0").format(sql.Identifier(table)))
+                    columns = [column.name for column in cur.description]
+
+                    since = max(0, watermark - INCREMENTAL_OVERLAP_IDS)
+                    filename = f"{name}.{table}.copy{_compression_suffix()}"
+                    target = _CompressedFile(BACKUP_DIR / filename)
+                    copy = sql.SQL("COPY (SELECT * FROM {} WHERE id > {} AND id <= {} ORDER BY id) TO STDOUT").format(
+                        sql.Identifier(table), sql.Literal(since), sql.Literal(upto)
+                    )
+                    with target as stream:
+                        cur.copy_expert(copy, stream, size=CHUNK_SIZE)
+                    manifest["files"][filename] = target.entry()
+                    manifest["tables"][table] = {
+                        "file": filename, "columns": columns, "from_id": since, "to_id": upto, "rows": cur.rowcount
+                    }
+                    new_state[table] = upto
+            conn.rollback()
+        finally:
+            conn.close()
+
+        if not manifest["tables"]:
+            logger.info("No new rows since the last incremental backup")
+            return manifest
+        _write_manifest(manifest)
+        # Only advance watermarks once every file and the manifest are on disk
+        _save_state(new_state)
+        logger.info(f"✅ Incremental backup created: {name} {({t: v['rows'] for t, v in manifest['tables'].items()})}")
+        return manifest
+
+    except Exception as e:
+        logger.error(f"❌ Incremental backup failed: {e}")
+        return None
+
+
+def verify_backup(name: str) -> bool:
+    """Check every file against the manifest checksums and read the archive back"""
+    try:
+        manifest = read_manifest(name)
+        for filename, expected in manifest["files"].items():
+            actual = _file_digest(BACKUP_DIR / filename)
+            if actual != expected:
+                logger.error(f"❌ Checksum mismatch for {filename}")
+                return False
+
+        if manifest["format"] == "directory":
+            process = subprocess.Popen(
+                [_pg_bin("pg_restore"), "--list", str(BACKUP_DIR / name)],
+                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+            )
+            _, stderr = process.communicate()
+            if process.returncode != 0:
+                logger.error(f"❌ pg_restore cannot read {name}: {stderr.decode(errors='replace')}")
+                return False
+        else:
+            for filename in manifest["files"]:
+                _verify_compressed(BACKUP_DIR / filename, list_archive=manifest["format"] == "custom")
+
+        logger.info(f"✅ Backup verified: {name}")
+        return True
+
+    except Exception as e:
+        logger.error(f"❌ Verification failed for {name}: {e}")
+        return False
+
+
+def _verify_compressed(path: Path, list_archive: bool) -> None:
+    """Decompress the whole file (checks the frame checksum), optionally through pg_restore --list"""
+    process = None
+    if list_archive:
+        process = subprocess.Popen(
+            [_pg_bin("pg_restore"), "--list"],
+            stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+    with _open_decompressed(path) as reader:
+        for chunk in iter(lambda: reader.read(CHUNK_SIZE), b""):
+            if process is not None and process.stdin is not None:
+                try:
+                    process.stdin.write(chunk)
+                except BrokenPipeError:
+                    # pg_restore stops reading after the table of contents
+                    process.stdin = None
+    if process is not None:
+        if process.stdin is not None:
+            process.stdin.close()
+        if process.wait() != 0:
+            raise RuntimeError(f"pg_restore cannot read {path.name}")
+
+
+def restore_backup(name: str, target_url: Optional[str] = None, jobs: int = BACKUP_JOBS) -> bool:
+    """Restore a full or incremental backup into target_url (default DATABASE_URL)"""
+    try:
+        manifest = read_manifest(name)
+        url = target_url or database_url()
+        logger.info(f"Restoring database from: {name}")
+
+        if manifest["kind"] == "incremental":
+            _restore_incremental(manifest, url)
+        else:
+            env = _pg_env(url)
+            command = [_pg_bin("pg_restore"), "--clean", "--if-exists", "--no-owner", "--exit-on-error",
+                       f"--dbname={env['PGDATABASE']}"]
+            if manifest["format"] == "directory":
+                process = subprocess.Popen(
+                    [*command, f"--jobs={jobs}", str(BACKUP_DIR / name)], env=env, stderr=subprocess.PIPE
+                )
+                _, stderr = process.communicate()
+            else:
+                # Stream decompression into pg_restore: no temporary .dump file
+                process = subprocess.Popen(
+                    [*command, "--single-transaction"], env=env, stdin=subprocess.PIPE, stderr=subprocess.PIPE
+                )
+                (filename,) = manifest["files"]
+                try:
+                    with _open_decompressed(BACKUP_DIR / filename) as reader:
+                        shutil.copyfileobj(reader, process.stdin, CHUNK_SIZE)
+                except BrokenPipeError:
+                    pass  # pg_restore exited early; its stderr says why
+                process.stdin.close()
+                stderr = process.stderr.read()
+                process.wait()
+            if process.returncode != 0:
+                logger.error(f"Restore failed: {stderr.decode(errors='replace')}")
+                return False
+
+        logger.info("✅ Database restored successfully")
+        return True
+
+    except Exception as e:
+        logger.error(f"❌ Restore failed: {e}")
+        return False
+
+
+def _restore_incremental(manifest: Dict[str, Any], url: str) -> None:
+    """Append exported rows, skipping ones already present, in one transaction"""
+    import psycopg2
+    from psycopg2 import sql
+
+    conn = psycopg2.connect(url)
+    try:
+        with conn.cursor() as cur:
+            for table in INCREMENTAL_TABLES:
+                entry = manifest["tables"].get(table)
+                if entry is None:
+                    continue
+                staging = sql.Identifier(f"restore_{table}")
+                columns = sql.SQL(", ").join(map(sql.Identifier, entry["columns"]))
+                cur.execute(sql.SQL("CREATE TEMP TABLE {} (LIKE {}) ON COMMIT DROP").format(
+                    staging, sql.Identifier(table)))
+                with _open_decompressed(BACKUP_DIR / entry["file"]) as reader:
+                    cur.copy_expert(sql.SQL("COPY {} ({}) FROM STDIN").format(staging, columns), reader, size=CHUNK_SIZE)
+                cur.execute(sql.SQL(
+                    "INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} ON CONFLICT DO NOTHING"
+                ).format(table=sql.Identifier(table), columns=columns, staging=staging))
+                # Keep the id sequence ahead of the restored rows
+                cur.execute(sql.SQL(
+                    "SELECT setval(pg_get_serial_sequence(%s, 'id'), max(id)) FROM {} HAVING max(id) IS NOT NULL"
+                ).format(sql.Identifier(table)), (table,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _list_manifests() -> List[Dict[str, Any]]:
+    manifests = []
+    for path in BACKUP_DIR.glob("*.json"):
+        if path.name == INCREMENTAL_STATE_FILE:
+            continue
+        try:
+            manifests.append(json.loads(path.read_text()))
+        except (ValueError, OSError):
+            continue
+    return sorted(manifests, key=lambda m: m["created_at"], reverse=True)
+
+
+def cleanup_old_backups():
+    """Remove backups older than BACKUP_RETENTION_DAYS"""
+    try:
+        if not BACKUP_DIR.exists():
+            return
+
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=BACKUP_RETENTION_DAYS)
+        removed_count = 0
+
+        for manifest in _list_manifests():
+            if datetime.fromisoformat(manifest["created_at"]) >= cutoff_date:
+                continue
+            for filename in manifest["files"]:
+                (BACKUP_DIR / filename).unlink(missing_ok=True)
+            if manifest["format"] == "directory":
+                shutil.rmtree(BACKUP_DIR / manifest["name"], ignore_errors=True)
+            _manifest_path(manifest["name"]).unlink(missing_ok=True)
+            removed_count += 1
+            logger.info(f"Removed old backup: {manifest['name']}")
+
+        # Plain-format dumps from before manifests existed
+        for backup_file in BACKUP_DIR.glob("backup_*.sql.gz"):
+            if datetime.fromtimestamp(backup_file.stat().st_mtime, timezone.utc) < cutoff_date:
+                backup_file.unlink()
+                removed_count += 1
+                logger.info(f"Removed old backup: {backup_file.name}")
+
+        if removed_count > 0:
+            logger.info(f"✅ Cleaned up {removed_count} old backup(s)")
+        else:
+            logger.info("No old backups to clean up")
+
+    except Exception as e:
+        logger.error(f"❌ Cleanup failed: {e}")
+
+
+def list_backups():
+    """List all available backups"""
+    if not BACKUP_DIR.exists():
+        logger.info("No backups directory found")
+        return
+
+    backups = _list_manifests()
+
+    if not backups:
+        logger.info("No backups found")
+        return
+
+    logger.info(f"\n📦 Available Backups ({len(backups)} total):")
+    logger.info("=" * 72)
+
+    for manifest in backups:
+        size_mb = sum(entry["size"] for entry in manifest["files"].values()) / (1024 * 1024)
+        created = datetime.fromisoformat(manifest["created_at"])
+        logger.info(
+            f"  {manifest['name']:<36} {manifest['kind']:<12} {size_mb:>8.2f} MB  {created:%Y-%m-%d %H:%M:%S}"
+        )
+
+    logger.info("=" * 72)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Database backup and restore utility")
+    parser.add_argument("--backup", action="store_true", help="Create a new full backup")
+    parser.add_argument("--mode", choices=["stream", "directory"], default="stream",
+                        help="stream: pg_dump piped through zstd; directory: parallel pg_dump")
+    parser.add_argument("--jobs", type=int, default=BACKUP_JOBS, help="Parallel workers for directory mode")
+    parser.add_argument("--incremental", action="store_true", help="Export new rows of append-only tables")
+    parser.add_argument("--verify", type=str, help="Verify a backup by name")
+    parser.add_argument("--cleanup", action="store_true", help="Remove old backups")
+    parser.add_argument("--list", action="store_true", help="List all backups")
+    parser.add_argument("--restore", type=str, help="Restore from backup name")
+    parser.add_argument("--target-url", type=str, help="Database to restore into (default DATABASE_URL)")
+    parser.add_argument("--auto", action="store_true", help="Automatic mode (backup + verify + cleanup)")
+
+    args = parser.parse_args()
+
+    if args.auto:
+        # Automated backup with cleanup (for cron jobs)
+        logger.info("🔄 Running automated backup...")
+        manifest = create_backup(args.mode, args.jobs)
+        if manifest and verify_backup(manifest["name"]):
+            cleanup_old_backups()
+    elif args.backup:
+        create_backup(args.mode, args.jobs)
+    elif args.incremental:
+        create_incremental_backup()
+    elif args.verify:
+        verify_backup(args.verify)
+    elif args.cleanup:
+        cleanup_old_backups()
+    elif args.list:
+        list_backups()
+    elif args.restore:
+        target = args.target_url or database_url()
+        logger.warning(f"⚠️  This will REPLACE data in: {target.rsplit('/', 1)[-1]}")
+        logger.warning("⚠️  Make sure you have a recent backup before proceeding!")
+        if input("Type 'YES' to confirm restore: ") == "YES":
+            restore_backup(args.restore, args.target_url, args.jobs)
+        else:
+            logger.info("Restore cancelled")
+    else:
+        # Default: create backup
+        logger.info("No action specified. Creating backup...")
+        create_backup(args.mode, args.jobs)
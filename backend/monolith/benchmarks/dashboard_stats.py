@@ -0,0 +1,141 @@
+"""
+Benchmark: admin dashboard stats, ORM hydration vs SQL aggregates.
+
+Inserts --orders orders (90% paid) spread over the last 180 days inside a
+transaction and times three ways of computing both periods' totals: the
+original get_dashboard_stats approach (load every paid Order, sum in
+Python), one SUM/COUNT FILTER aggregate over orders, and
+analytics_service.order_period_totals reading the daily_sales rollup.
+Everything is rolled back at the end.
+Reports median latency and peak Python memory (tracemalloc, measured in a
+separate run) per approach.
+
+Needs a PostgreSQL DATABASE_URL with the schema created.
+
+    python benchmarks/dashboard_stats.py
+    python benchmarks/dashboard_stats.py --orders 100000 --range 90 --repeat 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select, text
+
+import models
+from database import SessionLocal
+from services import analytics_service, sales_rollup_service
+
+
+def insert_orders(db, count: int) -> None:
+    customer_id = db.execute(text("""
+        INSERT INTO customers (email, first_name, is_active, created_at)
+        VALUES ('bench-dashboard@example.com', 'Bench', true, now())
+        RETURNING id
+    """)).scalar()
+    db.execute(text("""
+        INSERT INTO orders (order_number, status, payment_status, customer_id, customer_name,
+                            customer_email, customer_phone, shipping_address, total_amount, created_at)
+        SELECT 'BENCH-' || g, 'delivered',
+               CASE WHEN g % 10 = 0 THEN 'pending' ELSE 'paid' END,
+               :customer_id, 'Bench', 'bench-dashboard@example.com', '000', 'Lagos',
+               round((random() * 50000)::numeric, 2),
+               now() - (random() * interval '180 days')
+        FROM generate_series(1, :count) g
+    """), {"customer_id": customer_id, "count": count})
+    db.execute(text("ANALYZE orders"))
+
+
+def orm_totals(db, start, previous_start):
+    """What get_dashboard_stats used to do"""
+    current_orders = db.query(models.Order).filter(
+        models.Order.created_at >= start,
+        models.Order.payment_status == "paid"
+    ).all()
+    previous_orders = db.query(models.Order).filter(
+        models.Order.created_at >= previous_start,
+        models.Order.created_at < start,
+        models.Order.payment_status == "paid"
+    ).all()
+    return {
+        "current_revenue": sum(float(o.total_amount) for o in current_orders),
+        "current_orders": len(current_orders),
+        "previous_revenue": sum(float(o.total_amount) for o in previous_orders),
+        "previous_orders": len(previous_orders),
+    }
+
+
+def aggregate_totals(db, start, previous_start):
+    """One FILTER aggregate over the raw orders table"""
+    current = models.Order.created_at >= start
+    previous = models.Order.created_at < start
+    row = db.execute(
+        select(
+            func.coalesce(func.sum(models.Order.total_amount).filter(current), 0).label("current_revenue"),
+            func.count().filter(current).label("current_orders"),
+            func.coalesce(func.sum(models.Order.total_amount).filter(previous), 0).label("previous_revenue"),
+            func.count().filter(previous).label("previous_orders"),
+        ).where(models.Order.created_at >= previous_start, models.Order.payment_status == "paid")
+    ).one()
+    return dict(row._mapping)
+
+
+def measure(label: str, func, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - started) * 1000)
+    # Separate run for memory: tracemalloc itself slows allocation-heavy code
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"  {label:<22} median {statistics.median(timings):9.1f} ms   peak {peak / 1024 / 1024:8.2f} MiB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard stats: ORM hydration vs SQL aggregate")
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--range", type=int, default=90, choices=[7, 30, 90], help="Dashboard range in days")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(f"Inserting {args.orders} orders (rolled back afterwards)...")
+        insert_orders(db, args.orders)
+        sales_rollup_service.rebuild(db, commit=False)
+        start = datetime.now() - timedelta(days=args.range)
+        previous_start = start - timedelta(days=args.range)
+
+        print(f"{args.range}d range, {args.repeat} runs each")
+
+        def orm():
+            result = orm_totals(db, start, previous_start)
+            db.expunge_all()
+            return result
+
+        before = measure("ORM .all() + Python", orm, args.repeat)
+        aggregate = measure("SUM/COUNT FILTER", lambda: aggregate_totals(db, start, previous_start), args.repeat)
+        rollup = measure("daily_sales rollup", lambda: analytics_service.order_period_totals(db, start, previous_start),
+                         args.repeat)
+
+        assert before["current_orders"] == aggregate["current_orders"]
+        assert before["previous_orders"] == aggregate["previous_orders"]
+        print(f"  {aggregate['current_orders']} current / {aggregate['previous_orders']} previous paid orders; "
+              f"rollup (whole days) {rollup['current_orders']} / {rollup['previous_orders']}")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
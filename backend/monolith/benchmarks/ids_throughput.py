@@ -0,0 +1,82 @@
+"""
+Benchmark: order number / payment reference generation.
+
+Times utils/ids.py against the generator it replaced (datetime.now() plus
+the first 8 hex characters of a uuid4), single-threaded and with --threads
+threads sharing the process-wide generator, and counts duplicates (the old
+format only has 32 random bits per second) and, per thread, out-of-order IDs.
+No database is needed: IDs are issued without a round-trip.
+
+    python benchmarks/ids_throughput.py
+    python benchmarks/ids_throughput.py --count 500000 --threads 16
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import ids
+
+
+def legacy_order_number() -> str:
+    """The per-module generate_order_number the ID service replaced"""
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    unique_id = str(uuid.uuid4())[:8].upper()
+    return f"ORD-{timestamp}-{unique_id}"
+
+
+def single_threaded(label: str, generate, count: int) -> float:
+    generate()
+    started = time.perf_counter()
+    generated = [generate() for _ in range(count)]
+    rate = count / (time.perf_counter() - started)
+    duplicates = count - len(set(generated))
+    print(f"  {label:<30} {rate:12,.0f} ids/sec  {1_000_000 / rate:6.2f} us/id  {duplicates} duplicates")
+    return rate
+
+
+def multi_threaded(generate, count: int, threads: int) -> None:
+    per_thread = count // threads
+    results = [None] * threads
+
+    def worker(index: int) -> None:
+        results[index] = [generate() for _ in range(per_thread)]
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    generated = [value for batch in results for value in batch]
+    duplicates = len(generated) - len(set(generated))
+    unsorted = sum(batch != sorted(batch) for batch in results)
+    print(f"  {threads} threads x {per_thread:,}: {len(generated) / elapsed:12,.0f} ids/sec")
+    print(f"  duplicates: {duplicates}, threads with out-of-order IDs: {unsorted}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ID generation throughput and uniqueness")
+    parser.add_argument("--count", type=int, default=200_000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"Single thread, {args.count:,} IDs")
+    legacy = single_threaded("before: datetime + uuid4[:8]", legacy_order_number, args.count)
+    ulid = single_threaded("after: new_order_number", ids.new_order_number, args.count)
+    print(f"  {'speedup':<30} {ulid / legacy:12.2f}x\n")
+
+    print(f"Shared generator, {args.count:,} IDs")
+    multi_threaded(ids.new_order_number, args.count, args.threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Load test: sync Session vs asyncpg AsyncSession at high concurrency.
+
+For each mode a throwaway single-worker uvicorn server (like one Fly
+machine) serves the storefront product listing query, uncached, through
+either the threadpool + sync Session or the event loop + AsyncSession.
+The driver keeps --concurrency connections busy for --duration seconds and
+reports requests/second, latency percentiles, errors and the server's peak
+RSS and thread count.
+
+Needs a PostgreSQL DATABASE_URL with some products (seed.py).
+
+    python benchmarks/load_test_sessions.py
+    python benchmarks/load_test_sessions.py --concurrency 500 --duration 30 --modes async
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LISTING_LIMIT = 20
+
+
+def build_app(mode: str):
+    from fastapi import Depends, FastAPI
+    from sqlalchemy import select
+    from sqlalchemy.orm import selectinload
+
+    import models
+    import schemas
+    from database import get_async_db, get_db
+
+    app = FastAPI()
+    query = select(models.Product).options(
+        selectinload(models.Product.variants), selectinload(models.Product.images)
+    ).where(models.Product.is_active).limit(LISTING_LIMIT)
+
+    if mode == "sync":
+        @app.get("/products")
+        def list_products(db=Depends(get_db)):
+            return [schemas.ProductResponse.model_validate(p) for p in db.scalars(query).all()]
+    else:
+        @app.get("/products")
+        async def list_products(db=Depends(get_async_db)):
+            return [schemas.ProductResponse.model_validate(p) for p in (await db.scalars(query)).all()]
+    return app
+
+
+def serve(mode: str, port: int) -> None:
+    import uvicorn
+
+    uvicorn.run(build_app(mode), host="127.0.0.1", port=port, log_level="warning",
+                backlog=4096, limit_concurrency=None)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def drive(url: str, concurrency: int, duration: float, pid: int) -> dict:
+    import httpx
+    import psutil
+
+    process = psutil.Process(pid)
+    latencies = []
+    errors = 0
+    peak = {"rss": 0, "threads": 0}
+    deadline = time.perf_counter() + duration
+
+    async def sample_memory():
+        while time.perf_counter() < deadline:
+            peak["rss"] = max(peak["rss"], process.memory_info().rss)
+            peak["threads"] = max(peak["threads"], process.num_threads())
+            await asyncio.sleep(0.2)
+
+    async def worker(client):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await client.get(url)
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        idle_rss = process.memory_info().rss
+        await asyncio.gather(sample_memory(), *[worker(client) for _ in range(concurrency)])
+
+    latencies.sort()
+
+    def pick(q):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000 if latencies else 0
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(pick(0.50), 1),
+        "p99_ms": round(pick(0.99), 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 1) if latencies else 0,
+        "idle_rss_mb": round(idle_rss / 2**20, 1),
+        "peak_rss_mb": round(peak["rss"] / 2**20, 1),
+        "peak_threads": peak["threads"],
+    }
+
+
+def run_mode(mode: str, concurrency: int, duration: float, warmup: float) -> dict:
+    port = free_port()
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", mode, "--port", str(port)])
+    try:
+        url = f"http://127.0.0.1:{port}/products"
+        for _ in range(100):
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                    break
+            except OSError:
+                time.sleep(0.1)
+        if warmup:
+            asyncio.run(drive(url, min(concurrency, 20), warmup, server.pid))
+        return asyncio.run(drive(url, concurrency, duration, server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sync and async session paths under load")
+    parser.add_argument("--concurrency", type=int, default=500, help="Concurrent connections")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per mode")
+    parser.add_argument("--warmup", type=float, default=3, help="Warm-up seconds before measuring")
+    parser.add_argument("--modes", nargs="+", choices=["sync", "async"], default=["sync", "async"])
+    parser.add_argument("--serve", choices=["sync", "async"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    print(f"{'mode':<6} {'rps':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'rss MB':>14} {'threads':>8}")
+    for mode in args.modes:
+        result = run_mode(mode, args.concurrency, args.duration, args.warmup)
+        print(
+            f"{mode:<6} {result['rps']:>8} {result['p50_ms']:>8} {result['p99_ms']:>8} {result['errors']:>7} "
+            f"{result['idle_rss_mb']:>6}->{result['peak_rss_mb']:<7} {result['peak_threads']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
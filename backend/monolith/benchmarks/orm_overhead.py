@@ -0,0 +1,133 @@
+"""
+Microbenchmark: per-request ORM overhead of the hot lookups.
+
+Times each lookup the way the routes used to build it (a fresh Query or
+select() per call) against the cached statements in utils/hot_queries.py,
+on the same session and rows, so the difference is statement construction,
+cache-key generation and round trips rather than the query itself.
+
+Uses DATABASE_URL (PostgreSQL with seed.py data gives realistic numbers;
+the async case is skipped on other backends).
+
+    python benchmarks/orm_overhead.py
+    python benchmarks/orm_overhead.py --iterations 20000 --cart-size 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+import models
+from database import AsyncSessionLocal, SessionLocal
+from utils import hot_queries
+
+
+def timed(label: str, func, iterations: int) -> float:
+    func()  # warm the compiled cache
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    per_call_us = (time.perf_counter() - started) / iterations * 1_000_000
+    print(f"  {label:<34} {per_call_us:9.1f} us/call")
+    return per_call_us
+
+
+def compare(title: str, before, after, iterations: int, before_label: str = "Query per call") -> None:
+    print(title)
+    old = timed(f"before: {before_label}", before, iterations)
+    new = timed("after: lambda_stmt", after, iterations)
+    print(f"  {'speedup':<34} {old / new:9.2f}x\n")
+
+
+async def timed_async(label: str, func, iterations: int) -> float:
+    await func()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await func()
+    per_call_us = (time.perf_counter() - started) / iterations * 1_000_000
+    print(f"  {label:<34} {per_call_us:9.1f} us/call")
+    return per_call_us
+
+
+async def compare_read_product(product_id: int, iterations: int) -> None:
+    async with AsyncSessionLocal() as db:
+        async def before():
+            db.expunge_all()
+            return await db.scalar(
+                select(models.Product).options(
+                    selectinload(models.Product.variants),
+                    selectinload(models.Product.images)
+                ).where(models.Product.id == product_id, models.Product.is_active)
+            )
+
+        async def after():
+            db.expunge_all()
+            return await hot_queries.active_product(db, product_id)
+
+        print("read_product (asyncpg)")
+        old = await timed_async("before: select() per call", before, iterations)
+        new = await timed_async("after: lambda_stmt", after, iterations)
+        print(f"  {'speedup':<34} {old / new:9.2f}x\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request ORM overhead of hot lookups")
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--cart-size", type=int, default=5)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        admin = db.query(models.AdminUser).first()
+        variant_ids = [v.id for v in db.query(models.ProductVariant).filter(
+            models.ProductVariant.is_active
+        ).limit(args.cart_size)]
+        product = db.query(models.Product).filter(models.Product.is_active).first()
+        if not admin or not variant_ids or not product:
+            print("Need at least one admin user and active product (run seed.py)")
+            return
+
+        email = admin.email
+
+        def admin_before():
+            db.expunge_all()
+            return db.query(models.AdminUser).filter(models.AdminUser.email == email).first()
+
+        def admin_after():
+            db.expunge_all()
+            return hot_queries.admin_by_email(db, email)
+
+        def cart_before():
+            db.expunge_all()
+            return [
+                db.query(models.ProductVariant).filter(
+                    models.ProductVariant.id == variant_id,
+                    models.ProductVariant.is_active
+                ).first()
+                for variant_id in variant_ids
+            ]
+
+        def cart_after():
+            db.expunge_all()
+            return hot_queries.active_variants_by_id(db, variant_ids)
+
+        print(f"{db.bind.dialect.name}, {args.iterations} iterations\n")
+        compare("get_current_admin_from_cookie: AdminUser by email", admin_before, admin_after, args.iterations)
+        compare(f"validate_cart: {len(variant_ids)} variants", cart_before, cart_after, args.iterations,
+                before_label="Query per cart item")
+    finally:
+        db.close()
+
+    if AsyncSessionLocal is not None:
+        asyncio.run(compare_read_product(product.id, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -18,7 +18,29 @@ class Settings:
     PAYSTACK_SECRET_KEY: str = os.getenv("PAYSTACK_SECRET_KEY", "")
     PAYSTACK_PUBLIC_KEY: str = os.getenv("PAYSTACK_PUBLIC_KEY", "")
     PAYMENT_MODE: str = os.getenv("PAYMENT_MODE", "production")
-    
+    # Gateway HTTP client tuning (override PAYSTACK_BASE_URL to point at a local stub)
+    PAYSTACK_BASE_URL: str = os.getenv("PAYSTACK_BASE_URL", "https://api.paystack.co")
+    PAYSTACK_CONNECT_TIMEOUT: float = float(os.getenv("PAYSTACK_CONNECT_TIMEOUT", "5"))
+    PAYSTACK_READ_TIMEOUT: float = float(os.getenv("PAYSTACK_READ_TIMEOUT", "20"))
+    PAYSTACK_MAX_RETRIES: int = int(os.getenv("PAYSTACK_MAX_RETRIES", "3"))
+    PAYSTACK_POOL_SIZE: int = int(os.getenv("PAYSTACK_POOL_SIZE", "10"))
+    PAYSTACK_CIRCUIT_FAILURES: int = int(os.getenv("PAYSTACK_CIRCUIT_FAILURES", "5"))
+    PAYSTACK_CIRCUIT_RESET_SECONDS: float = float(os.getenv("PAYSTACK_CIRCUIT_RESET_SECONDS", "30"))
+    # Webhook ingestion: 'inline' processes charge.success in the request,
+    # 'queue' stores it and lets the batch worker create orders
+    WEBHOOK_INGEST_MODE: str = os.getenv("WEBHOOK_INGEST_MODE", "inline")
+    WEBHOOK_BATCH_SIZE: int = int(os.getenv("WEBHOOK_BATCH_SIZE", "50"))
+    # Run the outbox notification worker inside the API process
+    OUTBOX_WORKER_ENABLED: bool = os.getenv("OUTBOX_WORKER_ENABLED", "true").lower() == "true"
+    # Listen for order/stock events and serve them to admins over SSE (PostgreSQL only)
+    ADMIN_EVENTS_ENABLED: bool = os.getenv("ADMIN_EVENTS_ENABLED", "true").lower() == "true"
+    # Run recurring maintenance jobs (utils/scheduler.py) inside the API process
+    SCHEDULER_ENABLED: bool = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+    # Expire abandoned checkouts on the scheduler
+    CHECKOUT_CLEANUP_ENABLED: bool = os.getenv("CHECKOUT_CLEANUP_ENABLED", "true").lower() == "true"
+    # Nightly pg_dump to BACKUP_DIR (needs pg_dump and a persistent volume)
+    BACKUP_ENABLED: bool = os.getenv("BACKUP_ENABLED", "false").lower() == "true"
+
     # Mailgun Configuration
     MAILGUN_API_KEY: str = os.getenv("MAILGUN_API_KEY", "")
     MAILGUN_DOMAIN: str = os.getenv("MAILGUN_DOMAIN", "")
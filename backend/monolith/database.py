@@ -1,11 +1,20 @@
 import os
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from fastapi import Request
 from utils import constants
+from utils.db_routing import Replica, ReplicaRouter, wants_primary
+from utils.db_runtime import (
+    DatabaseStats, async_stats, install_instrumentation, install_session_timeouts, instrumented_pool_class, stats
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -44,23 +53,149 @@ if not DATABASE_URL:
 
     DATABASE_URL = f"postgresql://{DATABASE_USER}:{DATABASE_PASSWORD}@{DATABASE_HOST}:{DATABASE_PORT}/{DATABASE_NAME}"
 
-print(f"[DB] Using database URL: {DATABASE_URL}")
+print(f"[DB] Using database URL: {make_url(DATABASE_URL).render_as_string(hide_password=True)}")
 
 
 # === 3️⃣ Create SQLAlchemy engine & session ===
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=getattr(constants, "DB_POOL_SIZE", 5),
-    max_overflow=getattr(constants, "DB_MAX_OVERFLOW", 10),
-    echo=False
-)
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", constants.DB_POOL_SIZE)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", constants.DB_MAX_OVERFLOW)
+DB_POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", constants.DB_POOL_TIMEOUT)
+# Retire connections before Fly's proxy / the server drops them as idle
+DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", constants.DB_POOL_RECYCLE)
+# Pre-ping costs a round trip per checkout; off by default (see utils/db_runtime.py)
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() == "true"
+DB_STATEMENT_TIMEOUT_MS = _env_int("DB_STATEMENT_TIMEOUT_MS", constants.DB_STATEMENT_TIMEOUT_MS)
+DB_CHECKOUT_STATEMENT_TIMEOUT_MS = _env_int("DB_CHECKOUT_STATEMENT_TIMEOUT_MS", constants.DB_CHECKOUT_STATEMENT_TIMEOUT_MS)
+DB_REPORT_STATEMENT_TIMEOUT_MS = _env_int("DB_REPORT_STATEMENT_TIMEOUT_MS", constants.DB_REPORT_STATEMENT_TIMEOUT_MS)
+DB_SLOW_QUERY_MS = _env_int("DB_SLOW_QUERY_MS", constants.DB_SLOW_QUERY_MS)
+
+def _is_postgres(url: str) -> bool:
+    return make_url(url).get_backend_name() == "postgresql"
+
+
+def make_engine(url: str, engine_stats: DatabaseStats = stats):
+    """Sync engine with the tuned, instrumented pool (used for the primary and each replica)"""
+    engine_options = {}
+    if _is_postgres(url):
+        engine_options = {
+            "poolclass": instrumented_pool_class(QueuePool, engine_stats),
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            # Most recently returned connection first, so idle extras age out via recycle
+            "pool_use_lifo": True,
+            "connect_args": {
+                "options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}",
+                "application_name": os.getenv("FLY_MACHINE_ID", "madrush-api"),
+                # Detect dead peers at the TCP level instead of on the next query
+                "keepalives": 1,
+                "keepalives_idle": 30,
+                "keepalives_interval": 10,
+                "keepalives_count": 3,
+            },
+        }
+
+    new_engine = create_engine(
+        url,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        pool_recycle=DB_POOL_RECYCLE,
+        echo=False,
+        **engine_options
+    )
+    install_instrumentation(new_engine, slow_query_ms=DB_SLOW_QUERY_MS, engine_stats=engine_stats)
+    return new_engine
+
+
+engine = make_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+install_session_timeouts(SessionLocal, engine.dialect.name)
 Base = declarative_base()
 
 
-# === 4️⃣ Database session dependency for FastAPI ===
+# === 4️⃣ Async engine (asyncpg) for read-heavy routes on the event loop ===
+DB_ASYNC_POOL_SIZE = _env_int("DB_ASYNC_POOL_SIZE", constants.DB_ASYNC_POOL_SIZE)
+DB_ASYNC_MAX_OVERFLOW = _env_int("DB_ASYNC_MAX_OVERFLOW", constants.DB_ASYNC_MAX_OVERFLOW)
+
+
+# asyncpg prepares every statement server-side and keeps this many per
+# connection; set 0 behind a transaction-pooling proxy (e.g. PgBouncer)
+DB_ASYNC_STATEMENT_CACHE_SIZE = _env_int("DB_ASYNC_STATEMENT_CACHE_SIZE", constants.DB_ASYNC_STATEMENT_CACHE_SIZE)
+
+
+def _asyncpg_url(url: str):
+    """Same database through the asyncpg driver; libpq's sslmode becomes asyncpg's ssl"""
+    url = make_url(url).set(drivername="postgresql+asyncpg")
+    query = dict(url.query)
+    query.setdefault("prepared_statement_cache_size", str(DB_ASYNC_STATEMENT_CACHE_SIZE))
+    sslmode = query.pop("sslmode", None)
+    if sslmode and sslmode != "disable":
+        query["ssl"] = sslmode
+    return url.set(query=query)
+
+
+def make_async_engine(url: str, engine_stats: DatabaseStats = async_stats):
+    """asyncpg engine for a PostgreSQL URL"""
+    new_engine = create_async_engine(
+        _asyncpg_url(url),
+        poolclass=instrumented_pool_class(AsyncAdaptedQueuePool, engine_stats),
+        pool_size=DB_ASYNC_POOL_SIZE,
+        max_overflow=DB_ASYNC_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        pool_use_lifo=True,
+        connect_args={
+            "server_settings": {
+                "statement_timeout": str(DB_STATEMENT_TIMEOUT_MS),
+                "application_name": os.getenv("FLY_MACHINE_ID", "madrush-api"),
+            },
+        },
+    )
+    install_instrumentation(new_engine.sync_engine, slow_query_ms=DB_SLOW_QUERY_MS, engine_stats=engine_stats)
+    return new_engine
+
+
+async_engine = None
+AsyncSessionLocal = None
+if _is_postgres(DATABASE_URL):
+    async_engine = make_async_engine(DATABASE_URL)
+    # Routes return loaded objects after the session closes
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+
+# === 5️⃣ Read replicas ===
+# Comma-separated replica URLs; unset means every read goes to the primary
+DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", str(constants.DB_REPLICA_MAX_LAG_SECONDS)))
+DB_REPLICA_CHECK_SECONDS = float(os.getenv("DB_REPLICA_CHECK_SECONDS", str(constants.DB_REPLICA_CHECK_SECONDS)))
+
+
+def _make_replica(index: int, url: str) -> Replica:
+    replica_stats, replica_async_stats = DatabaseStats(), DatabaseStats()
+    return Replica(
+        name=f"replica-{index}",
+        engine=make_engine(url, replica_stats),
+        async_engine=make_async_engine(url, replica_async_stats) if _is_postgres(url) else None,
+        engine_stats=replica_stats,
+        async_engine_stats=replica_async_stats,
+    )
+
+
+replica_router = ReplicaRouter(
+    [_make_replica(i, url) for i, url in enumerate(DATABASE_REPLICA_URLS, start=1)],
+    max_lag_seconds=DB_REPLICA_MAX_LAG_SECONDS,
+    check_interval=DB_REPLICA_CHECK_SECONDS,
+)
+if DATABASE_REPLICA_URLS:
+    print(f"[DB] Routing read-only sessions across {len(DATABASE_REPLICA_URLS)} replica(s)")
+
+
+# === 6️⃣ Database session dependencies for FastAPI ===
 def get_db():
     db = SessionLocal()
     try:
@@ -69,7 +204,89 @@ def get_db():
         db.close()
 
 
-# === 5️⃣ Optional sanity check ===
+def get_db_with_timeout(statement_timeout_ms: int):
+    """Session dependency whose transactions use their own statement timeout"""
+    def dependency():
+        db = SessionLocal()
+        db.info["statement_timeout_ms"] = statement_timeout_ms
+        try:
+            yield db
+        finally:
+            db.close()
+    return dependency
+
+
+async def get_async_db():
+    """AsyncSession dependency; only available on PostgreSQL (asyncpg)"""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async sessions require a PostgreSQL DATABASE_URL")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Customer-facing writes should fail fast; reports may scan more
+get_checkout_db = get_db_with_timeout(DB_CHECKOUT_STATEMENT_TIMEOUT_MS)
+get_report_db = get_db_with_timeout(DB_REPORT_STATEMENT_TIMEOUT_MS)
+
+
+def _replica_unreachable(error: Exception) -> bool:
+    return isinstance(error, (exc.OperationalError, exc.InterfaceError)) or (
+        isinstance(error, exc.DBAPIError) and error.connection_invalidated
+    )
+
+
+@contextmanager
+def read_session(prefer_primary: bool = False, statement_timeout_ms: Optional[int] = None):
+    """
+    Read-only Session on a replica within the lag budget, else the primary.
+    For work outside a request's dependencies, e.g. queries fanned out to
+    worker threads, which each need their own session.
+    """
+    replica = replica_router.pick(prefer_primary=prefer_primary)
+    db = SessionLocal(bind=replica.engine) if replica else SessionLocal()
+    if statement_timeout_ms is not None:
+        db.info["statement_timeout_ms"] = statement_timeout_ms
+    try:
+        yield db
+    except Exception as e:
+        if replica and _replica_unreachable(e):
+            replica_router.mark_failed(replica, e)
+        raise
+    finally:
+        db.close()
+
+
+def get_read_db_with_timeout(statement_timeout_ms: Optional[int] = None):
+    """
+    Session dependency for read-only routes: a replica within the lag budget,
+    else the primary. Clients that just made an admin write stay on the primary.
+    """
+    def dependency(request: Request):
+        with read_session(wants_primary(request.cookies), statement_timeout_ms) as db:
+            yield db
+    return dependency
+
+
+async def get_async_read_db(request: Request):
+    """AsyncSession counterpart of get_read_db"""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async sessions require a PostgreSQL DATABASE_URL")
+    replica = replica_router.pick(prefer_primary=wants_primary(request.cookies), need_async=True)
+    session = AsyncSessionLocal(bind=replica.async_engine) if replica else AsyncSessionLocal()
+    async with session as db:
+        try:
+            yield db
+        except Exception as e:
+            if replica and _replica_unreachable(e):
+                replica_router.mark_failed(replica, e)
+            raise
+
+
+get_read_db = get_read_db_with_timeout()
+get_report_read_db = get_read_db_with_timeout(DB_REPORT_STATEMENT_TIMEOUT_MS)
+
+
+# === 7️⃣ Optional sanity check ===
 if __name__ == "__main__":
     try:
         with engine.connect() as conn:
@@ -0,0 +1,41 @@
+"""
+Backfill (or repair) the customer_metrics table from paid orders.
+The migrations fill an empty table once; afterwards order creation,
+refunds and payment status changes keep it current, and the scheduler
+rebuilds it nightly. Use this to repair drift.
+
+    python jobs/backfill_customer_metrics.py
+"""
+import logging
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from database import SessionLocal
+from services.customer_metrics_service import rebuild
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Main entry point for the backfill job"""
+    db = SessionLocal()
+    try:
+        result = rebuild(db)
+        logger.info(f"Backfill completed: {result}")
+    except Exception:
+        logger.exception("Fatal error in customer_metrics backfill")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
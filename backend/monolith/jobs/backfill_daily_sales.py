@@ -0,0 +1,57 @@
+"""
+Backfill (or repair) the daily_sales rollup from orders and orderitems.
+The migrations fill an empty table once; afterwards order creation,
+refunds, payment status changes and recategorisations keep it current, and
+the scheduler recomputes the last few days nightly. Use this to repair
+older dates.
+
+    python jobs/backfill_daily_sales.py              # rebuild everything
+    python jobs/backfill_daily_sales.py --days 90    # only the last 90 days
+    python jobs/backfill_daily_sales.py --since 2025-01-01
+"""
+import logging
+import os
+import sys
+from datetime import date, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from database import SessionLocal
+from services.sales_rollup_service import rebuild
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Main entry point for the backfill job"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild the daily_sales rollup from orders")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--days", type=int, help="Only rebuild the last N days")
+    group.add_argument("--since", type=date.fromisoformat, help="Only rebuild from this date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    since = args.since
+    if args.days is not None:
+        since = date.today() - timedelta(days=args.days)
+
+    db = SessionLocal()
+    try:
+        result = rebuild(db, since=since)
+        logger.info(f"Backfill completed: {result}")
+    except Exception:
+        logger.exception("Fatal error in daily_sales backfill")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,22 @@
 """
 Scheduled job to clean up expired pending checkouts
-Run this periodically (e.g., every 15 minutes) via cron or task scheduler
+The API also runs this on its in-process scheduler (CHECKOUT_CLEANUP_ENABLED);
+use this script for one-off runs or a dedicated worker. Safe to run
+alongside other instances: chunks are claimed with FOR UPDATE SKIP LOCKED.
+
+    python jobs/cleanup_expired_checkouts.py
+    python jobs/cleanup_expired_checkouts.py --batch-size 500
 """
 import sys
 import os
-from datetime import datetime, timezone
 import logging
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from sqlalchemy.orm import Session
 from database import SessionLocal
-import models
+from services.checkout_service import cleanup_expired_checkouts
+from utils import constants
 
 # Configure logging
 logging.basicConfig(
@@ -22,62 +26,20 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def cleanup_expired_checkouts(db: Session) -> dict:
-    """
-    Clean up expired pending checkouts
-    
-    Returns:
-        dict: Statistics about the cleanup operation
-    """
-    try:
-        # Find expired pending checkouts (use timezone-aware datetime)
-        now = datetime.now(timezone.utc)
-        expired_checkouts = db.query(models.PendingCheckout).filter(
-            models.PendingCheckout.status == "pending",
-            models.PendingCheckout.expires_at < now
-        ).all()
-        
-        count = len(expired_checkouts)
-        
-        if count == 0:
-            logger.info("No expired pending checkouts found")
-            return {"expired_count": 0, "status": "success"}
-        
-        logger.info(f"Found {count} expired pending checkouts")
-        
-        # Mark as expired instead of deleting (for audit trail)
-        for checkout in expired_checkouts:
-            checkout.status = "expired"
-            logger.info(f"Marked checkout as expired: {checkout.payment_reference}")
-        
-        # Commit changes
-        db.commit()
-        
-        logger.info(f"Successfully cleaned up {count} expired checkouts")
-        
-        return {
-            "expired_count": count,
-            "status": "success",
-            "message": f"Cleaned up {count} expired checkouts"
-        }
-        
-    except Exception as e:
-        logger.error(f"Error during cleanup: {str(e)}")
-        db.rollback()
-        return {
-            "expired_count": 0,
-            "status": "error",
-            "message": str(e)
-        }
-
-
 def main():
     """Main entry point for the cleanup job"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Expire overdue pending checkouts")
+    parser.add_argument("--batch-size", type=int, default=constants.CHECKOUT_CLEANUP_BATCH_SIZE,
+                        help="Rows updated per committed chunk")
+    args = parser.parse_args()
+
     logger.info("Starting expired checkout cleanup job")
     
     db = SessionLocal()
     try:
-        result = cleanup_expired_checkouts(db)
+        result = cleanup_expired_checkouts(db, args.batch_size)
         logger.info(f"Cleanup completed: {result}")
         
         if result["status"] == "error":
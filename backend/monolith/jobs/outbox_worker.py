@@ -0,0 +1,51 @@
+"""
+Standalone worker that delivers outbox notifications (order confirmation
+emails, owner WhatsApp alerts). Use when OUTBOX_WORKER_ENABLED=false on the
+API machines and delivery should run in its own process.
+
+    python jobs/outbox_worker.py            # run until interrupted
+    python jobs/outbox_worker.py --once     # deliver one batch and exit
+"""
+import logging
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from services import outbox_service
+from utils import constants
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Main entry point for the outbox worker"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Deliver pending outbox events")
+    parser.add_argument("--once", action="store_true", help="Process a single batch and exit")
+    parser.add_argument("--batch-size", type=int, default=constants.OUTBOX_BATCH_SIZE, help="Events per batch")
+    args = parser.parse_args()
+
+    logger.info("Starting outbox worker")
+    try:
+        while True:
+            summary = outbox_service.drain_once(args.batch_size)
+            if args.once:
+                logger.info(f"Batch result: {summary}")
+                break
+            if not summary or "error" in summary:
+                time.sleep(constants.OUTBOX_POLL_SECONDS)
+    except KeyboardInterrupt:
+        logger.info("Outbox worker interrupted")
+
+
+if __name__ == "__main__":
+    main()
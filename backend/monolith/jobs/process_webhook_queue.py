@@ -0,0 +1,51 @@
+"""
+Standalone worker that drains queued Paystack webhook events in micro-batches
+Use when WEBHOOK_INGEST_MODE=queue and the batch worker should run outside
+the API process (the API also runs one in its lifespan).
+
+    python jobs/process_webhook_queue.py            # run until interrupted
+    python jobs/process_webhook_queue.py --once     # drain one batch and exit
+"""
+import logging
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from services import webhook_service
+from utils import constants
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Main entry point for the webhook batch worker"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Drain queued webhook events")
+    parser.add_argument("--once", action="store_true", help="Process a single batch and exit")
+    parser.add_argument("--batch-size", type=int, default=None, help="Events per batch")
+    args = parser.parse_args()
+
+    logger.info("Starting webhook batch worker")
+    try:
+        while True:
+            summary = webhook_service.drain_once(args.batch_size)
+            if args.once:
+                logger.info(f"Batch result: {summary}")
+                break
+            if not summary or "error" in summary:
+                time.sleep(constants.WEBHOOK_WORKER_POLL_SECONDS)
+    except KeyboardInterrupt:
+        logger.info("Webhook batch worker interrupted")
+
+
+if __name__ == "__main__":
+    main()
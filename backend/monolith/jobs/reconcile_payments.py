@@ -0,0 +1,64 @@
+"""
+Reconcile stale pending checkouts against Paystack.
+Catches payments whose webhook never arrived: confirmed charges become
+orders, failed/abandoned ones are closed. Run every 15 minutes.
+
+    python jobs/reconcile_payments.py
+    python jobs/reconcile_payments.py --concurrency 4 --lookback-hours 72
+"""
+import asyncio
+import logging
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from services import reconciliation_service
+from utils import constants
+from utils.payment import AsyncPaystackClient
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def run(args) -> dict:
+    client = AsyncPaystackClient()
+    try:
+        return await reconciliation_service.reconcile(
+            client=client,
+            stale_minutes=args.stale_minutes,
+            lookback_hours=args.lookback_hours,
+            page_size=args.page_size,
+            concurrency=args.concurrency
+        )
+    finally:
+        await client.aclose()
+
+
+def main():
+    """Main entry point for payment reconciliation"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reconcile stale pending checkouts with Paystack")
+    parser.add_argument("--stale-minutes", type=int, default=constants.RECONCILE_STALE_MINUTES)
+    parser.add_argument("--lookback-hours", type=int, default=constants.RECONCILE_LOOKBACK_HOURS)
+    parser.add_argument("--page-size", type=int, default=constants.RECONCILE_PAGE_SIZE)
+    parser.add_argument("--concurrency", type=int, default=constants.RECONCILE_CONCURRENCY)
+    args = parser.parse_args()
+
+    logger.info("Starting payment reconciliation")
+    try:
+        summary = asyncio.run(run(args))
+        logger.info(f"Reconciliation complete: {summary}")
+    except Exception:
+        logger.exception("Reconciliation failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Maintain webhook_events partitions: create upcoming monthly partitions, drop
+those past the retention window and prune old dedupe keys.
+Run daily (cron / scheduled machine).
+
+    python jobs/webhook_retention.py
+"""
+import logging
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from services import webhook_retention_service
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Main entry point for webhook_events retention"""
+    logger.info("Starting webhook_events retention")
+    try:
+        summary = webhook_retention_service.run_retention()
+        logger.info(f"Retention complete: {summary}")
+    except Exception:
+        logger.exception("Retention failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
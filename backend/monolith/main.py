@@ -1,17 +1,24 @@
 # file: main.py
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Response, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from routers import products, admin, orders, notifications, auth, admin_management, payment_routes, payment_webhook, payment_verification
-from database import SessionLocal
+from routers import products, admin, orders, notifications, auth, admin_management, payment_routes, payment_webhook, payment_verification, visitor_analytics
+from database import SessionLocal, async_engine, replica_router
 from config import settings
 from utils.rate_limiting import limiter, rate_limit_handler
+from utils.payment import paystack_client, async_paystack_client
+from utils.idempotency import IdempotencyMiddleware
+from utils.db_routing import ReadYourWritesMiddleware
+from utils.cache import async_redis_client
 
 import os
 import traceback
@@ -24,11 +31,47 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown hooks"""
+    stop_workers = asyncio.Event()
+    workers = []
+    if settings.WEBHOOK_INGEST_MODE == "queue":
+        from services import webhook_service
+        workers.append(asyncio.create_task(webhook_service.run_batch_worker(stop_workers)))
+    if settings.OUTBOX_WORKER_ENABLED:
+        from services import outbox_service
+        workers.append(asyncio.create_task(outbox_service.run_outbox_worker(stop_workers)))
+    if settings.SCHEDULER_ENABLED:
+        from services.scheduled_jobs import build_scheduler
+        app.state.scheduler = build_scheduler()
+        workers.append(asyncio.create_task(app.state.scheduler.run(stop_workers)))
+    if settings.ADMIN_EVENTS_ENABLED and async_engine is not None:
+        from services.admin_events_service import broker
+        workers.append(asyncio.create_task(broker.run(stop_workers)))
+    if replica_router.replicas:
+        workers.append(asyncio.create_task(replica_router.run_lag_monitor(stop_workers)))
+
+    yield
+
+    stop_workers.set()
+    await asyncio.gather(*workers, return_exceptions=True)
+    # Release pooled gateway and database connections
+    paystack_client.close()
+    await async_paystack_client.aclose()
+    if async_engine is not None:
+        await async_engine.dispose()
+    replica_router.dispose()
+    await replica_router.dispose_async()
+    if async_redis_client is not None:
+        await async_redis_client.aclose()
+
 app = FastAPI(
     title="MAD RUSH E-commerce API",
     description="Monolithic API for MAD RUSH e-commerce platform",
     version="2.0.0",
-    redirect_slashes=False  # Prevent 307 redirects on Fly.io cold starts
+    redirect_slashes=False,  # Prevent 307 redirects on Fly.io cold starts
+    lifespan=lifespan
 )
 
 # Add rate limiting
@@ -68,10 +111,29 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "detail": "Validation error",
-            "errors": exc.errors()
+            "errors": jsonable_encoder(exc.errors())  # validator errors carry the ValueError in ctx
         }
     )
 
+# Idempotency-key replay for checkout, refunds and admin writes (innermost,
+# so stored bodies are uncompressed and replays still get CORS/security headers)
+app.add_middleware(
+    IdempotencyMiddleware,
+    path_prefixes=["/api/orders/", "/api/admin/"]
+)
+
+# Admin writes pin that browser's reads to the primary for a few seconds,
+# so the admin sees their own change even while replicas catch up
+app.add_middleware(
+    ReadYourWritesMiddleware,
+    path_prefixes=["/api/admin/"],
+    cookie_options={
+        "secure": settings.COOKIE_SECURE,
+        "samesite": settings.COOKIE_SAMESITE,
+        "domain": settings.COOKIE_DOMAIN or None,
+    }
+)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -79,6 +141,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor", "Content-Disposition"],
 )
 
 # GZip middleware
@@ -114,6 +177,7 @@ app.include_router(products.router, prefix="/api/products", tags=["Products"])
 app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 app.include_router(orders.router, prefix="/api/orders", tags=["Orders"])
 app.include_router(notifications.router, prefix="/api/notifications", tags=["Notifications"])
+app.include_router(visitor_analytics.router, prefix="/api/analytics", tags=["Storefront Analytics"])
 
 @app.get("/")
 def read_root():
@@ -1,9 +1,9 @@
 # file: models.py
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Numeric, DateTime, Boolean
+from sqlalchemy import Column, Integer, BigInteger, Identity, String, Text, ForeignKey, Numeric, Date, DateTime, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
-from utils.constants import ADMIN_ROLE, PRODUCT_NAME_MAX_LENGTH, CATEGORY_NAME_MAX_LENGTH, VARIANT_SIZE_MAX_LENGTH, VARIANT_COLOR_MAX_LENGTH, VARIANT_SKU_MAX_LENGTH, IMAGE_URL_MAX_LENGTH, IMAGE_ALT_TEXT_MAX_LENGTH, ORDER_NUMBER_MAX_LENGTH, ORDER_STATUS_MAX_LENGTH, PAYMENT_STATUS_MAX_LENGTH, PAYMENT_REFERENCE_MAX_LENGTH, CUSTOMER_EMAIL_MAX_LENGTH, CUSTOMER_PHONE_MAX_LENGTH, USERNAME_MAX_LENGTH, PASSWORD_HASH_MAX_LENGTH, ROLE_MAX_LENGTH, IDEMPOTENCY_KEY_MAX_LENGTH, PAYMENT_METHOD_MAX_LENGTH, NAME_MAX_LENGTH
+from utils.constants import LOW_STOCK_INDEX_CEILING, ADMIN_ROLE, PRODUCT_NAME_MAX_LENGTH, CATEGORY_NAME_MAX_LENGTH, VARIANT_SIZE_MAX_LENGTH, VARIANT_COLOR_MAX_LENGTH, VARIANT_SKU_MAX_LENGTH, IMAGE_URL_MAX_LENGTH, IMAGE_ALT_TEXT_MAX_LENGTH, ORDER_NUMBER_MAX_LENGTH, ORDER_STATUS_MAX_LENGTH, PAYMENT_STATUS_MAX_LENGTH, PAYMENT_REFERENCE_MAX_LENGTH, CUSTOMER_EMAIL_MAX_LENGTH, CUSTOMER_PHONE_MAX_LENGTH, USERNAME_MAX_LENGTH, PASSWORD_HASH_MAX_LENGTH, ROLE_MAX_LENGTH, IDEMPOTENCY_KEY_MAX_LENGTH, PAYMENT_METHOD_MAX_LENGTH, NAME_MAX_LENGTH
 
 class Product(Base):
     __tablename__ = "products"
@@ -29,11 +29,20 @@ class ProductVariant(Base):
     price = Column(Numeric(10, 2), nullable=False)
     sku = Column(String(VARIANT_SKU_MAX_LENGTH), unique=True, index=True)
     is_active = Column(Boolean, default=True)
+    low_stock_threshold = Column(Integer, nullable=True)  # overrides the category's
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
 
     product = relationship("Product", back_populates="variants")
 
+    __table_args__ = (
+        # Only the handful of variants near a stock-out, for inventory alerts
+        Index(
+            "ix_productvariants_low_stock", "stock_quantity", "id",
+            postgresql_where=text(f"is_active = true AND stock_quantity <= {LOW_STOCK_INDEX_CEILING}")
+        ),
+    )
+
 class ProductImage(Base):
     __tablename__ = "productimages"
 
@@ -57,7 +66,7 @@ class Order(Base):
     payment_status = Column(String(PAYMENT_STATUS_MAX_LENGTH), default="pending")
     payment_method = Column(String(PAYMENT_METHOD_MAX_LENGTH))
     payment_reference = Column(String(PAYMENT_REFERENCE_MAX_LENGTH))
-    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False, index=True)
     customer = relationship("Customer")
     customer_name = Column(String(NAME_MAX_LENGTH), nullable=False)
     customer_email = Column(String(CUSTOMER_EMAIL_MAX_LENGTH), nullable=False)
@@ -73,6 +82,15 @@ class Order(Base):
 
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
 
+    # Keyset pagination of the admin listings (services/order_listing_service.py).
+    # The pg_trgm GIN indexes for search live only in the migration, since
+    # they need the extension.
+    __table_args__ = (
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_orders_payment_status_created_at_id", "payment_status", "created_at", "id"),
+    )
+
 from sqlalchemy.dialects.postgresql import JSONB
 
 class PendingCheckout(Base):
@@ -82,7 +100,7 @@ class PendingCheckout(Base):
     idempotency_key = Column(String(IDEMPOTENCY_KEY_MAX_LENGTH), unique=True, nullable=False, index=True)
     payment_reference = Column(String(PAYMENT_REFERENCE_MAX_LENGTH), unique=True, nullable=False, index=True)
     checkout_data = Column(JSONB, nullable=False)  # JSONB for efficient querying
-    status = Column(String(50), default="pending")  # pending, completed, expired, failed
+    status = Column(String(50), default="pending")  # pending, completed, expired, failed, abandoned
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     expires_at = Column(DateTime(timezone=True), nullable=False)
 
@@ -112,6 +130,7 @@ class Category(Base):
     image_url = Column(String(IMAGE_URL_MAX_LENGTH), nullable=True)
     parent_id = Column(Integer, ForeignKey("categories.id"))
     is_active = Column(Boolean, default=True)
+    low_stock_threshold = Column(Integer, nullable=True)  # default for its variants
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     parent = relationship("Category", remote_side=[id])
@@ -190,13 +209,104 @@ class Payment(Base):
 
 
 class WebhookEvent(Base):
+    """Webhook audit log, range-partitioned by month on created_at (see services/webhook_retention_service.py)"""
     __tablename__ = "webhook_events"
 
-    id = Column(Integer, primary_key=True, index=True)
-    event_id = Column(String(255), unique=True, nullable=False, index=True)  # Paystack event ID
+    id = Column(BigInteger, Identity(), primary_key=True)
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())  # Partition key
+    event_id = Column(String(255), nullable=False, index=True)  # Paystack event ID (unique via webhook_event_keys)
     event_type = Column(String(50), nullable=False)  # charge.success, charge.failed, etc.
     payment_reference = Column(String(PAYMENT_REFERENCE_MAX_LENGTH), index=True)
-    status = Column(String(50), default="processed")  # processed, failed, duplicate
-    raw_data = Column(Text, nullable=False)  # JSON string of full webhook payload
+    status = Column(String(50), default="processed")  # queued, processing, processed, failed, unhandled
+    attempts = Column(Integer, nullable=False, default=0)  # Failed processing attempts (queue mode)
+    raw_data = Column(JSONB, nullable=False)  # Full webhook payload
     processed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class WebhookEventKey(Base):
+    """One row per webhook event id: the uniqueness guard for the partitioned webhook_events"""
+    __tablename__ = "webhook_event_keys"
+
+    event_id = Column(String(255), primary_key=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+
+class OutboxEvent(Base):
+    """Side effects (emails, WhatsApp) written in the same transaction as the change that caused them"""
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String(50), nullable=False)  # order_confirmation_email, owner_order_alert, ...
+    payload = Column(JSONB, nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending, sent, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_outbox_events_status_available", "status", "available_at"),
+    )
+
+
+class ReconciliationRun(Base):
+    """One pass of the payment reconciliation job over stale pending checkouts"""
+    __tablename__ = "reconciliation_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String(20), nullable=False, default="running")  # running, completed, failed
+    checked = Column(Integer, nullable=False, default=0)
+    confirmed = Column(Integer, nullable=False, default=0)  # gateway reported success
+    orders_created = Column(Integer, nullable=False, default=0)
+    closed = Column(Integer, nullable=False, default=0)  # failed/abandoned at the gateway
+    errors = Column(Integer, nullable=False, default=0)
+    details = Column(JSONB, nullable=True)  # payment_reference -> outcome (non-trivial outcomes only)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class SchedulerLease(Base):
+    """Last claimed slot per scheduled job, so each cron slot runs on one machine only"""
+    __tablename__ = "scheduler_leases"
+
+    job_name = Column(String(100), primary_key=True)
+    last_slot = Column(DateTime(timezone=True), nullable=False)  # cron time the last run was claimed for
+    last_started_at = Column(DateTime(timezone=True), nullable=True)
+    last_finished_at = Column(DateTime(timezone=True), nullable=True)
+    last_status = Column(String(20), nullable=True)  # success, error
+    last_duration_ms = Column(Numeric(12, 1), nullable=True)
+
+
+class DailySales(Base):
+    """
+    Paid sales pre-aggregated per order date, product and category, kept in
+    step with orders by services/sales_rollup_service.py. Rows with
+    product_id 0 hold whole-order totals (order revenue including shipping,
+    order count) for each date.
+    """
+    __tablename__ = "daily_sales"
+
+    sales_date = Column(Date, primary_key=True)
+    product_id = Column(Integer, primary_key=True)  # no FK: history outlives deleted products
+    category = Column(String(CATEGORY_NAME_MAX_LENGTH), primary_key=True)  # "" when uncategorized
+    revenue = Column(Numeric(14, 2), nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    order_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class CustomerMetrics(Base):
+    """
+    Per-customer totals over paid orders, kept in step with orders by
+    services/customer_metrics_service.py. Customers without a paid order
+    have no row.
+    """
+    __tablename__ = "customer_metrics"
+
+    customer_id = Column(Integer, ForeignKey("customers.id", ondelete="CASCADE"), primary_key=True)
+    first_order_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    last_order_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    total_spent = Column(Numeric(14, 2), nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
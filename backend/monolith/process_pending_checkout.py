@@ -11,14 +11,6 @@ from database import SessionLocal
 import models
 import json
 from decimal import Decimal
-from datetime import datetime
-import uuid
-
-def generate_order_number() -> str:
-    """Generate a unique order number"""
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    unique_id = str(uuid.uuid4())[:8].upper()
-    return f"ORD-{timestamp}-{unique_id}"
 
 def process_pending_checkout(payment_reference: str, db: Session):
     """Process a pending checkout and create an order"""
@@ -1,8 +1,12 @@
 from fastapi import APIRouter
-from . import dashboard, products, orders, categories, uploads
+from . import dashboard, analytics, products, orders, categories, uploads, metrics, jobs, events
 
 router = APIRouter()
 router.include_router(dashboard.router)
+router.include_router(analytics.router)
 router.include_router(products.router)
 router.include_router(orders.router)
-router.include_router(categories.router)
\ No newline at end of file
+router.include_router(categories.router)
+router.include_router(metrics.router)
+router.include_router(jobs.router)
+router.include_router(events.router)
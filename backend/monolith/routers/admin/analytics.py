@@ -0,0 +1,331 @@
+# file: routers/admin/analytics.py
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import models
+from database import DB_REPORT_STATEMENT_TIMEOUT_MS, read_session
+from services import analytics_service, customer_metrics_service, low_stock_service, visitor_analytics_service
+from services.analytics_cache_service import cached_report, reports_need_primary
+from utils import constants
+from utils.auth import get_current_admin_user
+from utils.db_routing import wants_primary
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["Admin Analytics"])
+
+# Shared by every /overview request, so concurrent dashboards queue here
+# instead of draining the report connection pool
+overview_executor = ThreadPoolExecutor(
+    max_workers=constants.ANALYTICS_OVERVIEW_WORKERS, thread_name_prefix="analytics-overview"
+)
+
+def get_cached_report_db(request: Request):
+    """Report session: the primary while reports are cached, else read routing"""
+    prefer_primary = wants_primary(request.cookies) or reports_need_primary()
+    with read_session(prefer_primary, DB_REPORT_STATEMENT_TIMEOUT_MS) as db:
+        yield db
+
+# Report builders. Called with keyword arguments only: the cache key is
+# built from them (see cached_report).
+
+@cached_report("stats")
+def stats_report(db: Session, range: str):
+    # Calculate date range
+    days = int(range[:-1])
+    start_date = datetime.now() - timedelta(days=days)
+    previous_start = start_date - timedelta(days=days)
+
+    # Both periods in one aggregate query instead of loading every order
+    orders = analytics_service.order_period_totals(db, start_date, previous_start)
+    current_revenue = float(orders["current_revenue"])
+    previous_revenue = float(orders["previous_revenue"])
+    revenue_change = ((current_revenue - previous_revenue) / previous_revenue * 100) if previous_revenue > 0 else 0
+
+    current_order_count = orders["current_orders"]
+    previous_order_count = orders["previous_orders"]
+    orders_change = ((current_order_count - previous_order_count) / previous_order_count * 100) if previous_order_count > 0 else 0
+
+    # Customer stats
+    customers = analytics_service.customer_period_totals(db, start_date, previous_start)
+    current_customers = customers["current_customers"]
+    previous_customers = customers["previous_customers"]
+    customers_change = ((current_customers - previous_customers) / previous_customers * 100) if previous_customers > 0 else 0
+
+    # Conversion rate: orders per unique storefront visitor (UTC days
+    # covering each period). Without visitor data (no Redis, or a storefront
+    # that does not report views) fall back to orders per customer
+    today = datetime.now(timezone.utc).date()
+    visitors = visitor_analytics_service.unique_visitors(today - timedelta(days=days), today)
+    previous_visitors = visitor_analytics_service.unique_visitors(
+        today - timedelta(days=2 * days), today - timedelta(days=days + 1)
+    )
+    conversion_change = 0
+    if visitors:
+        conversion_rate = current_order_count / visitors * 100
+        if previous_visitors and previous_order_count:
+            previous_rate = previous_order_count / previous_visitors * 100
+            conversion_change = (conversion_rate - previous_rate) / previous_rate * 100
+    else:
+        total_customers = customers["total_customers"]
+        conversion_rate = (current_order_count / total_customers * 100) if total_customers > 0 else 0
+
+    return {
+        "totalRevenue": round(current_revenue, 2),
+        "revenueChange": round(revenue_change, 1),
+        "totalOrders": current_order_count,
+        "ordersChange": round(orders_change, 1),
+        "totalCustomers": current_customers,
+        "customersChange": round(customers_change, 1),
+        "conversionRate": round(conversion_rate, 1),
+        "conversionChange": round(conversion_change, 1),
+        "uniqueVisitors": visitors
+    }
+
+@cached_report("sales")
+def sales_report(db: Session, range: str):
+    days = int(range[:-1])
+    start_date = datetime.now() - timedelta(days=days)
+
+    sales_by_date = analytics_service.sales_by_date(db, start_date)
+
+    return [
+        {
+            "date": sale["sales_date"].strftime("%b %d"),
+            "revenue": float(sale["revenue"]),
+            "orders": sale["order_count"]
+        }
+        for sale in sales_by_date
+    ]
+
+@cached_report("top-products", params=("range", "limit"))
+def top_products_report(db: Session, range: str, limit: int):
+    days = int(range[:-1])
+    start_date = datetime.now() - timedelta(days=days)
+
+    top_products = analytics_service.top_products(db, start_date, limit)
+
+    return [
+        {
+            "id": product["id"],
+            "name": product["name"],
+            "category": product["category"] or "Uncategorized",
+            "revenue": float(product["revenue"] or 0),
+            "unitsSold": product["units_sold"] or 0,
+            "stock": product["stock"] or 0
+        }
+        for product in top_products
+    ]
+
+@cached_report("inventory-alerts", params=())
+def inventory_alerts_report(db: Session):
+    return low_stock_service.inventory_alerts(db)
+
+@cached_report("customer-analytics")
+def customer_analytics_report(db: Session, range: str):
+    days = int(range[:-1])
+    start_date = datetime.now() - timedelta(days=days)
+
+    # New vs returning customers
+    total_customers = db.query(func.count(models.Customer.id)).filter(
+        models.Customer.created_at >= start_date
+    ).scalar()
+
+    # Average order value
+    avg_order_value = analytics_service.average_order_value(db, start_date)
+
+    # Repeat rate and lifetime value from the customer_metrics table
+    customers = customer_metrics_service.customer_summary(db, start_date)
+
+    return {
+        "newCustomers": total_customers,
+        "averageOrderValue": float(avg_order_value or 0),
+        "customerLifetimeValue": round(float(customers["lifetime_value"]), 2),
+        "repeatCustomerRate": round(customers["repeat_rate"], 1)
+    }
+
+@cached_report("customer-cohorts", params=("months",))
+def customer_cohorts_report(db: Session, months: int):
+    return customer_metrics_service.cohort_retention(db, months)
+
+@cached_report("product-conversion", params=("range", "limit"))
+def product_conversion_report(db: Session, range: str, limit: int):
+    days = int(range[:-1])
+    today = datetime.now(timezone.utc).date()
+    products = db.query(models.Product.id, models.Product.name).filter(models.Product.is_active).all()
+    views = visitor_analytics_service.product_views([p.id for p in products], today - timedelta(days=days), today)
+    if views is None:
+        return []
+    orders = analytics_service.product_orders(db, datetime.now() - timedelta(days=days))
+
+    rows = []
+    for product in products:
+        product_views = views.get(product.id, 0)
+        sold = orders.get(product.id, {"orders": 0, "units": 0})
+        if not product_views and not sold["orders"]:
+            continue
+        rows.append({
+            "productId": product.id,
+            "productName": product.name,
+            "views": product_views,  # count-min estimate: may overcount, never undercounts
+            "orders": sold["orders"],
+            "unitsSold": sold["units"],
+            "viewToPurchaseRate": round(sold["orders"] / product_views * 100, 1) if product_views else None
+        })
+    rows.sort(key=lambda row: (row["views"], row["orders"]), reverse=True)
+    return rows[:limit]
+
+@cached_report("customer-segments", params=())
+def customer_segments_report(db: Session):
+    return [
+        {
+            "segment": segment["segment"],
+            "customers": segment["customers"],
+            "revenue": float(segment["revenue"] or 0),
+            "averageOrders": round(float(segment["average_orders"] or 0), 1)
+        }
+        for segment in customer_metrics_service.rfm_segments(db)
+    ]
+
+@cached_report("revenue-by-category")
+def revenue_by_category_report(db: Session, range: str):
+    days = int(range[:-1])
+    start_date = datetime.now() - timedelta(days=days)
+
+    category_revenue = analytics_service.revenue_by_category(db, start_date)
+
+    return [
+        {
+            "category": cat["category"] or "Uncategorized",
+            "revenue": float(cat["revenue"] or 0),
+            "orders": cat["orders"]
+        }
+        for cat in category_revenue
+    ]
+
+@router.get("/stats")
+def get_dashboard_stats(
+    range: str = Query("30d", regex="^(7d|30d|90d)$"),
+    db: Session = Depends(get_cached_report_db),
+    current_user: models.AdminUser = Depends(get_current_admin_user)
+):
+    """Get dashboard statistics for the specified time range"""
+    return stats_report(db=db, range=range)
+
+@router.get("/sales")
+def get_sales_data(
+    range: str = Query("30d", regex="^(7d|30d|90d)$"),
+    db: Session = Depends(get_cached_report_db),
+    current_user: models.AdminUser = Depends(get_current_admin_user)
+):
+    """Get sales data for charts"""
+    return sales_report(db=db, range=range)
+
+@router.get("/top-products")
+def get_top_products(
+    range: str = Query("30d", regex="^(7d|30d|90d)$"),
+    limit: int = Query(5, ge=1, le=20),
+    db: Session = Depends(get_cached_report_db),
+    current_user: models.AdminUser = Depends(get_current_admin_user)
+):
+    """Get top selling products"""
+    return top_products_report(db=db, range=range, limit=limit)
+
+@router.get("/inventory-alerts")
+def get_inventory_alerts(
+    db: Session = Depends(get_cached_report_db),
+    current_user: models.AdminUser = Depends(get_current_admin_user)
+):
+    """Get low stock inventory alerts"""
+    return inventory_alerts_report(db=db)
+
+@router.get("/customer-analytics")
+def get_customer_analytics(
+    range: str = Query("30d", regex="^(7d|30d|90d)$"),
+    db: Session = Depends(get_cached_report_db),
+    current_user: models.AdminUser = Depends(get_current_admin_user)
+):
+    """Get customer analytics data"""
+    return customer_analytics_report(db=db, range=range)
+
+@router.get("/revenue-by-category")
+def get_revenue_by_category(
+    range: str = Query("30d", regex="^(7d|30d|90d)$"),
+    db: Session = Depends(get_cached_report_db),
+    current_user: models.AdminUser = Depends(get_current_admin_user)
+):
+    """Get revenue breakdown by product category"""
+    return revenue_by_category_report(db=db, range=range)
+
+@router.get("/customer-cohorts")
+def get_customer_cohorts(
+    months: int = Query(constants.CUSTOMER_COHORT_MONTHS, ge=1, le=constants.CUSTOMER_COHORT_MAX_MONTHS),
+    db: Session = Depends(get_cached_report_db),
+    current_user: models.AdminUser = Depends(get_current_admin_user)
+):
+    """Monthly cohort retention: share of each first-order cohort ordering again N months later"""
+    return customer_cohorts_report(db=db, months=months)
+
+@router.get("/customer-segments")
+def get_customer_segments(
+    db: Session = Depends(get_cached_report_db),
+    current_user: models.AdminUser = Depends(get_current_admin_user)
+):
+    """Paying customers grouped into RFM (recency, frequency, monetary) segments"""
+    return customer_segments_report(db=db)
+
+@router.get("/product-conversion")
+def get_product_conversion(
+    range: str = Query("30d", regex="^(7d|30d|90d)$"),
+    limit: int = Query(constants.PRODUCT_CONVERSION_LIMIT, ge=1, le=100),
+    db: Session = Depends(get_cached_report_db),
+    current_user: models.AdminUser = Depends(get_current_admin_user)
+):
+    """Most viewed products with their paid orders and view-to-purchase rate"""
+    return product_conversion_report(db=db, range=range, limit=limit)
+
+def _run_report(builder, prefer_primary: bool, **params):
+    # Sessions are not thread-safe: each section gets its own
+    with read_session(prefer_primary, DB_REPORT_STATEMENT_TIMEOUT_MS) as db:
+        return builder(db=db, **params)
+
+@router.get("/overview")
+def get_overview(
+    request: Request,
+    range: str = Query("30d", regex="^(7d|30d|90d)$"),
+    limit: int = Query(5, ge=1, le=20),
+    current_user: models.AdminUser = Depends(get_current_admin_user)
+):
+    """
+    Everything the dashboard shows, in one call: the sections run
+    concurrently, so the response takes about as long as the slowest one.
+    A failing section is returned as null and listed in "errors".
+    """
+    sections = {
+        "stats": (stats_report, {"range": range}),
+        "sales": (sales_report, {"range": range}),
+        "topProducts": (top_products_report, {"range": range, "limit": limit}),
+        "inventoryAlerts": (inventory_alerts_report, {}),
+        "customerAnalytics": (customer_analytics_report, {"range": range}),
+        "revenueByCategory": (revenue_by_category_report, {"range": range}),
+    }
+    prefer_primary = wants_primary(request.cookies) or reports_need_primary()
+    futures = {
+        name: overview_executor.submit(_run_report, builder, prefer_primary, **params)
+        for name, (builder, params) in sections.items()
+    }
+
+    overview = {"range": range, "errors": []}
+    for name, future in futures.items():
+        try:
+            overview[name] = future.result()
+        except Exception as e:
+            logger.exception(f"Overview section {name} failed: {e}")
+            overview[name] = None
+            overview["errors"].append(name)
+    return overview
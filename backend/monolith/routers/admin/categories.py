@@ -7,6 +7,7 @@ import re
 import models
 import schemas
 from database import get_db
+from services.analytics_cache_service import mark_orders_changed
 from utils import auth
 
 router = APIRouter(prefix="/categories", tags=["Admin Categories"])
@@ -92,6 +93,7 @@ def create_category(
             description=category_data.description,
             image_url=category_data.image_url,
             parent_id=category_data.parent_id,
+            low_stock_threshold=category_data.low_stock_threshold,
             is_active=True
         )
         db.add(new_category)
@@ -171,6 +173,9 @@ def update_category(
             category.parent_id = category_data.parent_id if category_data.parent_id > 0 else None
         if category_data.is_active is not None:
             category.is_active = category_data.is_active
+        if "low_stock_threshold" in category_data.model_fields_set:
+            category.low_stock_threshold = category_data.low_stock_threshold
+            mark_orders_changed(db)  # inventory alerts are cached under the orders version
         
         db.commit()
         db.refresh(category)
@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func as sql_func
 from typing import List, Optional
 from decimal import Decimal
 
 import models
 import schemas
-from database import get_db
+from database import get_report_read_db
+from services import analytics_service
 from utils import auth
 
 router = APIRouter(prefix="/dashboard", tags=["Admin Dashboard"])
@@ -14,7 +14,7 @@ router = APIRouter(prefix="/dashboard", tags=["Admin Dashboard"])
 @router.get("/stats")
 def get_dashboard_stats(
     current_admin: dict = Depends(auth.get_current_admin_from_cookie),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_report_read_db)
 ):
     """Get dashboard statistics for admin panel"""
 
@@ -26,23 +26,13 @@ def get_dashboard_stats(
     # Get total orders count
     total_orders = db.query(models.Order).count()
 
-    # Get total customers count (unique emails from orders)
+    # Get total customers count (every order has a customer row)
     total_customers = db.query(models.Customer).filter(
         models.Customer.is_active == True
     ).count()
 
-    # If no customers in customer table, count unique customer emails from orders
-    if total_customers == 0:
-        total_customers = db.query(models.Order.customer_email).distinct().count()
-
-    # Calculate total revenue from completed orders
-    revenue_result = db.query(
-        sql_func.sum(models.Order.total_amount)
-    ).filter(
-        models.Order.payment_status == "paid"
-    ).scalar()
-
-    total_revenue = float(revenue_result) if revenue_result else 0.0
+    # Total revenue from paid orders (daily_sales rollup)
+    total_revenue = float(analytics_service.total_revenue(db))
 
     # Get recent orders (last 5)
     recent_orders = db.query(models.Order).order_by(
@@ -0,0 +1,63 @@
+import asyncio
+import itertools
+from typing import Optional
+
+from fastapi import APIRouter, Cookie, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from database import SessionLocal
+from services.admin_events_service import RESYNC, broker, format_sse, new_event
+from utils import auth, constants
+
+router = APIRouter(tags=["Admin Events"])
+
+
+def _authenticate(token: Optional[str]) -> dict:
+    # Not a Depends(get_db): that session would stay open, holding a pooled
+    # connection, for as long as the stream runs
+    db = SessionLocal()
+    try:
+        return auth.get_current_admin_from_cookie(token=token, db=db)
+    finally:
+        db.close()
+
+
+async def _stream(request: Request, resumed: bool):
+    event_ids = itertools.count(1)
+    with broker.subscribe() as queue:
+        yield f"retry: {constants.ADMIN_EVENTS_RECONNECT_SECONDS * 1000}\n\n"
+        if resumed:
+            # Nothing is replayed; a reconnecting client refetches instead
+            yield format_sse(new_event(RESYNC), next(event_ids))
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=constants.ADMIN_EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(event, next(event_ids))
+
+
+@router.get("/events")
+async def admin_events(
+    request: Request,
+    token: Optional[str] = Cookie(None, alias="admin_token"),
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Server-Sent Events stream of order.created, order.payment_status and
+    stock.low events (use EventSource with withCredentials). A "resync"
+    event means events may have been missed and listings should be refetched.
+    """
+    await run_in_threadpool(_authenticate, token)
+    if not broker.listening:
+        raise HTTPException(status_code=503, detail="Live events are not available")
+
+    return StreamingResponse(
+        _stream(request, resumed=last_event_id is not None),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from utils import auth
+
+router = APIRouter(prefix="/jobs", tags=["Admin Jobs"])
+
+
+def get_scheduler(request: Request):
+    scheduler = getattr(request.app.state, "scheduler", None)
+    if scheduler is None:
+        raise HTTPException(status_code=503, detail="Scheduler is not running")
+    return scheduler
+
+
+@router.get("/")
+async def list_jobs(
+    scheduler=Depends(get_scheduler),
+    current_admin: dict = Depends(auth.get_current_admin_from_cookie)
+):
+    """Scheduled maintenance jobs with their next run and timing metrics (this machine)"""
+    return {
+        "leader_election": scheduler.leader_election,
+        "jobs": scheduler.list_jobs()
+    }
+
+
+@router.post("/{job_name}/run", status_code=202)
+async def run_job(
+    job_name: str,
+    scheduler=Depends(get_scheduler),
+    current_admin: dict = Depends(auth.get_current_admin_from_cookie)
+):
+    """Start a job now, outside its schedule"""
+    if job_name not in scheduler.jobs:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_name}")
+    if not scheduler.trigger(job_name):
+        raise HTTPException(status_code=409, detail=f"Job {job_name} is already running")
+    return {"message": f"Job {job_name} started", "job": scheduler.jobs[job_name].snapshot()}
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from database import engine, get_db, replica_router
+from services import outbox_service
+from utils import auth
+from utils.db_runtime import get_pool_metrics
+from utils.payment import async_paystack_client, paystack_client
+from utils.webhook_dedupe import webhook_deduplicator
+
+router = APIRouter(prefix="/metrics", tags=["Admin Metrics"])
+
+@router.get("/")
+def get_runtime_metrics(
+    db: Session = Depends(get_db),
+    current_admin: dict = Depends(auth.get_current_admin_from_cookie)
+):
+    """Runtime metrics for outbound gateways and background queues"""
+
+    return {
+        "paystack": {
+            "sync": paystack_client.get_metrics(),
+            "async": async_paystack_client.get_metrics()
+        },
+        "database": get_pool_metrics(engine),
+        "read_replicas": replica_router.get_metrics(),
+        "outbox": outbox_service.get_queue_depth(db),
+        "webhook_dedupe": webhook_deduplicator.get_stats()
+    }
@@ -1,50 +1,94 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import date, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_
-from typing import List, Optional
+from typing import List, Literal, Optional
 from decimal import Decimal
 
 import models
 import schemas
-from database import get_db
-from utils import auth
+from database import DB_REPORT_STATEMENT_TIMEOUT_MS, get_db, read_session
+from services import analytics_cache_service, order_export_service, order_listing_service, sales_rollup_service
+from utils import auth, constants
+from utils.db_routing import wants_primary
+from utils.export_stream import stream_csv, stream_xlsx
 
 router = APIRouter(prefix="/orders", tags=["Admin Orders"])
 
 @router.get("/")
 def admin_get_orders(
+    response: Response,
     current_admin: dict = Depends(auth.get_current_admin_from_cookie),
     status: Optional[str] = Query(None),
     payment_status: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1),
+    limit: int = Query(100, ge=1, le=constants.ADMIN_ORDERS_MAX_LIMIT),
     db: Session = Depends(get_db)
 ):
-    """Get all orders with filtering"""
+    """
+    Get all orders with filtering, newest first. X-Total-Count carries the
+    number of matching orders and X-Next-Cursor the cursor of the next page.
+    """
 
+    conditions = order_listing_service.order_filters(status, payment_status, search)
     query = db.query(models.Order).options(
         joinedload(models.Order.items).joinedload(models.OrderItem.variant)
-    )
-
-    if status and status != 'all':
-        query = query.filter(models.Order.status == status)
+    ).filter(*conditions)
+
+    try:
+        orders, next_cursor = order_listing_service.page(db, query, limit, cursor=cursor, skip=skip)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    response.headers["X-Total-Count"] = str(order_listing_service.total_count(
+        db, conditions, status=status, payment_status=payment_status, search=search
+    ))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [schemas.OrderResponse.from_orm(order) for order in orders]
 
-    if payment_status and payment_status != 'all':
-        query = query.filter(models.Order.payment_status == payment_status)
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
 
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                models.Order.order_number.ilike(search_term),
-                models.Order.customer_name.ilike(search_term),
-                models.Order.customer_email.ilike(search_term)
+@router.get("/export")
+def export_orders(
+    request: Request,
+    current_admin: dict = Depends(auth.get_current_admin_from_cookie),
+    format: Literal["csv", "xlsx"] = Query("csv"),
+    start: Optional[date] = Query(None, description="First order date (default: 31 days before end)"),
+    end: Optional[date] = Query(None, description="Last order date, inclusive (default: today)"),
+    status: Optional[str] = Query(None),
+    payment_status: Optional[str] = Query(None)
+):
+    """Download order lines as CSV or XLSX, streamed with constant memory"""
+
+    end = end or date.today()
+    start = start or end - timedelta(days=constants.ORDER_EXPORT_DEFAULT_DAYS)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    query = order_export_service.export_query(start, end, status, payment_status)
+    prefer_primary = wants_primary(request.cookies)
+    writer = stream_csv if format == "csv" else stream_xlsx
+
+    def content():
+        # The session lives as long as the response body, not the request handler
+        with read_session(prefer_primary, DB_REPORT_STATEMENT_TIMEOUT_MS) as db:
+            yield from writer(
+                order_export_service.EXPORT_HEADER, order_export_service.iter_rows(db, query),
+                batch=constants.ORDER_EXPORT_BATCH_SIZE
             )
-        )
 
-    orders = query.order_by(models.Order.created_at.desc()).offset(skip).limit(limit).all()
-    return [schemas.OrderResponse.from_orm(order) for order in orders]
+    filename = f"orders_{start.isoformat()}_{end.isoformat()}.{format}"
+    return StreamingResponse(
+        content(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 @router.get("/{order_id}", response_model=schemas.OrderResponse)
 def admin_get_order(
@@ -79,9 +123,12 @@ def update_order_status(
     # Update status fields
     if "status" in updates:
         order.status = updates["status"]
+        analytics_cache_service.mark_orders_changed(db)
 
     if "payment_status" in updates:
+        previous_status = order.payment_status
         order.payment_status = updates["payment_status"]
+        sales_rollup_service.payment_status_changed(db, order.id, previous_status, order.payment_status)
 
     if "notes" in updates:
         order.notes = updates["notes"]
@@ -9,6 +9,8 @@ import models
 import schemas
 from database import get_db
 from utils import auth
+from services import sales_rollup_service
+from services.analytics_cache_service import bump_orders_version
 from utils.cache import invalidate_cache
 
 router = APIRouter(prefix="/products", tags=["Admin Products"])
@@ -84,6 +86,7 @@ def create_product(
             color=variant_data.color,
             price=variant_data.price,
             stock_quantity=variant_data.stock_quantity,
+            low_stock_threshold=variant_data.low_stock_threshold,
             sku=sku
         )
         db.add(variant)
@@ -104,6 +107,7 @@ def create_product(
 
     # Invalidate cache
     background_tasks.add_task(invalidate_cache)
+    background_tasks.add_task(bump_orders_version)
 
     return schemas.ProductResponse.from_orm(new_product)
 
@@ -131,6 +135,8 @@ def update_product(
     if product_data.description is not None:
         product.description = product_data.description
     if product_data.category is not None:
+        if product_data.category != product.category:
+            sales_rollup_service.product_recategorised(db, product.id, product_data.category)
         product.category = product_data.category
     if product_data.is_active is not None:
         product.is_active = product_data.is_active
@@ -151,6 +157,7 @@ def update_product(
                 color=variant_data.color,
                 price=variant_data.price,
                 stock_quantity=variant_data.stock_quantity,
+                low_stock_threshold=variant_data.low_stock_threshold,
                 sku=sku
             )
             db.add(variant)
@@ -178,6 +185,7 @@ def update_product(
 
     # Invalidate cache
     background_tasks.add_task(invalidate_cache, product_id)
+    background_tasks.add_task(bump_orders_version)
 
     return schemas.ProductResponse.from_orm(product)
 
@@ -199,5 +207,6 @@ def delete_product(
 
     # Invalidate cache
     background_tasks.add_task(invalidate_cache, product_id)
+    background_tasks.add_task(bump_orders_version)
 
     return {"message": "Product deleted successfully"}
\ No newline at end of file
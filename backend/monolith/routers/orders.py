@@ -1,7 +1,6 @@
 # file: routers/orders.py
-import uuid
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session, joinedload
 from decimal import Decimal
 from typing import List, Optional
@@ -11,23 +10,19 @@ from sqlalchemy.orm import selectinload
 
 import models
 import schemas
-from database import get_db
+from database import get_db, get_checkout_db
 from config import settings
+from services import order_listing_service, sales_rollup_service
 from utils.payment import process_payment
-from utils import auth
-from utils.notifications import send_order_confirmation
+from utils import auth, constants
+from utils.hot_queries import active_variants_by_id
+from utils.ids import new_payment_reference, new_refund_reference
 from utils.rate_limiting import checkout_rate_limit, limiter
 from utils.error_handling import SecureErrorHandler
 from utils.exceptions import ProductNotFoundException, InsufficientStockException, PaymentFailedException
 
 router = APIRouter()
 
-def generate_order_number() -> str:
-    """Generate a unique order number"""
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    unique_id = str(uuid.uuid4())[:8].upper()
-    return f"ORD-{timestamp}-{unique_id}"
-
 import logging
 
 logger = logging.getLogger(__name__)
@@ -35,14 +30,12 @@ logger = logging.getLogger(__name__)
 @router.post("/validate-cart")
 def validate_cart(
     validation_data: schemas.CartValidationRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_checkout_db)
 ):
     """Validate cart items stock availability"""
+    variants = active_variants_by_id(db, (item.variant_id for item in validation_data.cart))
     for item in validation_data.cart:
-        variant = db.query(models.ProductVariant).filter(
-            models.ProductVariant.id == item.variant_id,
-            models.ProductVariant.is_active == True
-        ).first()
+        variant = variants.get(item.variant_id)
         
         if not variant:
             raise ProductNotFoundException(product_id=item.variant_id)
@@ -62,7 +55,7 @@ def validate_cart(
 def process_checkout(
     request: Request,
     checkout_data: schemas.CheckoutRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_checkout_db)
 ):
     logger.info(f"Initializing checkout: {checkout_data.dict()}")
     """
@@ -109,20 +102,16 @@ def process_checkout(
 
         logger.info("Step 2: Generating payment reference")
         # Generate payment reference - standardized format
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        unique_id = str(uuid.uuid4())[:8].upper()
-        payment_reference = f"MADRUSH-{timestamp}-{unique_id}"
+        payment_reference = new_payment_reference()
         
         total_amount = Decimal('0.0')
         cart_items = []
 
         logger.info("Step 3: Validating stock and calculating total")
         # 1. Validate stock and calculate total
+        variants = active_variants_by_id(db, (item.variant_id for item in checkout_data.cart))
         for item in checkout_data.cart:
-            variant = db.query(models.ProductVariant).filter(
-                models.ProductVariant.id == item.variant_id,
-                models.ProductVariant.is_active == True
-            ).first()
+            variant = variants.get(item.variant_id)
             
             if not variant:
                 logger.error(f"Variant not found: {item.variant_id}")
@@ -240,28 +229,34 @@ def get_order(order_id: int, db: Session = Depends(get_db), current_admin: dict
 
 @router.get("/")
 def list_orders(
+    response: Response,
     customer_email: Optional[str] = None,
     status: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=constants.ADMIN_ORDERS_MAX_LIMIT),
     db: Session = Depends(get_db),
     current_admin: dict = Depends(auth.get_current_admin_from_cookie)
 ):
-    """List orders with optional filtering"""
+    """List orders with optional filtering; paginate with the X-Next-Cursor header"""
     
+    conditions = order_listing_service.order_filters(status=status, customer_email=customer_email)
     query = db.query(models.Order).options(
         selectinload(models.Order.items)
         .selectinload(models.OrderItem.variant)
         .selectinload(models.ProductVariant.product)
-    )
+    ).filter(*conditions)
     
-    if customer_email:
-        query = query.filter(models.Order.customer_email == customer_email)
-    
-    if status:
-        query = query.filter(models.Order.status == status)
-    
-    orders = query.order_by(models.Order.created_at.desc()).offset(skip).limit(limit).all()
+    try:
+        orders, next_cursor = order_listing_service.page(db, query, limit, cursor=cursor, skip=skip)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    response.headers["X-Total-Count"] = str(order_listing_service.total_count(
+        db, conditions, status=status, customer_email=customer_email
+    ))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return [schemas.OrderResponse.from_orm(order) for order in orders]
 
 @router.get("/by-number/{order_number}", response_model=schemas.OrderResponse)
@@ -303,11 +298,12 @@ def process_refund(
         raise PaymentFailedException(reason="Refund amount cannot exceed order total")
     
     # Process refund (mock implementation)
-    refund_reference = f"refund_{str(uuid.uuid4()).replace('-', '')}"
+    refund_reference = new_refund_reference()
     
     # Update order status
     order.payment_status = "refunded"
     order.status = "cancelled"
+    sales_rollup_service.payment_status_changed(db, order.id, "paid", order.payment_status)
     
     # Restore stock quantities atomically
     stock_updates = {item.variant_id: item.quantity for item in order.items}
@@ -342,7 +338,7 @@ def lookup_orders(
     request: Request,
     email: str,
     order_number: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_checkout_db)
 ):
     """
     Public endpoint for customers to look up their orders by email.
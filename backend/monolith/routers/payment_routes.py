@@ -9,12 +9,13 @@ from sqlalchemy.orm import Session
 from database import get_db
 from models import Order, Payment
 from models import Order, Payment
+from services import sales_rollup_service
 from utils.payment import paystack_client, process_payment, verify_payment as verify_payment_util
 from utils.rate_limiting import limiter
+from utils.ids import new_payment_reference
 from config import settings
 from datetime import datetime
 import logging
-import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -87,7 +88,7 @@ async def initialize_payment(
             )
         
         # Generate unique reference
-        reference = f"MADRUSH-{order.id}-{uuid.uuid4().hex[:8].upper()}"
+        reference = new_payment_reference()
         
         # IDEMPOTENCY CHECK: Prevent duplicate payment initialization
         existing_payment = db.query(Payment).filter(
@@ -142,8 +143,10 @@ async def initialize_payment(
             db.add(payment)
             
             # Update order
+            previous_status = order.payment_status
             order.payment_reference = reference
             order.payment_status = "pending"
+            sales_rollup_service.payment_status_changed(db, order.id, previous_status, order.payment_status)
             
             db.commit()
             
@@ -282,6 +285,7 @@ async def verify_payment(
         payment.payment_metadata = json.dumps(metadata) if metadata else "{}"
         
         # Update order status
+        previous_status = order.payment_status
         if transaction_data["status"] == "success":
             order.payment_status = "paid"
             order.status = "processing"
@@ -289,6 +293,7 @@ async def verify_payment(
         else:
             order.payment_status = "failed"
             logger.warning(f"Payment failed for order {order.id}: {reference}")
+        sales_rollup_service.payment_status_changed(db, order.id, previous_status, order.payment_status)
         
         db.commit()
         
@@ -1,32 +1,30 @@
 # file: routers/payment_webhook.py
 import json
 import logging
-import uuid
 from datetime import datetime
 from decimal import Decimal
-from fastapi import APIRouter, Depends, HTTPException, Request, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 import models
 from database import get_db
+from config import settings
 from utils.payment import paystack_client
-from utils.notifications import send_order_confirmation
 from utils.error_handling import SecureErrorHandler
+from utils.ids import new_ulid
+from utils.webhook_dedupe import webhook_deduplicator
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-def generate_order_number() -> str:
-    """Generate a unique order number"""
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    unique_id = str(uuid.uuid4())[:8].upper()
-    return f"ORD-{timestamp}-{unique_id}"
-
 @router.post("/webhook")
-async def paystack_webhook(request: Request, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+async def paystack_webhook(request: Request, db: Session = Depends(get_db)):
     """
     Handle Paystack webhook events for payment confirmation.
     """
+    event_id = None
+    stored = False  # this delivery committed the event's rows
     try:
         # Get raw body for signature verification
         body = await request.body()
@@ -46,44 +44,59 @@ async def paystack_webhook(request: Request, background_tasks: BackgroundTasks,
         event_type = event_data.get("event")
         data = event_data.get("data", {})
         event_id = event_data.get("id")  # Paystack event ID
+        event_id = str(event_id) if event_id is not None else None
         
         logger.info(f"Received webhook event: {event_type}, ID: {event_id}")
         
-        # CRITICAL: Check for replay attacks - verify event hasn't been processed
-        if event_id:
-            existing_event = db.query(models.WebhookEvent).filter(
-                models.WebhookEvent.event_id == event_id
-            ).first()
-            
-            if existing_event:
+        # CRITICAL: Check for replay attacks before any DB work
+        # (Redis/Bloom seen-set; the unique key row is the final guard)
+        deduplicate = event_id is not None
+        if deduplicate:
+            is_new = webhook_deduplicator.is_new(event_id)
+            if is_new is None:
+                is_new = db.query(models.WebhookEventKey.event_id).filter(
+                    models.WebhookEventKey.event_id == event_id
+                ).first() is None
+            if not is_new:
                 logger.warning(f"SECURITY: Duplicate webhook event detected: {event_id}")
-                # Log the duplicate attempt with UUID to prevent collisions
-                duplicate_event = models.WebhookEvent(
-                    event_id=f"{event_id}_duplicate_{uuid.uuid4()}",
-                    event_type=event_type,
-                    payment_reference=data.get("reference"),
-                    status="duplicate",
-                    raw_data=body.decode('utf-8')
-                )
-                db.add(duplicate_event)
-                db.commit()
-                
                 return {"status": "duplicate", "message": "Event already processed"}
         
+        # Queue mode: charge.success is acknowledged immediately and turned
+        # into an order by the batch worker (services/webhook_service.py)
+        queue_event = event_type == "charge.success" and settings.WEBHOOK_INGEST_MODE == "queue"
+        
         # Store webhook event for audit trail and replay protection
+        # (the key row is the unique guard across partitions)
+        event_id = event_id or f"no_id_{new_ulid()}"
         webhook_event = models.WebhookEvent(
-            event_id=event_id or f"no_id_{datetime.now().timestamp()}",
+            event_id=event_id,
             event_type=event_type,
             payment_reference=data.get("reference"),
-            status="processing",
-            raw_data=body.decode('utf-8')
+            status="queued" if queue_event else "processing",
+            raw_data=event_data
         )
+        db.add(models.WebhookEventKey(event_id=event_id))
         db.add(webhook_event)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # Raced with another delivery of the same event
+            db.rollback()
+            logger.warning(f"SECURITY: Duplicate webhook event detected: {event_id}")
+            return {"status": "duplicate", "message": "Event already processed"}
+        stored = True
+        # Only now, with the key row committed, may retries be turned away early
+        if deduplicate:
+            webhook_deduplicator.mark_seen(event_id)
+        
+        if queue_event:
+            from services import webhook_service
+            webhook_service.notify_new_events()
+            return {"status": "queued"}
         
         # Process event based on type
         if event_type == "charge.success":
-            result = handle_successful_payment(data, db, background_tasks)
+            result = handle_successful_payment(data, db)
             
             # Update webhook event status
             webhook_event.status = "processed" if result.get("status") == "success" else "failed"
@@ -106,6 +119,19 @@ async def paystack_webhook(request: Request, background_tasks: BackgroundTasks,
         raise
     except Exception as e:
         logger.exception("Error processing webhook")
+        # Forget the event so Paystack's retry is processed rather than
+        # rejected as a duplicate. Only rows this delivery inserted are
+        # removed: a failure before its commit (say, a retry of an event
+        # another delivery already stored) must leave that delivery's key.
+        if stored:
+            webhook_deduplicator.release(event_id)
+            try:
+                db.rollback()
+                db.query(models.WebhookEvent).filter(models.WebhookEvent.event_id == event_id).delete()
+                db.query(models.WebhookEventKey).filter(models.WebhookEventKey.event_id == event_id).delete()
+                db.commit()
+            except Exception:
+                logger.exception(f"Failed to clear webhook event {event_id} for retry")
         # IMPORTANT: Return 5xx to allow Paystack to retry on transient errors
         # Paystack will retry webhooks that return 5xx status codes
         raise HTTPException(
@@ -113,7 +139,7 @@ async def paystack_webhook(request: Request, background_tasks: BackgroundTasks,
             detail="Internal error processing webhook - will retry"
         )
 
-def handle_successful_payment(data: dict, db: Session, background_tasks: BackgroundTasks):
+def handle_successful_payment(data: dict, db: Session):
     """Handle successful payment and create order with security validations"""
     try:
         reference = data.get("reference")
@@ -171,8 +197,7 @@ def handle_successful_payment(data: dict, db: Session, background_tasks: Backgro
             db=db,
             pending_checkout=pending,
             payment_reference=reference,
-            paid_amount_kobo=paid_amount_kobo,
-            background_tasks=background_tasks
+            paid_amount_kobo=paid_amount_kobo
         )
     
     except Exception as e:
@@ -0,0 +1,41 @@
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Cookie, Request, Response, status
+
+import schemas
+from config import settings
+from services import visitor_analytics_service
+from utils import constants
+from utils.rate_limiting import limiter
+
+router = APIRouter()
+
+
+@router.post("/events", status_code=status.HTTP_204_NO_CONTENT)
+@limiter.limit(constants.RATE_LIMIT_VISITOR_EVENTS)
+async def record_visitor_events(
+    request: Request,
+    response: Response,
+    batch: schemas.VisitorEventBatch,
+    visitor_cookie: Optional[str] = Cookie(None, alias=constants.VISITOR_COOKIE)
+):
+    """
+    Storefront traffic (public, fire-and-forget): send a page_view for every
+    page shown and, on product pages, a product_view as well. Always 204;
+    analytics never fail a storefront request.
+    """
+    visitor_id = batch.visitor_id or visitor_cookie
+    if not visitor_id:
+        visitor_id = uuid.uuid4().hex
+        response.set_cookie(
+            key=constants.VISITOR_COOKIE,
+            value=visitor_id,
+            max_age=constants.VISITOR_COOKIE_MAX_AGE,
+            httponly=True,
+            secure=settings.COOKIE_SECURE,
+            samesite=settings.COOKIE_SAMESITE,
+            domain=settings.COOKIE_DOMAIN or None,
+            path="/"
+        )
+    await visitor_analytics_service.record(visitor_id, [event.model_dump() for event in batch.events])
@@ -1,11 +1,16 @@
 # file: schemas.py
 from pydantic import BaseModel, EmailStr, validator, Field, HttpUrl
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 from decimal import Decimal
 from utils.validation import SecureValidators
 from utils import constants
 
+def check_low_stock_threshold(v):
+    if v is not None and not 0 <= v <= constants.LOW_STOCK_MAX_THRESHOLD:
+        raise ValueError(f'Low-stock threshold must be between 0 and {constants.LOW_STOCK_MAX_THRESHOLD}')
+    return v
+
 # --- Product Schemas ---
 
 class ProductImageResponse(BaseModel):
@@ -27,6 +32,7 @@ class ProductVariantResponse(BaseModel):
     stock_quantity: int
     sku: Optional[str] = None
     is_active: bool
+    low_stock_threshold: Optional[int] = None
     created_at: datetime
 
     class Config:
@@ -58,6 +64,7 @@ class ProductVariantCreate(BaseModel):
     price: Decimal
     stock_quantity: int = 0
     sku: Optional[str] = None
+    low_stock_threshold: Optional[int] = None  # None: use the category's
 
     @validator('price')
     def price_must_be_positive(cls, v):
@@ -71,6 +78,8 @@ class ProductVariantCreate(BaseModel):
             raise ValueError('Stock quantity cannot be negative')
         return v
 
+    _low_stock_threshold = validator('low_stock_threshold', allow_reuse=True)(check_low_stock_threshold)
+
 class ProductImageCreate(BaseModel):
     image_url: HttpUrl
     alt_text: Optional[str] = None
@@ -211,6 +220,7 @@ class CategoryResponse(BaseModel):
     image_url: Optional[str] = None
     parent_id: Optional[int] = None
     is_active: bool
+    low_stock_threshold: Optional[int] = None
     created_at: datetime
 
     class Config:
@@ -222,6 +232,9 @@ class CategoryCreate(BaseModel):
     description: Optional[str] = None
     image_url: Optional[str] = None
     parent_id: Optional[int] = None
+    low_stock_threshold: Optional[int] = None  # None: the store default
+
+    _low_stock_threshold = validator('low_stock_threshold', allow_reuse=True)(check_low_stock_threshold)
 
 class CategoryUpdate(BaseModel):
     name: Optional[str] = None
@@ -230,6 +243,9 @@ class CategoryUpdate(BaseModel):
     image_url: Optional[str] = None
     parent_id: Optional[int] = None
     is_active: Optional[bool] = None
+    low_stock_threshold: Optional[int] = None  # send null to fall back to the store default
+
+    _low_stock_threshold = validator('low_stock_threshold', allow_reuse=True)(check_low_stock_threshold)
 
 # --- Customer Schemas ---
 
@@ -261,6 +277,23 @@ class CustomerUpdate(BaseModel):
     date_of_birth: Optional[datetime] = None
     is_active: Optional[bool] = None
 
+# --- Storefront Analytics Schemas ---
+
+class VisitorEvent(BaseModel):
+    type: Literal["page_view", "product_view"]
+    product_id: Optional[int] = Field(None, gt=0)
+
+    @validator('product_id', always=True)
+    def product_view_needs_product(cls, v, values):
+        if values.get('type') == 'product_view' and v is None:
+            raise ValueError('product_view events need a product_id')
+        return v
+
+class VisitorEventBatch(BaseModel):
+    # Anonymous id the storefront keeps in localStorage; the mr_vid cookie otherwise
+    visitor_id: Optional[str] = Field(None, min_length=8, max_length=64)
+    events: List[VisitorEvent] = Field(..., min_length=1, max_length=constants.VISITOR_EVENTS_MAX_BATCH)
+
 # Legacy schemas for backward compatibility
 Product = ProductResponse
 ProductVariant = ProductVariantResponse
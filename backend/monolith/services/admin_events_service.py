@@ -0,0 +1,137 @@
+"""
+Live admin events: new orders, payment status changes, low-stock crossings.
+
+Producers call `publish` inside the transaction that makes the change. It
+issues pg_notify, which PostgreSQL delivers only when that transaction
+commits (and drops on rollback), so admins never see an order that did
+not happen. Each API process holds one dedicated LISTEN connection to the
+primary (`broker.run`, started from the app lifespan) and fans every
+notification out to the in-memory queues of its connected admins; the
+SSE endpoint in routers/admin/events.py streams from those queues. Open
+dashboards cost one database connection per process and no polling
+queries.
+
+Notifications are not stored. Events published while the listener is
+reconnecting, or that overflow a slow client's queue, are lost, so both
+cases send a "resync" event telling the client to refetch its listings.
+On SQLite (tests, local dev) publishing is a no-op.
+"""
+import asyncio
+import json
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from database import DATABASE_URL
+from utils import constants
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = "order.created"
+PAYMENT_STATUS_CHANGED = "order.payment_status"
+LOW_STOCK = "stock.low"
+RESYNC = "resync"
+
+
+def new_event(event_type: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {"type": event_type, "data": data or {}, "at": datetime.now(timezone.utc).isoformat()}
+
+
+def publish(db: Session, event_type: str, data: Dict[str, Any]) -> None:
+    """Send an event to connected admins when the caller's transaction commits"""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    # NOTIFY payloads are limited to 8000 bytes; events carry ids, not records
+    payload = json.dumps(new_event(event_type, data), default=str)
+    db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": constants.ADMIN_EVENTS_CHANNEL, "payload": payload}
+    )
+
+
+def format_sse(event: Dict[str, Any], event_id: int) -> str:
+    return f"id: {event_id}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+class AdminEventBroker:
+    """One LISTEN connection per process, fanned out to every subscriber"""
+
+    def __init__(self):
+        self._subscribers: Set[asyncio.Queue] = set()
+        self.listening = False
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @contextmanager
+    def subscribe(self) -> Iterator[asyncio.Queue]:
+        queue = asyncio.Queue(maxsize=constants.ADMIN_EVENTS_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    def dispatch(self, event: Dict[str, Any]) -> None:
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # The client stopped reading: drop its backlog, have it refetch
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(new_event(RESYNC))
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed admin event: {payload[:200]}")
+            return
+        self.dispatch(event)
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """LISTEN until `stop` is set, reconnecting after connection failures"""
+        import asyncpg
+
+        # NOTIFY is not replicated, so always the primary
+        dsn = make_url(DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        connected_before = False
+        while not stop.is_set():
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn, server_settings={"application_name": "madrush-admin-events"})
+                await connection.add_listener(constants.ADMIN_EVENTS_CHANNEL, self._on_notify)
+                self.listening = True
+                logger.info("Listening for admin events")
+                if connected_before:
+                    self.dispatch(new_event(RESYNC))  # anything sent while we were away is gone
+                connected_before = True
+                while not stop.is_set():
+                    try:
+                        await asyncio.wait_for(stop.wait(), timeout=constants.ADMIN_EVENTS_HEARTBEAT_SECONDS)
+                    except asyncio.TimeoutError:
+                        await connection.execute("SELECT 1")  # surfaces a dead connection
+            except Exception:
+                logger.exception("Admin event listener failed; reconnecting")
+            finally:
+                self.listening = False
+                if connection is not None:
+                    try:
+                        await connection.close(timeout=5)
+                    except Exception:
+                        connection.terminate()
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=constants.ADMIN_EVENTS_RECONNECT_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+        logger.info("Admin event listener stopped")
+
+
+broker = AdminEventBroker()
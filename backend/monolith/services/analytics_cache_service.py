@@ -0,0 +1,99 @@
+"""
+Response cache for the admin analytics endpoints.
+
+Entries are keyed by (endpoint, parameters, orders version). The orders
+version is a Redis counter bumped after a transaction that changes sales
+commits (every daily_sales write in sales_rollup_service marks the
+session) and after admin catalog edits, which change the stock and names
+shown in reports. A bump retires every cached report at once without
+scanning for keys; superseded entries just expire. Between changes,
+repeat views from any number of admins are served from Redis.
+
+Cached reports are computed on the primary (reports_need_primary): the
+version is bumped right after the commit, and a replica that has not
+replayed that commit yet would fill the cache with pre-change figures
+under the new version. The primary only sees cache misses.
+
+Without Redis every call falls through to the database.
+"""
+import logging
+import time
+from typing import Optional, Sequence
+
+import redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from utils import constants
+from utils.cache import get_cache_key, redis_client
+from utils.cache_decorator import cached
+
+logger = logging.getLogger(__name__)
+
+_ORDERS_CHANGED = "analytics_orders_changed"  # Session.info flag
+
+
+def orders_version() -> Optional[int]:
+    """Current orders version, or None when Redis is unavailable"""
+    if not redis_client:
+        return None
+    try:
+        version = redis_client.get(constants.ANALYTICS_ORDERS_VERSION_KEY)
+        if version is None:
+            # Start from the clock, not 0, so a lost counter can't revive
+            # entries cached under earlier small versions
+            redis_client.set(constants.ANALYTICS_ORDERS_VERSION_KEY, time.time_ns() // 1_000_000, nx=True)
+            version = redis_client.get(constants.ANALYTICS_ORDERS_VERSION_KEY)
+        return int(version)
+    except (redis.RedisError, TypeError, ValueError) as e:
+        logger.warning(f"Could not read analytics orders version: {e}")
+        return None
+
+
+def bump_orders_version() -> None:
+    if not redis_client:
+        return
+    try:
+        if redis_client.get(constants.ANALYTICS_ORDERS_VERSION_KEY) is None:
+            redis_client.set(constants.ANALYTICS_ORDERS_VERSION_KEY, time.time_ns() // 1_000_000, nx=True)
+        redis_client.incr(constants.ANALYTICS_ORDERS_VERSION_KEY)
+    except redis.RedisError as e:
+        # Reports stay stale for at most ANALYTICS_CACHE_TTL
+        logger.error(f"Failed to bump analytics orders version: {e}")
+
+
+def reports_need_primary() -> bool:
+    """True while reports are cached, so cache fills must read from the primary"""
+    return redis_client is not None
+
+
+def mark_orders_changed(db: Session) -> None:
+    """Bump the orders version once db's current transaction commits"""
+    db.info[_ORDERS_CHANGED] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_commit(session: Session) -> None:
+    # After, not during, the transaction: a report recomputed between the
+    # bump and the commit would otherwise be cached under the new version
+    if session.info.pop(_ORDERS_CHANGED, False):
+        bump_orders_version()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session: Session) -> None:
+    session.info.pop(_ORDERS_CHANGED, None)
+
+
+def cached_report(endpoint: str, params: Sequence[str] = ("range",)):
+    """
+    Cache an analytics endpoint under (endpoint, params, orders version).
+    `params` names the query parameters that select the report.
+    """
+    def key_builder(*args, **kwargs) -> str:
+        return get_cache_key(
+            f"analytics:{endpoint}:v{orders_version()}",
+            **{name: kwargs.get(name) for name in params}
+        )
+
+    return cached("analytics", expire=constants.ANALYTICS_CACHE_TTL, key_builder=key_builder)
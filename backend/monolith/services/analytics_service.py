@@ -0,0 +1,154 @@
+"""
+Aggregates behind the admin analytics dashboard.
+
+Sales figures come from the daily_sales rollup (see
+services/sales_rollup_service.py), so a 90-day report reads at most
+90 rows per product instead of every order and order item. Period
+comparisons use SUM/COUNT ... FILTER (WHERE ...) to return both windows
+in one row. Ranges are whole days: a window starting at `start` includes
+all of start's date.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Union
+
+from sqlalchemy import desc, func, select
+from sqlalchemy.orm import Session
+
+import models
+from services.sales_rollup_service import ORDER_TOTALS_PRODUCT_ID
+
+DailySales = models.DailySales
+
+
+def _day(value: Union[date, datetime]) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def order_period_totals(db: Session, start: Union[date, datetime],
+                        previous_start: Union[date, datetime]) -> Dict[str, Union[int, Decimal]]:
+    """Paid revenue and order counts for [start, today] and [previous_start, start)"""
+    start, previous_start = _day(start), _day(previous_start)
+    current = DailySales.sales_date >= start
+    previous = DailySales.sales_date < start
+    row = db.execute(
+        select(
+            func.coalesce(func.sum(DailySales.revenue).filter(current), 0).label("current_revenue"),
+            func.coalesce(func.sum(DailySales.order_count).filter(current), 0).label("current_orders"),
+            func.coalesce(func.sum(DailySales.revenue).filter(previous), 0).label("previous_revenue"),
+            func.coalesce(func.sum(DailySales.order_count).filter(previous), 0).label("previous_orders"),
+        ).where(
+            DailySales.product_id == ORDER_TOTALS_PRODUCT_ID,
+            DailySales.sales_date >= previous_start
+        )
+    ).one()
+    return dict(row._mapping)
+
+
+def customer_period_totals(db: Session, start: datetime, previous_start: datetime) -> Dict[str, int]:
+    """New customers in both periods plus the all-time total"""
+    row = db.execute(
+        select(
+            func.count().filter(models.Customer.created_at >= start).label("current_customers"),
+            func.count().filter(
+                models.Customer.created_at >= previous_start,
+                models.Customer.created_at < start
+            ).label("previous_customers"),
+            func.count().label("total_customers"),
+        )
+    ).one()
+    return dict(row._mapping)
+
+
+def total_revenue(db: Session) -> Decimal:
+    """All-time paid revenue"""
+    return db.scalar(
+        select(func.coalesce(func.sum(DailySales.revenue), 0)).where(
+            DailySales.product_id == ORDER_TOTALS_PRODUCT_ID
+        )
+    )
+
+
+def sales_by_date(db: Session, start: Union[date, datetime]) -> List[Dict[str, Any]]:
+    """Paid revenue and order count per day since `start`"""
+    rows = db.execute(
+        select(DailySales.sales_date, DailySales.revenue, DailySales.order_count).where(
+            DailySales.product_id == ORDER_TOTALS_PRODUCT_ID,
+            DailySales.sales_date >= _day(start),
+            DailySales.order_count > 0
+        ).order_by(DailySales.sales_date)
+    ).all()
+    return [dict(row._mapping) for row in rows]
+
+
+def average_order_value(db: Session, start: Union[date, datetime]) -> Decimal:
+    row = db.execute(
+        select(
+            func.coalesce(func.sum(DailySales.revenue), 0).label("revenue"),
+            func.coalesce(func.sum(DailySales.order_count), 0).label("orders"),
+        ).where(
+            DailySales.product_id == ORDER_TOTALS_PRODUCT_ID,
+            DailySales.sales_date >= _day(start)
+        )
+    ).one()
+    return row.revenue / row.orders if row.orders else Decimal("0")
+
+
+def top_products(db: Session, start: Union[date, datetime], limit: int) -> List[Dict[str, Any]]:
+    """Best sellers by revenue since `start`, with their current total stock"""
+    sales = select(
+        DailySales.product_id,
+        func.sum(DailySales.revenue).label("revenue"),
+        func.sum(DailySales.units).label("units_sold"),
+    ).where(
+        DailySales.product_id != ORDER_TOTALS_PRODUCT_ID,
+        DailySales.sales_date >= _day(start)
+    ).group_by(DailySales.product_id).subquery()
+    stock = select(func.coalesce(func.sum(models.ProductVariant.stock_quantity), 0)).where(
+        models.ProductVariant.product_id == models.Product.id
+    ).scalar_subquery()
+
+    rows = db.execute(
+        select(
+            models.Product.id, models.Product.name, models.Product.category,
+            sales.c.revenue, sales.c.units_sold, stock.label("stock")
+        ).join(sales, sales.c.product_id == models.Product.id)
+        .where(sales.c.revenue > 0)
+        .order_by(desc(sales.c.revenue))
+        .limit(limit)
+    ).all()
+    return [dict(row._mapping) for row in rows]
+
+
+def product_orders(db: Session, start: Union[date, datetime]) -> Dict[int, Dict[str, int]]:
+    """Paid orders and units per product since `start`"""
+    rows = db.execute(
+        select(
+            DailySales.product_id,
+            func.sum(DailySales.order_count).label("orders"),
+            func.sum(DailySales.units).label("units"),
+        ).where(
+            DailySales.product_id != ORDER_TOTALS_PRODUCT_ID,
+            DailySales.sales_date >= _day(start)
+        ).group_by(DailySales.product_id)
+    ).all()
+    return {row.product_id: {"orders": row.orders, "units": row.units} for row in rows}
+
+
+def revenue_by_category(db: Session, start: Union[date, datetime]) -> List[Dict[str, Any]]:
+    """
+    Item revenue per category since `start`. `orders` counts order lines
+    per product, so an order with two products in a category counts twice.
+    """
+    rows = db.execute(
+        select(
+            DailySales.category,
+            func.sum(DailySales.revenue).label("revenue"),
+            func.sum(DailySales.order_count).label("orders"),
+        ).where(
+            DailySales.product_id != ORDER_TOTALS_PRODUCT_ID,
+            DailySales.sales_date >= _day(start)
+        ).group_by(DailySales.category)
+        .having(func.sum(DailySales.order_count) > 0)
+    ).all()
+    return [dict(row._mapping) for row in rows]
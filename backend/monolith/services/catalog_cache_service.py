@@ -0,0 +1,66 @@
+"""
+Storefront catalog caching.
+
+The category list is read on every storefront page load. It is cached in
+Redis under CATEGORIES_CACHE_KEY, and the scheduler re-warms the entry
+shortly before it expires so shoppers never pay for the cold query.
+"""
+import json
+import logging
+from typing import Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import models
+import schemas
+from database import SessionLocal
+from utils import constants
+from utils.cache import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+def active_categories_query():
+    return select(models.Category).where(
+        models.Category.is_active
+    ).order_by(models.Category.name)
+
+
+def fetch_active_categories(db: Session) -> List[schemas.CategoryResponse]:
+    categories = db.scalars(active_categories_query()).all()
+    return [schemas.CategoryResponse.model_validate(cat) for cat in categories]
+
+
+async def fetch_active_categories_async(db: AsyncSession) -> List[schemas.CategoryResponse]:
+    categories = (await db.scalars(active_categories_query())).all()
+    return [schemas.CategoryResponse.model_validate(cat) for cat in categories]
+
+
+def cache_active_categories(categories: List[schemas.CategoryResponse]) -> None:
+    if not redis_client:
+        return
+    try:
+        redis_client.setex(
+            constants.CATEGORIES_CACHE_KEY,
+            constants.CATEGORIES_CACHE_TTL,
+            json.dumps(jsonable_encoder(categories))
+        )
+    except Exception as e:
+        # Cache write failed; readers fall back to the database
+        logger.warning(f"Failed to cache categories: {e}")
+
+
+def warm_catalog_cache() -> Dict[str, int]:
+    """Refresh cached catalog entries; no-op without Redis"""
+    if not redis_client:
+        return {"categories": 0}
+    db = SessionLocal()
+    try:
+        categories = fetch_active_categories(db)
+    finally:
+        db.close()
+    cache_active_categories(categories)
+    return {"categories": len(categories)}
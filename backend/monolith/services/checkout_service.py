@@ -0,0 +1,88 @@
+"""
+Expiry of abandoned pending checkouts.
+
+Expired rows are flipped in bounded chunks with
+UPDATE ... WHERE id IN (SELECT ... LIMIT n FOR UPDATE SKIP LOCKED) RETURNING,
+committing after each chunk: memory stays flat regardless of backlog, locks
+are held only for one chunk, and several instances (API machines, the
+standalone job) can run at once without blocking each other.
+
+Pending checkouts do not hold stock (stock is decremented when the order is
+created), so there is nothing to release beyond the status change.
+"""
+import logging
+from typing import Any, Dict
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+from utils import constants
+
+logger = logging.getLogger(__name__)
+
+
+def expire_chunk(db: Session, batch_size: int) -> int:
+    """Mark up to `batch_size` expired pending checkouts as expired and commit"""
+    candidates = select(models.PendingCheckout.id).where(
+        models.PendingCheckout.status == "pending",
+        models.PendingCheckout.expires_at < func.now()
+    ).order_by(models.PendingCheckout.id).limit(batch_size).with_for_update(skip_locked=True)
+
+    expired = db.execute(
+        update(models.PendingCheckout)
+        .where(models.PendingCheckout.id.in_(candidates.scalar_subquery()))
+        .values(status="expired")
+        .returning(models.PendingCheckout.payment_reference)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.commit()
+
+    if expired:
+        logger.info(f"Expired {len(expired)} pending checkouts (first: {expired[0]}, last: {expired[-1]})")
+    return len(expired)
+
+
+def cleanup_expired_checkouts(db: Session, batch_size: int = constants.CHECKOUT_CLEANUP_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Expire all overdue pending checkouts, one committed chunk at a time
+
+    Returns:
+        dict: Statistics about the cleanup operation
+    """
+    total = 0
+    batches = 0
+    try:
+        while True:
+            count = expire_chunk(db, batch_size)
+            total += count
+            batches += 1 if count else 0
+            if count < batch_size:
+                break
+    except Exception as e:
+        logger.error(f"Error during cleanup: {str(e)}")
+        db.rollback()
+        return {
+            "expired_count": total,
+            "batches": batches,
+            "status": "error",
+            "message": str(e)
+        }
+
+    return {
+        "expired_count": total,
+        "batches": batches,
+        "status": "success",
+        "message": f"Cleaned up {total} expired checkouts"
+    }
+
+
+def run_cleanup_once() -> Dict[str, Any]:
+    """Run a cleanup pass in its own session"""
+    db = SessionLocal()
+    try:
+        return cleanup_expired_checkouts(db)
+    finally:
+        db.close()
+
@@ -0,0 +1,216 @@
+"""
+Per-customer order metrics and the customer analytics built on them.
+
+customer_metrics holds one row per customer with a paid order: first and
+last paid order time, paid order count and total spent. Whenever an
+order's sales are recorded or reversed (sales_rollup_service.record_orders),
+the affected customers' rows are recomputed from their own paid orders,
+an indexed lookup of a handful of rows, so refunds that remove a
+customer's first or last order stay exact. The customers are locked first,
+so two concurrent orders for one customer recompute one after the other
+and the second sees the first. rebuild() recomputes the whole
+table for the backfill command and the nightly job.
+
+Repeat rate and lifetime value read the table directly; cohort retention
+and RFM segments add window functions on top of it, so none of them
+aggregate the orders table per request.
+"""
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Union
+
+from sqlalchemy import and_, bindparam, case, extract, func, select, text
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+from utils import constants
+
+logger = logging.getLogger(__name__)
+
+CustomerMetrics = models.CustomerMetrics
+
+# {where} selects the customers to recompute (orders alias o)
+_UPSERT_FROM_ORDERS = """
+    INSERT INTO customer_metrics (customer_id, first_order_at, last_order_at, order_count, total_spent, updated_at)
+    SELECT o.customer_id, MIN(o.created_at), MAX(o.created_at), COUNT(*), SUM(o.total_amount), CURRENT_TIMESTAMP
+    FROM orders o
+    WHERE o.payment_status = :paid AND {where}
+    GROUP BY o.customer_id
+    ON CONFLICT (customer_id) DO UPDATE SET
+        first_order_at = excluded.first_order_at,
+        last_order_at = excluded.last_order_at,
+        order_count = excluded.order_count,
+        total_spent = excluded.total_spent,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# Customers whose last paid order was refunded
+_DELETE_WITHOUT_PAID_ORDERS = """
+    DELETE FROM customer_metrics
+    WHERE customer_id IN :customer_ids
+      AND NOT EXISTS (
+          SELECT 1 FROM orders o WHERE o.customer_id = customer_metrics.customer_id AND o.payment_status = :paid
+      )
+"""
+
+
+def refresh_for_orders(db: Session, order_ids: Iterable[int]) -> None:
+    """
+    Recompute the metrics of the customers who placed `order_ids`, inside
+    the caller's transaction.
+    """
+    order_ids = list(order_ids)
+    if not order_ids:
+        return
+    db.flush()  # payment_status changes must be visible to the recompute
+    customer_ids = db.scalars(
+        select(models.Order.customer_id).where(models.Order.id.in_(order_ids)).distinct()
+    ).all()
+    if not customer_ids:
+        return
+    # NO KEY UPDATE: order inserts only take KEY SHARE on their customer, so
+    # this serialises refreshes without blocking (or deadlocking) checkouts.
+    # Each statement below then reads the orders committed while we waited.
+    customer_ids = db.scalars(
+        select(models.Customer.id).where(models.Customer.id.in_(customer_ids))
+        .order_by(models.Customer.id).with_for_update(key_share=True)
+    ).all()
+    params = {"paid": constants.PAYMENT_STATUS_PAID, "customer_ids": list(customer_ids)}
+    for statement in (
+        text(_UPSERT_FROM_ORDERS.format(where="o.customer_id IN :customer_ids")),
+        text(_DELETE_WITHOUT_PAID_ORDERS),
+    ):
+        db.execute(statement.bindparams(bindparam("customer_ids", expanding=True)), params)
+
+
+def rebuild(db: Session, commit: bool = True) -> Dict[str, int]:
+    """Recompute customer_metrics from all paid orders. Safe to rerun."""
+    deleted = db.execute(text("DELETE FROM customer_metrics")).rowcount
+    db.execute(text(_UPSERT_FROM_ORDERS.format(where="1 = 1")), {"paid": constants.PAYMENT_STATUS_PAID})
+    rows = db.execute(text("SELECT COUNT(*) FROM customer_metrics")).scalar()
+    if commit:
+        db.commit()
+    logger.info(f"Rebuilt customer_metrics: {deleted} rows replaced by {rows}")
+    return {"deleted": deleted, "rows": rows}
+
+
+def rebuild_all() -> Dict[str, int]:
+    """Scheduled job: recompute the table to repair any drift"""
+    db = SessionLocal()
+    try:
+        return rebuild(db)
+    finally:
+        db.close()
+
+
+def customer_summary(db: Session, start: Union[date, datetime]) -> Dict[str, Any]:
+    """
+    Customers with a paid order since `start`, how many of them have
+    ordered more than once (ever), and average lifetime spend over all
+    paying customers.
+    """
+    active = CustomerMetrics.last_order_at >= start
+    row = db.execute(
+        select(
+            func.count().filter(active).label("active_customers"),
+            func.count().filter(active, CustomerMetrics.order_count > 1).label("repeat_customers"),
+            func.coalesce(func.avg(CustomerMetrics.total_spent), 0).label("lifetime_value"),
+        )
+    ).one()
+    summary = dict(row._mapping)
+    summary["repeat_rate"] = (
+        summary["repeat_customers"] / summary["active_customers"] * 100 if summary["active_customers"] else 0
+    )
+    return summary
+
+
+def _month_index(column):
+    # Months since year 0, so month differences don't depend on the dialect
+    return extract("year", column) * 12 + extract("month", column) - 1
+
+
+def cohort_retention(db: Session, months: int) -> List[Dict[str, Any]]:
+    """
+    Monthly cohorts by first paid order for the last `months` months
+    (including this one). retention[n] is the share of the cohort that
+    placed a paid order n months after their first.
+    """
+    today = date.today()
+    current = today.year * 12 + today.month - 1
+    first = current - (months - 1)
+    cohort_start = date(first // 12, first % 12 + 1, 1)
+
+    cohort = _month_index(CustomerMetrics.first_order_at)
+    activity = select(
+        CustomerMetrics.customer_id,
+        cohort.label("cohort"),
+        (_month_index(models.Order.created_at) - cohort).label("month"),
+    ).join(
+        models.Order, models.Order.customer_id == CustomerMetrics.customer_id
+    ).where(
+        models.Order.payment_status == constants.PAYMENT_STATUS_PAID,
+        CustomerMetrics.first_order_at >= cohort_start
+    ).distinct().subquery()
+    counts = select(
+        activity.c.cohort, activity.c.month, func.count().label("customers")
+    ).group_by(activity.c.cohort, activity.c.month).subquery()
+    rows = db.execute(
+        select(
+            counts.c.cohort, counts.c.month, counts.c.customers,
+            func.first_value(counts.c.customers).over(
+                partition_by=counts.c.cohort, order_by=counts.c.month
+            ).label("cohort_size"),
+        ).order_by(counts.c.cohort, counts.c.month)
+    ).all()
+
+    cohorts: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        index = int(row.cohort)
+        entry = cohorts.setdefault(index, {
+            "cohort": f"{index // 12:04d}-{index % 12 + 1:02d}",
+            "customers": row.cohort_size,
+            "retention": [0.0] * (current - index + 1),
+        })
+        month = int(row.month)
+        if month < len(entry["retention"]):
+            entry["retention"][month] = round(row.customers / row.cohort_size * 100, 1)
+    return list(cohorts.values())
+
+
+def rfm_segments(db: Session) -> List[Dict[str, Any]]:
+    """
+    Paying customers grouped into RFM segments. Recency, frequency and
+    monetary scores are quintiles (NTILE(5), 5 = best) over all paying
+    customers; one-time buyers always score frequency 1.
+    """
+    scored = select(
+        CustomerMetrics.customer_id,
+        CustomerMetrics.order_count,
+        CustomerMetrics.total_spent,
+        func.ntile(5).over(order_by=CustomerMetrics.last_order_at).label("r"),
+        func.ntile(5).over(order_by=CustomerMetrics.order_count).label("f"),
+        func.ntile(5).over(order_by=CustomerMetrics.total_spent).label("m"),
+    ).subquery("scored")
+    r = scored.c.r
+    # Ties spread one-time buyers over several frequency quintiles; pin them to 1
+    f = case((scored.c.order_count == 1, 1), else_=scored.c.f)
+    segment = case(
+        (and_(r >= 4, f >= 4), "champions"),
+        (and_(r >= 3, f >= 3), "loyal"),
+        (and_(r >= 4, scored.c.order_count == 1), "new"),
+        (and_(r <= 2, f >= 3), "at_risk"),
+        (r <= 2, "hibernating"),
+        else_="needs_attention"
+    )
+    segmented = select(scored, segment.label("segment")).subquery("segmented")
+    rows = db.execute(
+        select(
+            segmented.c.segment,
+            func.count().label("customers"),
+            func.sum(segmented.c.total_spent).label("revenue"),
+            func.avg(segmented.c.order_count).label("average_orders"),
+            func.avg(segmented.c.m).label("average_monetary_score"),
+        ).group_by(segmented.c.segment).order_by(func.sum(segmented.c.total_spent).desc())
+    ).all()
+    return [dict(row._mapping) for row in rows]
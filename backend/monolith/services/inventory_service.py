@@ -2,6 +2,7 @@ import logging
 from typing import List, Dict, Any
 from sqlalchemy.orm import Session
 import models
+from services import low_stock_service
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +35,9 @@ def reserve_stock(db: Session, items: List[Dict[str, Any]]) -> List[Dict[str, An
         db: Database session
         items: List of dicts containing 'variant_id' and 'quantity'
         
+    Variants that cross their low-stock threshold get an alert queued in
+    the same transaction.
+
     Returns:
         List of reserved items (for potential rollback)
         
@@ -67,6 +71,12 @@ def reserve_stock(db: Session, items: List[Dict[str, Any]]) -> List[Dict[str, An
             "variant_id": variant_id,
             "quantity": quantity
         })
+
+    # Alert admins about variants this reservation pushed below their threshold
+    taken: Dict[int, int] = {}
+    for item in reserved_variants:
+        taken[item["variant_id"]] = taken.get(item["variant_id"], 0) + item["quantity"]
+    low_stock_service.record_crossings(db, taken)
         
     return reserved_variants
 
@@ -0,0 +1,170 @@
+"""
+Low-stock thresholds, the inventory alerts report and crossing alerts.
+
+A variant's threshold is its own low_stock_threshold, else its category's,
+else LOW_STOCK_DEFAULT_THRESHOLD. Stock at or below half of it is
+"critical", at or below it "low", and up to twice it "warning". Thresholds
+are capped at LOW_STOCK_MAX_THRESHOLD so every warning row lies inside the
+partial index ix_productvariants_low_stock (active variants with stock up
+to LOW_STOCK_INDEX_CEILING); the report repeats that bound as a literal
+predicate so the planner can use the index instead of scanning every
+variant.
+
+When a reservation moves a variant into a worse level ("low" or
+"critical"), `record_crossings` adds a low_stock_alert outbox row to the
+same transaction. The rows become due at the end of the current alert
+window, so the outbox worker claims a window's crossings together and
+`send_low_stock_digest` turns them into one email per admin and one
+WhatsApp to the owner.
+"""
+import logging
+import math
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Mapping, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import models
+from config import settings
+from services import admin_events_service
+from utils import constants
+from utils.notifications import send_low_stock_alert
+
+logger = logging.getLogger(__name__)
+
+LOW_STOCK_ALERT = "low_stock_alert"
+
+LEVELS = ("critical", "low", "warning")  # most severe first
+ALERT_LEVELS = ("critical", "low")  # pushed to admins; "warning" is dashboard-only
+
+
+def effective_threshold():
+    """SQL expression for a variant's threshold; needs Product and Category joined"""
+    return func.coalesce(
+        models.ProductVariant.low_stock_threshold,
+        models.Category.low_stock_threshold,
+        constants.LOW_STOCK_DEFAULT_THRESHOLD
+    )
+
+
+def stock_level(stock: int, threshold: int) -> Optional[str]:
+    if stock <= threshold // 2:
+        return "critical"
+    if stock <= threshold:
+        return "low"
+    if stock <= threshold * 2:
+        return "warning"
+    return None
+
+
+def _variants_query(db: Session):
+    return db.query(
+        models.ProductVariant.id,
+        models.Product.name.label("product_name"),
+        models.ProductVariant.sku,
+        models.ProductVariant.stock_quantity,
+        effective_threshold().label("threshold")
+    ).join(
+        models.Product, models.ProductVariant.product_id == models.Product.id
+    ).outerjoin(
+        models.Category, models.Category.slug == models.Product.category
+    )
+
+
+def inventory_alerts(db: Session) -> List[Dict]:
+    """Active variants in the warning band or below, lowest stock first"""
+    threshold = effective_threshold()
+    rows = _variants_query(db).filter(
+        models.ProductVariant.is_active,
+        models.ProductVariant.stock_quantity <= constants.LOW_STOCK_INDEX_CEILING,
+        models.ProductVariant.stock_quantity <= threshold * 2,
+        models.Product.is_active
+    ).order_by(
+        models.ProductVariant.stock_quantity
+    ).all()
+
+    alerts = []
+    for variant in rows:
+        level = stock_level(variant.stock_quantity, variant.threshold)
+        level_bounds = {"critical": variant.threshold // 2, "low": variant.threshold, "warning": variant.threshold * 2}
+        alerts.append({
+            "id": variant.id,
+            "productName": variant.product_name,
+            "variantSku": variant.sku,
+            "currentStock": variant.stock_quantity,
+            "minStock": level_bounds[level],
+            "threshold": variant.threshold,
+            "status": level
+        })
+    return alerts
+
+
+def _window_end() -> datetime:
+    window = constants.LOW_STOCK_ALERT_WINDOW_SECONDS
+    return datetime.fromtimestamp(math.ceil(time.time() / window) * window, tz=timezone.utc)
+
+
+def record_crossings(db: Session, decrements: Mapping[int, int]) -> int:
+    """
+    Enqueue an alert for each variant that `decrements` (variant_id ->
+    quantity just taken, already applied) moved into a worse level.
+    Returns the number of alerts; the caller commits.
+    """
+    if not decrements:
+        return 0
+    rows = _variants_query(db).filter(
+        models.ProductVariant.id.in_(list(decrements)),
+        models.ProductVariant.stock_quantity <= constants.LOW_STOCK_MAX_THRESHOLD
+    ).all()
+
+    available_at = _window_end()
+    count = 0
+    for variant in rows:
+        level = stock_level(variant.stock_quantity, variant.threshold)
+        before = stock_level(variant.stock_quantity + decrements[variant.id], variant.threshold)
+        if level not in ALERT_LEVELS or (before and LEVELS.index(before) <= LEVELS.index(level)):
+            continue
+        event = models.OutboxEvent(
+            event_type=LOW_STOCK_ALERT,
+            payload={"variant_id": variant.id, "stock": variant.stock_quantity,
+                     "threshold": variant.threshold, "level": level},
+            status="pending", attempts=0, available_at=available_at
+        )
+        db.add(event)
+        admin_events_service.publish(db, admin_events_service.LOW_STOCK, dict(event.payload, sku=variant.sku))
+        count += 1
+    if count:
+        logger.info(f"{count} variant(s) crossed their low-stock threshold")
+    return count
+
+
+def send_low_stock_digest(db: Session, events: List[models.OutboxEvent]) -> Dict[int, bool]:
+    """Outbox handler: one message for the whole batch, with current stock"""
+    variant_ids = {event.payload.get("variant_id") for event in events}
+    variants = _variants_query(db).filter(
+        models.ProductVariant.id.in_(variant_ids)
+    ).order_by(models.ProductVariant.stock_quantity).all()
+
+    # Current stock, not the stock at the crossing: variants deleted or
+    # restocked since (or whose reservation was released) are left out
+    items = []
+    for variant in variants:
+        level = stock_level(variant.stock_quantity, variant.threshold)
+        if level not in ALERT_LEVELS:
+            continue
+        items.append({
+            "product_name": variant.product_name,
+            "sku": variant.sku,
+            "stock": variant.stock_quantity,
+            "threshold": variant.threshold,
+            "level": level,
+        })
+
+    recipients = [email for (email,) in db.query(models.AdminUser.email).filter(
+        models.AdminUser.is_active,
+        models.AdminUser.email.isnot(None)
+    )]
+    delivered = send_low_stock_alert(items, recipients, settings.OWNER_PHONE_NUMBER) if items else True
+    return {event.id: delivered for event in events}
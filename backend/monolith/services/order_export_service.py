@@ -0,0 +1,57 @@
+"""
+Order export for bookkeeping: one row per order line.
+
+Rows are read through a server-side cursor (yield_per, which on
+PostgreSQL implies stream_results) as plain column tuples, so neither the
+driver nor the ORM identity map holds more than one batch, and the
+writers in utils/export_stream.py turn them into CSV or XLSX chunks as
+they arrive.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Any, Iterator, Optional, Tuple
+
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+import models
+from utils import constants
+
+EXPORT_HEADER = [
+    "Order Number", "Created At", "Status", "Payment Status", "Payment Reference",
+    "Customer Name", "Customer Email", "Customer Phone", "Shipping Address",
+    "Product", "SKU", "Size", "Color", "Quantity", "Unit Price", "Line Total",
+    "Order Shipping", "Order Tax", "Order Total",
+]
+
+
+def export_query(start: date, end: date, status: Optional[str] = None,
+                 payment_status: Optional[str] = None) -> Select:
+    """Order lines of orders created from `start` to `end`, both inclusive"""
+    Order, OrderItem = models.Order, models.OrderItem
+    query = select(
+        Order.order_number, Order.created_at, Order.status, Order.payment_status, Order.payment_reference,
+        Order.customer_name, Order.customer_email, Order.customer_phone, Order.shipping_address,
+        models.Product.name, models.ProductVariant.sku, models.ProductVariant.size, models.ProductVariant.color,
+        OrderItem.quantity, OrderItem.unit_price, OrderItem.total_price,
+        Order.shipping_cost, Order.tax_amount, Order.total_amount,
+    ).join(
+        OrderItem, OrderItem.order_id == Order.id
+    ).outerjoin(
+        models.ProductVariant, models.ProductVariant.id == OrderItem.variant_id
+    ).outerjoin(
+        models.Product, models.Product.id == models.ProductVariant.product_id
+    ).where(
+        Order.created_at >= datetime.combine(start, time.min),
+        Order.created_at < datetime.combine(end + timedelta(days=1), time.min)
+    )
+    if status and status != "all":
+        query = query.where(Order.status == status)
+    if payment_status and payment_status != "all":
+        query = query.where(Order.payment_status == payment_status)
+    return query.order_by(Order.created_at, Order.id, OrderItem.id)
+
+
+def iter_rows(db: Session, query: Select) -> Iterator[Tuple[Any, ...]]:
+    result = db.execute(query.execution_options(yield_per=constants.ORDER_EXPORT_BATCH_SIZE))
+    for row in result:
+        yield tuple(row)
@@ -0,0 +1,95 @@
+"""
+Admin order listings: filters, keyset pages and total counts.
+
+Pages are ordered newest first on (created_at, id) and continue from an
+opaque cursor holding the last row's key, so a deep page costs the same
+as the first one; OFFSET has to read and discard every earlier row. The
+(status, created_at, id) and (payment_status, created_at, id) indexes
+serve the filtered listings, and searches use the trigram indexes on
+order number, customer name and customer email.
+
+Total counts are exact, cached per filter set under the orders version
+(services/analytics_cache_service.py), so paging through a listing
+counts once per change to the orders instead of once per page.
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import func, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+import models
+from services.analytics_cache_service import orders_version
+from utils import constants
+from utils.cache import get_cache_key, get_from_cache, set_cache
+
+Order = models.Order
+
+
+def order_filters(status: Optional[str] = None, payment_status: Optional[str] = None,
+                  search: Optional[str] = None, customer_email: Optional[str] = None) -> List[Any]:
+    conditions = []
+    if status and status != "all":
+        conditions.append(Order.status == status)
+    if payment_status and payment_status != "all":
+        conditions.append(Order.payment_status == payment_status)
+    if customer_email:
+        conditions.append(Order.customer_email == customer_email)
+    if search:
+        search_term = f"%{search}%"
+        conditions.append(or_(
+            Order.order_number.ilike(search_term),
+            Order.customer_name.ilike(search_term),
+            Order.customer_email.ilike(search_term)
+        ))
+    return conditions
+
+
+def encode_cursor(order: models.Order) -> str:
+    key = f"{order.created_at.isoformat()}|{order.id}"
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for cursors this module did not produce"""
+    try:
+        key = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, order_id = key.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(order_id)
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def page(db: Session, query, limit: int, cursor: Optional[str] = None,
+         skip: int = 0) -> Tuple[List[models.Order], Optional[str]]:
+    """
+    One page of `query` (a Query over Order), newest first. Continues after
+    `cursor` when given; `skip` is the OFFSET fallback for old clients.
+    Returns the orders and the cursor of the next page (None on the last).
+    """
+    query = query.order_by(Order.created_at.desc(), Order.id.desc())
+    if cursor:
+        created_at, order_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Order.created_at, Order.id) < (created_at, order_id))
+    elif skip:
+        query = query.offset(skip)
+    orders = query.limit(limit + 1).all()
+    if len(orders) > limit:
+        return orders[:limit], encode_cursor(orders[limit - 1])
+    return orders, None
+
+
+def total_count(db: Session, conditions: List[Any], **filters) -> int:
+    """Exact count of orders matching `conditions`; `filters` names them for the cache key"""
+    version = orders_version()
+    key = get_cache_key(f"orders:count:v{version}", **filters) if version is not None else None
+    if key:
+        cached = get_from_cache(key)
+        if cached is not None:
+            return cached["count"]
+    count = db.scalar(select(func.count()).select_from(Order).where(*conditions))
+    if key:
+        set_cache(key, {"count": count}, expire=constants.CACHE_ORDER_TTL)
+    return count
@@ -1,40 +1,110 @@
 import logging
-import uuid
-from datetime import datetime
+from collections import defaultdict
+from datetime import datetime, timezone
 from decimal import Decimal
 from typing import Dict, Any, Optional
 
 from sqlalchemy.orm import Session
 from sqlalchemy import case
+from sqlalchemy.exc import IntegrityError
 
 import models
-from utils.notifications import send_order_confirmation
+from services import admin_events_service, low_stock_service, outbox_service, sales_rollup_service
+from utils import constants
+from utils.ids import new_order_number
 
 logger = logging.getLogger(__name__)
 
-def generate_order_number() -> str:
-    """Generate a unique order number"""
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    unique_id = str(uuid.uuid4())[:8].upper()
-    return f"ORD-{timestamp}-{unique_id}"
+def build_customer(checkout_data: Dict[str, Any]) -> models.Customer:
+    """Build a new Customer from checkout form data (not added to the session)"""
+    name_parts = checkout_data["customer_name"].split(' ', 1)
+    return models.Customer(
+        email=checkout_data["customer_email"],
+        phone=checkout_data["customer_phone"],
+        first_name=name_parts[0],
+        last_name=name_parts[1] if len(name_parts) > 1 else "",
+        is_active=True
+    )
+
+def add_order_records(
+    db: Session,
+    checkout_info: Dict[str, Any],
+    customer: models.Customer,
+    payment_reference: str
+) -> models.Order:
+    """
+    Add the Order, its OrderItems and the Payment record for a paid checkout.
+    Stock must already be reserved; the caller owns the transaction.
+    """
+    checkout_data = checkout_info["checkout_data"]
+    total_amount = Decimal(str(checkout_info["total_amount"]))
+
+    new_order = models.Order(
+        order_number=new_order_number(),
+        idempotency_key=checkout_data["idempotency_key"],
+        status="confirmed",
+        payment_status="paid",
+        payment_method=checkout_data["payment_method"],
+        payment_reference=payment_reference,
+        customer_id=customer.id,
+        customer_name=checkout_data["customer_name"],
+        customer_email=checkout_data["customer_email"],
+        customer_phone=checkout_data["customer_phone"],
+        shipping_address=checkout_data["shipping_address"],
+        billing_address=checkout_data.get("billing_address") or checkout_data["shipping_address"],
+        total_amount=total_amount,
+        shipping_cost=Decimal('0.0'),
+        tax_amount=Decimal('0.0'),
+        notes=checkout_data.get("notes")
+    )
+    new_order.items = [
+        models.OrderItem(
+            variant_id=item_data["variant_id"],
+            quantity=item_data["quantity"],
+            unit_price=Decimal(str(item_data["unit_price"])),
+            total_price=Decimal(str(item_data["total_price"]))
+        )
+        for item_data in checkout_info["cart_items"]
+    ]
+    db.add(new_order)
+    db.flush()
+    sales_rollup_service.record_orders(db, [new_order.id])
+    admin_events_service.publish(db, admin_events_service.ORDER_CREATED, {
+        "order_id": new_order.id,
+        "order_number": new_order.order_number,
+        "customer_name": new_order.customer_name,
+        "total_amount": new_order.total_amount,
+        "items": len(new_order.items),
+    })
+
+    # Create Payment record for admin reporting
+    db.add(models.Payment(
+        order_id=new_order.id,
+        reference=payment_reference,
+        amount=total_amount,
+        status="success",
+        payment_method="paystack",
+        channel="card",  # Default, could be updated from webhook data
+        paid_at=datetime.now()
+    ))
+    return new_order
 
 def create_order_from_checkout(
     db: Session, 
     pending_checkout: models.PendingCheckout, 
     payment_reference: str,
-    paid_amount_kobo: Optional[int] = None,
-    background_tasks: Optional[Any] = None  # Type Any to avoid circular import if needed, or import BackgroundTasks
+    paid_amount_kobo: Optional[int] = None
 ) -> Dict[str, Any]:
     """
     Process a pending checkout and create an order.
     Handles customer creation, stock reservation, and order creation.
+    Confirmation notifications are written to the outbox in the same commit.
     
     Args:
         db: Database session
         pending_checkout: The pending checkout record
         payment_reference: The payment reference from the gateway
         paid_amount_kobo: Optional amount paid in kobo (for verification)
-        background_tasks: FastAPI BackgroundTasks object
         
     Returns:
         Dict with status and result details
@@ -70,17 +140,7 @@ def create_order_from_checkout(
         ).first()
         
         if not customer:
-            name_parts = checkout_data["customer_name"].split(' ', 1)
-            first_name = name_parts[0]
-            last_name = name_parts[1] if len(name_parts) > 1 else ""
-            
-            customer = models.Customer(
-                email=checkout_data["customer_email"],
-                phone=checkout_data["customer_phone"],
-                first_name=first_name,
-                last_name=last_name,
-                is_active=True
-            )
+            customer = build_customer(checkout_data)
             db.add(customer)
             db.flush()
             
@@ -90,70 +150,18 @@ def create_order_from_checkout(
         try:
             reserved_variants = inventory_service.reserve_stock(db, cart_items)
             
-            # Create order
-            order_number = generate_order_number()
-            new_order = models.Order(
-                order_number=order_number,
-                idempotency_key=checkout_data["idempotency_key"],
-                status="confirmed",
-                payment_status="paid",
-                payment_method=checkout_data["payment_method"],
-                payment_reference=payment_reference,
-                customer_id=customer.id,
-                customer_name=checkout_data["customer_name"],
-                customer_email=checkout_data["customer_email"],
-                customer_phone=checkout_data["customer_phone"],
-                shipping_address=checkout_data["shipping_address"],
-                billing_address=checkout_data.get("billing_address") or checkout_data["shipping_address"],
-                total_amount=total_amount,
-                shipping_cost=Decimal('0.0'),
-                tax_amount=Decimal('0.0'),
-                notes=checkout_data.get("notes")
-            )
-            db.add(new_order)
-            db.flush()
-            
-            # Create order items
-            for item_data in cart_items:
-                order_item = models.OrderItem(
-                    order_id=new_order.id,
-                    variant_id=item_data["variant_id"],
-                    quantity=item_data["quantity"],
-                    unit_price=Decimal(str(item_data["unit_price"])),
-                    total_price=Decimal(str(item_data["total_price"]))
-                )
-                db.add(order_item)
-            
-            # Create Payment record for admin reporting
-            payment_record = models.Payment(
-                order_id=new_order.id,
-                reference=payment_reference,
-                amount=total_amount,
-                status="success",
-                payment_method="paystack",
-                channel="card",  # Default, could be updated from webhook data
-                paid_at=datetime.now()
-            )
-            db.add(payment_record)
+            # Create order, items and payment record
+            new_order = add_order_records(db, checkout_info, customer, payment_reference)
+            order_number = new_order.order_number
             
             # Update pending checkout status
             pending_checkout.status = "completed"
             
+            # Record notifications in the same transaction as the order
+            outbox_service.enqueue_order_notifications(db, new_order)
+            
             # Commit transaction
             db.commit()
-            db.refresh(new_order)
-            
-            # Send confirmation email (Async)
-            try:
-                if background_tasks:
-                    background_tasks.add_task(send_order_confirmation, new_order)
-                    logger.info(f"Queued confirmation email for order {order_number}")
-                else:
-                    # Fallback for scripts/tests without background tasks
-                    logger.warning("No background_tasks provided, sending email synchronously")
-                    send_order_confirmation(new_order)
-            except Exception as e:
-                logger.error(f"Failed to queue confirmation email: {e}")
             
             logger.info(f"Order created successfully: {order_number}")
             return {"status": "success", "order_number": order_number}
@@ -173,3 +181,153 @@ def create_order_from_checkout(
         db.rollback()
         logger.exception("Error creating order")
         raise e
+
+def create_orders_batch(
+    db: Session,
+    payments: Dict[str, Optional[int]],
+    allow_expired: bool = False
+) -> Dict[str, str]:
+    """
+    Create orders for a batch of confirmed payments with set-based queries.
+
+    Pending checkouts, existing orders, customers and stock for the whole
+    batch are resolved with a handful of queries and stock is decremented
+    with a single UPDATE. Each order is inserted in its own savepoint so a
+    concurrent duplicate only skips that reference. The caller commits.
+
+    Args:
+        db: Database session (caller owns the transaction)
+        payments: payment_reference -> paid amount in kobo (None skips the amount check)
+        allow_expired: Also complete checkouts past expires_at or already marked
+            expired (the gateway confirmed the charge, e.g. during reconciliation)
+
+    Returns:
+        payment_reference -> outcome: created, already_processed, not_found,
+        expired, amount_mismatch or insufficient_stock
+    """
+    outcomes: Dict[str, str] = {}
+    references = list(payments)
+    now_utc = datetime.now(timezone.utc)
+    statuses = ["pending", "expired"] if allow_expired else ["pending"]
+
+    # 1. Pending checkouts and existing orders for the whole batch
+    pending_by_ref = {
+        pending.payment_reference: pending
+        for pending in db.query(models.PendingCheckout).filter(
+            models.PendingCheckout.payment_reference.in_(references),
+            models.PendingCheckout.status.in_(statuses)
+        ).with_for_update().all()
+    }
+    existing_refs = {
+        ref for (ref,) in db.query(models.Order.payment_reference).filter(
+            models.Order.payment_reference.in_(references)
+        ).all()
+    }
+
+    to_create = []
+    for reference, paid_kobo in payments.items():
+        pending = pending_by_ref.get(reference)
+
+        if reference in existing_refs:
+            outcomes[reference] = "already_processed"
+            continue
+        if not pending:
+            logger.warning(f"No pending checkout found for reference: {reference}")
+            outcomes[reference] = "not_found"
+            continue
+        if not allow_expired and pending.expires_at <= now_utc:
+            logger.warning(f"Checkout expired for reference: {reference}")
+            pending.status = "expired"
+            outcomes[reference] = "expired"
+            continue
+
+        expected_kobo = int(Decimal(str(pending.checkout_data["total_amount"])) * constants.PAYSTACK_KOBO_MULTIPLIER)
+        if paid_kobo is not None and paid_kobo != expected_kobo:
+            logger.error(
+                f"SECURITY ALERT: Payment amount mismatch for {reference}! "
+                f"Expected {expected_kobo} kobo, paid {paid_kobo} kobo"
+            )
+            pending.status = "failed"
+            outcomes[reference] = "amount_mismatch"
+            continue
+
+        to_create.append((reference, pending))
+
+    if not to_create:
+        return outcomes
+
+    # 2. Customers: one lookup for every email in the batch, one flush for new ones
+    emails = {pending.checkout_data["checkout_data"]["customer_email"] for _, pending in to_create}
+    customers = {
+        customer.email: customer
+        for customer in db.query(models.Customer).filter(models.Customer.email.in_(emails)).all()
+    }
+    for _, pending in to_create:
+        checkout_data = pending.checkout_data["checkout_data"]
+        if checkout_data["customer_email"] not in customers:
+            customers[checkout_data["customer_email"]] = build_customer(checkout_data)
+    new_customers = [c for c in customers.values() if c.id is None]
+    if new_customers:
+        db.add_all(new_customers)
+        db.flush()
+
+    # 3. Stock: lock every variant in the batch once (id order avoids deadlocks)
+    variant_ids = sorted({
+        item["variant_id"]
+        for _, pending in to_create
+        for item in pending.checkout_data["cart_items"]
+    })
+    available = {
+        variant_id: stock
+        for variant_id, stock in db.query(
+            models.ProductVariant.id, models.ProductVariant.stock_quantity
+        ).filter(
+            models.ProductVariant.id.in_(variant_ids),
+            models.ProductVariant.is_active
+        ).order_by(models.ProductVariant.id).with_for_update().all()
+    }
+
+    decrements: Dict[int, int] = defaultdict(int)
+    for reference, pending in to_create:
+        needed: Dict[int, int] = defaultdict(int)
+        for item in pending.checkout_data["cart_items"]:
+            needed[item["variant_id"]] += item["quantity"]
+        short = [
+            variant_id for variant_id, quantity in needed.items()
+            if available.get(variant_id, 0) - decrements[variant_id] < quantity
+        ]
+        if short:
+            logger.error(f"Insufficient stock for {reference}: variants {short}")
+            pending.status = "failed"
+            outcomes[reference] = "insufficient_stock"
+            continue
+
+        customer = customers[pending.checkout_data["checkout_data"]["customer_email"]]
+        try:
+            with db.begin_nested():
+                order = add_order_records(db, pending.checkout_data, customer, reference)
+        except IntegrityError:
+            # Created concurrently by the inline path or another worker
+            logger.info(f"Order already exists for reference: {reference}")
+            outcomes[reference] = "already_processed"
+            continue
+
+        for variant_id, quantity in needed.items():
+            decrements[variant_id] += quantity
+        outbox_service.enqueue_order_notifications(db, order)
+        pending.status = "completed"
+        outcomes[reference] = "created"
+
+    # 4. One UPDATE for all stock decrements
+    if decrements:
+        db.query(models.ProductVariant).filter(
+            models.ProductVariant.id.in_(list(decrements))
+        ).update(
+            {
+                "stock_quantity": models.ProductVariant.stock_quantity -
+                case(dict(decrements), value=models.ProductVariant.id)
+            },
+            synchronize_session=False
+        )
+        low_stock_service.record_crossings(db, decrements)
+    return outcomes
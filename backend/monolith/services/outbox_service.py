@@ -0,0 +1,193 @@
+"""
+Transactional outbox for post-order side effects (and low-stock alerts).
+
+Producers call `enqueue_*` inside the same transaction that creates the
+order, so a notification is recorded if and only if the order commits. The
+worker claims due rows with FOR UPDATE SKIP LOCKED (several workers can run
+side by side), performs the side effect, and marks each row sent or
+schedules a retry with exponential backoff. Rows that exhaust their
+attempts are parked as "failed" for inspection.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+
+import models
+from config import settings
+from database import SessionLocal
+from services import low_stock_service
+from utils import constants
+from utils.notifications import send_order_confirmation_email, send_owner_order_alert
+
+logger = logging.getLogger(__name__)
+
+ORDER_CONFIRMATION_EMAIL = "order_confirmation_email"
+OWNER_ORDER_ALERT = "owner_order_alert"
+
+
+def enqueue(db: Session, event_type: str, payload: Dict[str, Any]) -> models.OutboxEvent:
+    """Add an outbox row to the caller's transaction (no commit)"""
+    event = models.OutboxEvent(event_type=event_type, payload=payload, status="pending", attempts=0)
+    db.add(event)
+    return event
+
+
+def enqueue_order_notifications(db: Session, order: models.Order) -> None:
+    """Record the customer email and owner WhatsApp for a newly paid order"""
+    enqueue(db, ORDER_CONFIRMATION_EMAIL, {"order_id": order.id})
+    if settings.OWNER_PHONE_NUMBER:
+        enqueue(db, OWNER_ORDER_ALERT, {"order_id": order.id})
+
+
+def _load_orders(db: Session, events: List[models.OutboxEvent]) -> Dict[int, models.Order]:
+    order_ids = {event.payload.get("order_id") for event in events}
+    orders = db.query(models.Order).options(
+        selectinload(models.Order.items).selectinload(models.OrderItem.variant).selectinload(models.ProductVariant.product)
+    ).filter(models.Order.id.in_(order_ids)).all()
+    return {order.id: order for order in orders}
+
+
+def _order_sender(send: Callable[[models.Order], bool]) -> Callable:
+    """Adapt a per-order notification function to a batch handler"""
+    def handler(db: Session, events: List[models.OutboxEvent]) -> Dict[int, bool]:
+        orders = _load_orders(db, events)
+        results = {}
+        for event in events:
+            order = orders.get(event.payload.get("order_id"))
+            if order is None:
+                logger.error(f"Outbox event {event.id}: order {event.payload.get('order_id')} not found")
+                results[event.id] = False
+                event.last_error = f"Order {event.payload.get('order_id')} not found"
+                continue
+            # One failing send must not fail (and later resend) the rest
+            try:
+                results[event.id] = send(order)
+            except Exception as e:
+                logger.exception(f"Outbox event {event.id}: send failed")
+                results[event.id] = False
+                event.last_error = str(e)
+        return results
+    return handler
+
+
+# event_type -> handler(db, events) returning {event_id: delivered}; a
+# handler may explain a failed event by setting its last_error
+HANDLERS: Dict[str, Callable[[Session, List[models.OutboxEvent]], Dict[int, bool]]] = {
+    ORDER_CONFIRMATION_EMAIL: _order_sender(send_order_confirmation_email),
+    OWNER_ORDER_ALERT: _order_sender(send_owner_order_alert),
+    low_stock_service.LOW_STOCK_ALERT: low_stock_service.send_low_stock_digest,
+}
+
+
+def claim_due_events(db: Session, limit: int) -> List[models.OutboxEvent]:
+    """Lock up to `limit` due rows; rows locked by another worker are skipped"""
+    return db.query(models.OutboxEvent).filter(
+        models.OutboxEvent.status == "pending",
+        models.OutboxEvent.available_at <= func.now()
+    ).order_by(
+        models.OutboxEvent.id
+    ).limit(limit).with_for_update(skip_locked=True).all()
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    seconds = min(constants.OUTBOX_RETRY_MAX_SECONDS, constants.OUTBOX_RETRY_BASE_SECONDS * (2 ** (attempts - 1)))
+    return timedelta(seconds=seconds)
+
+
+def process_batch(db: Session, events: List[models.OutboxEvent]) -> Dict[str, int]:
+    """Deliver a claimed batch, grouped by event type, and record outcomes"""
+    summary = {"sent": 0, "retry": 0, "failed": 0}
+    now = datetime.now(timezone.utc)
+
+    by_type: Dict[str, List[models.OutboxEvent]] = {}
+    for event in events:
+        by_type.setdefault(event.event_type, []).append(event)
+
+    for event_type, group in by_type.items():
+        handler = HANDLERS.get(event_type)
+        errors: Dict[int, str] = {}
+        for event in group:
+            event.last_error = None
+        if handler is None:
+            results = {event.id: False for event in group}
+            errors = {event.id: f"No handler for {event_type}" for event in group}
+        else:
+            try:
+                results = handler(db, group)
+            except Exception as e:
+                logger.exception(f"Outbox handler {event_type} failed")
+                results = {event.id: False for event in group}
+                errors = {event.id: str(e) for event in group}
+
+        for event in group:
+            event.attempts += 1
+            if results.get(event.id):
+                event.status = "sent"
+                event.processed_at = now
+                event.last_error = None
+                summary["sent"] += 1
+            elif event.attempts >= constants.OUTBOX_MAX_ATTEMPTS:
+                event.status = "failed"
+                event.processed_at = now
+                event.last_error = errors.get(event.id) or event.last_error or "Delivery failed"
+                summary["failed"] += 1
+                logger.error(f"Outbox event {event.id} ({event_type}) failed permanently after {event.attempts} attempts")
+            else:
+                event.available_at = now + _retry_delay(event.attempts)
+                event.last_error = errors.get(event.id) or event.last_error or "Delivery failed"
+                summary["retry"] += 1
+
+    db.commit()
+    return summary
+
+
+def get_queue_depth(db: Session) -> Dict[str, Any]:
+    """Pending/failed counts and the age of the oldest pending row"""
+    pending, failed, oldest = db.query(
+        func.count(models.OutboxEvent.id).filter(models.OutboxEvent.status == "pending"),
+        func.count(models.OutboxEvent.id).filter(models.OutboxEvent.status == "failed"),
+        func.min(models.OutboxEvent.created_at).filter(models.OutboxEvent.status == "pending")
+    ).one()
+    oldest_age = (datetime.now(timezone.utc) - oldest).total_seconds() if oldest else 0
+    return {
+        "pending": pending,
+        "failed": failed,
+        "oldest_pending_seconds": round(oldest_age, 1)
+    }
+
+
+def drain_once(batch_size: int = constants.OUTBOX_BATCH_SIZE) -> Dict[str, int]:
+    """Claim and deliver one batch in its own session"""
+    db = SessionLocal()
+    try:
+        events = claim_due_events(db, batch_size)
+        if not events:
+            db.rollback()
+            return {}
+        summary = process_batch(db, events)
+        logger.info(f"Outbox batch of {len(events)}: {summary}")
+        return summary
+    except Exception:
+        db.rollback()
+        logger.exception("Error processing outbox batch")
+        return {"error": 1}
+    finally:
+        db.close()
+
+
+async def run_outbox_worker(stop: asyncio.Event) -> None:
+    """Deliver outbox rows until `stop` is set"""
+    logger.info("Outbox worker started")
+    while not stop.is_set():
+        summary = await asyncio.to_thread(drain_once)
+        if summary and "error" not in summary:
+            continue
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=constants.OUTBOX_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+    logger.info("Outbox worker stopped")
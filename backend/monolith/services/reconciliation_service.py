@@ -0,0 +1,174 @@
+"""
+Payment reconciliation for checkouts whose webhook never arrived.
+
+Pages through stale pending (or already expired) checkouts with keyset
+pagination, verifies each reference with Paystack concurrently over the
+pooled async client (bounded by a semaphore), creates orders for confirmed
+payments in one batch per page via order_service.create_orders_batch, and
+records the outcome in reconciliation_runs.
+"""
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+from services import order_service
+from utils import constants
+from utils.payment import AsyncPaystackClient, PaystackAPIError, async_paystack_client
+
+logger = logging.getLogger(__name__)
+
+# Keep the per-run details column bounded
+MAX_DETAILS = 500
+
+# Paystack answers 400 "Transaction reference not found" (404 on some
+# endpoints) for a reference it has never seen: definitive, not worth retrying
+NOT_FOUND_STATUS_CODES = {400, 404}
+
+
+def fetch_stale_page(db: Session, after_id: int, stale_before: datetime, created_after: datetime,
+                     limit: int) -> List[Tuple[int, str, datetime]]:
+    """Next page of (id, payment_reference, expires_at) for unresolved checkouts, by id"""
+    return db.query(
+        models.PendingCheckout.id,
+        models.PendingCheckout.payment_reference,
+        models.PendingCheckout.expires_at
+    ).filter(
+        models.PendingCheckout.status.in_(["pending", "expired"]),
+        models.PendingCheckout.created_at < stale_before,
+        models.PendingCheckout.created_at >= created_after,
+        models.PendingCheckout.id > after_id
+    ).order_by(models.PendingCheckout.id).limit(limit).all()
+
+
+async def verify_references(client: AsyncPaystackClient, references: List[str],
+                            concurrency: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Verify references concurrently, at most `concurrency` in flight.
+
+    Returns reference -> {"status": success|failed|abandoned|...|not_found|error, "amount", "currency"}
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def verify(reference: str) -> Tuple[str, Dict[str, Any]]:
+        async with semaphore:
+            try:
+                response = await client.verify_payment(reference)
+            except PaystackAPIError as e:
+                status = "not_found" if e.status_code in NOT_FOUND_STATUS_CODES else "error"
+                return reference, {"status": status, "error": str(e)}
+            except ValueError as e:
+                return reference, {"status": "error", "error": str(e)}
+        data = response.get("data") or {}
+        return reference, {
+            "status": data.get("status", "unknown"),
+            "amount": data.get("amount"),
+            "currency": (data.get("currency") or "").upper()
+        }
+
+    results = await asyncio.gather(*[verify(reference) for reference in references])
+    return dict(results)
+
+
+def apply_page(db: Session, page: List[Tuple[int, str, datetime]],
+               verified: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+    """Create orders for confirmed payments and close dead checkouts; commits once"""
+    now_utc = datetime.now(timezone.utc)
+    outcomes: Dict[str, str] = {}
+    confirmed: Dict[str, Optional[int]] = {}
+    closed_refs = []
+
+    for _, reference, expires_at in page:
+        result = verified.get(reference, {"status": "error"})
+        status = result["status"]
+        if status == "success" and result["currency"] == "NGN":
+            confirmed[reference] = result["amount"]
+        elif status in ("failed", "reversed"):
+            closed_refs.append((reference, "failed"))
+        elif status in ("abandoned", "not_found") and expires_at <= now_utc:
+            # not_found: checkout initialization never reached Paystack, nothing to pay
+            closed_refs.append((reference, "abandoned"))
+        elif status == "error":
+            outcomes[reference] = "error"
+        else:
+            # Still payable (abandoned/not_found/ongoing before expiry): look again next run
+            outcomes[reference] = "unresolved"
+
+    if confirmed:
+        outcomes.update(order_service.create_orders_batch(db, confirmed, allow_expired=True))
+
+    for reference, new_status in closed_refs:
+        db.query(models.PendingCheckout).filter(
+            models.PendingCheckout.payment_reference == reference,
+            models.PendingCheckout.status.in_(["pending", "expired"])
+        ).update({"status": new_status}, synchronize_session=False)
+        outcomes[reference] = f"closed_{new_status}"
+
+    db.commit()
+    return outcomes
+
+
+async def reconcile(
+    client: Optional[AsyncPaystackClient] = None,
+    stale_minutes: int = constants.RECONCILE_STALE_MINUTES,
+    lookback_hours: int = constants.RECONCILE_LOOKBACK_HOURS,
+    page_size: int = constants.RECONCILE_PAGE_SIZE,
+    concurrency: int = constants.RECONCILE_CONCURRENCY
+) -> Dict[str, Any]:
+    """Run one reconciliation pass and record it in reconciliation_runs"""
+    client = client or async_paystack_client
+    now = datetime.now(timezone.utc)
+    stale_before = now - timedelta(minutes=stale_minutes)
+    created_after = now - timedelta(hours=lookback_hours)
+
+    db = SessionLocal()
+    run = models.ReconciliationRun(status="running")
+    db.add(run)
+    db.commit()
+    run_id = run.id
+
+    totals: Counter = Counter()
+    details: Dict[str, str] = {}
+    after_id = 0
+    try:
+        while True:
+            page = await asyncio.to_thread(fetch_stale_page, db, after_id, stale_before, created_after, page_size)
+            if not page:
+                break
+            after_id = page[-1][0]
+
+            verified = await verify_references(client, [reference for _, reference, _ in page], concurrency)
+            outcomes = await asyncio.to_thread(apply_page, db, page, verified)
+
+            totals["checked"] += len(page)
+            totals["confirmed"] += sum(1 for r in verified.values() if r["status"] == "success")
+            for reference, outcome in outcomes.items():
+                totals[outcome] += 1
+                if outcome not in ("unresolved", "already_processed") and len(details) < MAX_DETAILS:
+                    details[reference] = outcome
+
+        run.status = "completed"
+    except Exception:
+        db.rollback()
+        run.status = "failed"
+        logger.exception(f"Reconciliation run {run_id} failed")
+        raise
+    finally:
+        run.checked = totals["checked"]
+        run.confirmed = totals["confirmed"]
+        run.orders_created = totals["created"]
+        run.closed = totals["closed_failed"] + totals["closed_abandoned"]
+        run.errors = totals["error"]
+        run.details = details
+        run.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        db.close()
+
+    summary = dict(totals)
+    logger.info(f"Reconciliation run {run_id} complete: {summary}")
+    return summary
@@ -0,0 +1,210 @@
+"""
+Incremental maintenance of the daily_sales rollup.
+
+Analytics endpoints read daily_sales instead of re-aggregating orders and
+orderitems. An order counts while its payment_status is "paid", so:
+
+- add_order_records adds new paid orders (record_orders with sign=1)
+- payment_status_changed adds or subtracts an order whenever it moves
+  into or out of "paid" (refunds, verification, manual admin edits)
+- product_recategorised moves a product's rows to its new category, so
+  later reversals (which use the current category) land on the same rows
+- rebuild() recomputes a date range from the raw tables; used by the
+  backfill command and the nightly self-healing job
+
+All writes are upserts that add deltas, inside the caller's transaction,
+so the rollup commits or rolls back together with the order change. Each
+write also marks the session so the analytics orders version is bumped
+when it commits (services/analytics_cache_service.py).
+
+Every paid order of a day adds to the same whole-order totals row, so
+holding its lock for the rest of the transaction (a whole
+create_orders_batch, say) would queue every checkout behind it. Those
+deltas are therefore collected on the session, netted per order, and
+written in one statement just before the transaction commits.
+Sales are attributed to the order's creation date, matching the filters
+the endpoints used before, and to the product's current category.
+"""
+import logging
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import bindparam, event, text
+from sqlalchemy.orm import Session, SessionTransaction
+
+from database import SessionLocal
+from services import admin_events_service, analytics_cache_service, customer_metrics_service
+from utils import constants
+
+logger = logging.getLogger(__name__)
+
+ORDER_TOTALS_PRODUCT_ID = 0  # daily_sales rows holding whole-order totals
+
+# session.info key: [(sign, order_ids, savepoint or None)] awaiting commit
+_PENDING_ORDER_TOTALS = "sales_rollup_pending_order_totals"
+
+_UPSERT = """
+    ON CONFLICT (sales_date, product_id, category) DO UPDATE SET
+        revenue = daily_sales.revenue + excluded.revenue,
+        units = daily_sales.units + excluded.units,
+        order_count = daily_sales.order_count + excluded.order_count,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# {where} selects the orders to aggregate (alias o)
+_PRODUCT_ROWS = """
+    INSERT INTO daily_sales (sales_date, product_id, category, revenue, units, order_count, updated_at)
+    SELECT date(o.created_at), p.id, COALESCE(p.category, ''),
+           :sign * SUM(oi.total_price), :sign * SUM(oi.quantity), :sign * COUNT(DISTINCT o.id),
+           CURRENT_TIMESTAMP
+    FROM orders o
+    JOIN orderitems oi ON oi.order_id = o.id
+    JOIN productvariants v ON v.id = oi.variant_id
+    JOIN products p ON p.id = v.product_id
+    WHERE {where}
+    GROUP BY date(o.created_at), p.id, COALESCE(p.category, '')
+"""
+
+_ORDER_ROWS = """
+    INSERT INTO daily_sales (sales_date, product_id, category, revenue, units, order_count, updated_at)
+    SELECT date(o.created_at), {order_totals_id}, '',
+           :sign * SUM(o.total_amount),
+           :sign * COALESCE(SUM((SELECT SUM(oi.quantity) FROM orderitems oi WHERE oi.order_id = o.id)), 0),
+           :sign * COUNT(*),
+           CURRENT_TIMESTAMP
+    FROM orders o
+    WHERE {where}
+    GROUP BY date(o.created_at)
+"""
+
+
+# Merge a product's rows from any other category into :category
+_MOVE_PRODUCT_ROWS = """
+    INSERT INTO daily_sales (sales_date, product_id, category, revenue, units, order_count, updated_at)
+    SELECT sales_date, product_id, :category, SUM(revenue), SUM(units), SUM(order_count), CURRENT_TIMESTAMP
+    FROM daily_sales
+    WHERE product_id = :product_id AND category <> :category
+    GROUP BY sales_date, product_id
+"""
+
+
+def _apply(db: Session, templates: Iterable[str], where: str, sign: int, **params) -> None:
+    for template in templates:
+        statement = text(
+            template.format(where=where, order_totals_id=ORDER_TOTALS_PRODUCT_ID) + _UPSERT
+        )
+        if "order_ids" in params:
+            statement = statement.bindparams(bindparam("order_ids", expanding=True))
+        db.execute(statement, {"sign": sign, **params})
+    analytics_cache_service.mark_orders_changed(db)
+
+
+def record_orders(db: Session, order_ids: Iterable[int], sign: int = 1) -> None:
+    """
+    Add (sign=1) or subtract (sign=-1) orders' sales, and refresh their
+    customers' metrics. The orders and their items must be flushed; the
+    caller owns the transaction.
+    """
+    order_ids = list(order_ids)
+    if order_ids:
+        _apply(db, (_PRODUCT_ROWS,), "o.id IN :order_ids", sign, order_ids=order_ids)
+        db.info.setdefault(_PENDING_ORDER_TOTALS, []).append((sign, order_ids, db.get_nested_transaction()))
+        customer_metrics_service.refresh_for_orders(db, order_ids)
+
+
+@event.listens_for(Session, "before_commit")
+def _apply_order_totals(session: Session) -> None:
+    # Savepoint releases fire this too; only the real commit writes
+    if session.in_nested_transaction():
+        return
+    net = Counter()
+    for sign, order_ids, _ in session.info.pop(_PENDING_ORDER_TOTALS, []):
+        for order_id in order_ids:
+            net[order_id] += sign
+    by_sign: Dict[int, list] = {}
+    for order_id, sign in net.items():
+        if sign:
+            by_sign.setdefault(sign, []).append(order_id)
+    # Orders whose savepoint rolled back no longer exist and add nothing
+    for sign, order_ids in by_sign.items():
+        _apply(session, (_ORDER_ROWS,), "o.id IN :order_ids", sign, order_ids=sorted(order_ids))
+
+
+def _inside(transaction: Optional[SessionTransaction], ancestor: SessionTransaction) -> bool:
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_order_totals(session: Session, previous_transaction: SessionTransaction) -> None:
+    if not previous_transaction.nested:
+        session.info.pop(_PENDING_ORDER_TOTALS, None)
+    elif _PENDING_ORDER_TOTALS in session.info:
+        session.info[_PENDING_ORDER_TOTALS] = [
+            entry for entry in session.info[_PENDING_ORDER_TOTALS]
+            if not _inside(entry[2], previous_transaction)
+        ]
+
+
+def product_recategorised(db: Session, product_id: int, category: Optional[str]) -> None:
+    """
+    Move a product's sales to its new category (call when it changes). The
+    caller owns the transaction.
+    """
+    params = {"product_id": product_id, "category": category or ""}
+    db.execute(text(_MOVE_PRODUCT_ROWS + _UPSERT), params)
+    db.execute(text(
+        "DELETE FROM daily_sales WHERE product_id = :product_id AND category <> :category"
+    ), params)
+    analytics_cache_service.mark_orders_changed(db)
+
+
+def payment_status_changed(db: Session, order_id: int, old_status: Optional[str], new_status: Optional[str]) -> None:
+    """
+    Keep the rollup in step when an existing order's payment_status is
+    changed, and tell connected admins. Every transition bumps the orders
+    version, not only those into or out of "paid": cached order counts are
+    filtered by payment_status too.
+    """
+    if old_status == new_status:
+        return
+    analytics_cache_service.mark_orders_changed(db)
+    admin_events_service.publish(db, admin_events_service.PAYMENT_STATUS_CHANGED, {
+        "order_id": order_id, "old_status": old_status, "new_status": new_status
+    })
+    if old_status == constants.PAYMENT_STATUS_PAID:
+        record_orders(db, [order_id], sign=-1)
+    elif new_status == constants.PAYMENT_STATUS_PAID:
+        db.flush()
+        record_orders(db, [order_id], sign=1)
+
+
+def rebuild(db: Session, since: Optional[date] = None, commit: bool = True) -> Dict[str, int]:
+    """
+    Recompute daily_sales from orders for dates >= `since` (everything when
+    None). Safe to rerun.
+    """
+    date_filter = "" if since is None else "WHERE sales_date >= :since"
+    deleted = db.execute(text(f"DELETE FROM daily_sales {date_filter}"), {"since": since}).rowcount
+    where = "o.payment_status = :paid" + ("" if since is None else " AND date(o.created_at) >= :since")
+    _apply(db, (_PRODUCT_ROWS, _ORDER_ROWS), where, 1, paid=constants.PAYMENT_STATUS_PAID, since=since)
+    rows = db.execute(
+        text(f"SELECT COUNT(*) FROM daily_sales {date_filter}"), {"since": since}
+    ).scalar()
+    if commit:
+        db.commit()
+    logger.info(f"Rebuilt daily_sales since {since or 'the beginning'}: {deleted} rows replaced by {rows}")
+    return {"deleted": deleted, "rows": rows}
+
+
+def rebuild_recent() -> Dict[str, int]:
+    """Scheduled job: recompute the last few days to repair any drift"""
+    db = SessionLocal()
+    try:
+        return rebuild(db, since=date.today() - timedelta(days=constants.DAILY_SALES_REBUILD_DAYS))
+    finally:
+        db.close()
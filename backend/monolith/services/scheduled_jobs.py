@@ -0,0 +1,98 @@
+"""
+Recurring maintenance jobs run by the in-process scheduler.
+
+Every API machine builds the same scheduler; leader election in
+utils/scheduler.py makes sure each slot runs once across the fleet. The
+scripts in jobs/ remain for one-off and manual runs.
+"""
+import logging
+from typing import Any, Dict
+
+from config import settings
+from database import engine
+from services import (
+    catalog_cache_service,
+    checkout_service,
+    customer_metrics_service,
+    reconciliation_service,
+    sales_rollup_service,
+    webhook_retention_service,
+)
+from utils import constants
+from utils.scheduler import Scheduler
+
+logger = logging.getLogger(__name__)
+
+
+def backup_database() -> Dict[str, Any]:
+    """Streamed full pg_dump to BACKUP_DIR, verified, then backup retention"""
+    import backup_database as backup
+
+    manifest = backup.create_backup()
+    if manifest is None:
+        raise RuntimeError("Database backup failed; see logs for pg_dump output")
+    if not backup.verify_backup(manifest["name"]):
+        raise RuntimeError(f"Backup {manifest['name']} failed verification")
+    backup.cleanup_old_backups()
+    return {"name": manifest["name"], "files": manifest["files"]}
+
+
+def backup_database_incremental() -> Dict[str, Any]:
+    """New rows of append-only tables since the last incremental export"""
+    import backup_database as backup
+
+    manifest = backup.create_incremental_backup()
+    if manifest is None:
+        raise RuntimeError("Incremental backup failed; see logs")
+    return {"name": manifest["name"], "tables": manifest["tables"]}
+
+
+def build_scheduler() -> Scheduler:
+    scheduler = Scheduler(engine)
+    jitter = constants.SCHEDULER_JITTER_SECONDS
+
+    if settings.CHECKOUT_CLEANUP_ENABLED:
+        scheduler.register(
+            "cleanup_expired_checkouts", constants.SCHEDULE_CHECKOUT_CLEANUP,
+            checkout_service.run_cleanup_once, jitter,
+            "Expire overdue pending checkouts"
+        )
+    if settings.PAYSTACK_SECRET_KEY:
+        scheduler.register(
+            "reconcile_payments", constants.SCHEDULE_RECONCILE_PAYMENTS,
+            reconciliation_service.reconcile, jitter,
+            "Verify stale checkouts with Paystack and create missed orders"
+        )
+    if engine.dialect.name == "postgresql":
+        scheduler.register(
+            "webhook_retention", constants.SCHEDULE_WEBHOOK_RETENTION,
+            webhook_retention_service.run_retention, jitter,
+            "Create upcoming webhook_events partitions and drop expired ones"
+        )
+    if settings.BACKUP_ENABLED:
+        scheduler.register(
+            "database_backup", constants.SCHEDULE_DATABASE_BACKUP,
+            backup_database, jitter,
+            "pg_dump the database and remove backups past retention"
+        )
+        scheduler.register(
+            "database_backup_incremental", constants.SCHEDULE_INCREMENTAL_BACKUP,
+            backup_database_incremental, jitter,
+            "Export new orders, order items and webhook events since the last run"
+        )
+    scheduler.register(
+        "warm_catalog_cache", constants.SCHEDULE_CACHE_WARMING,
+        catalog_cache_service.warm_catalog_cache, jitter,
+        "Refresh cached storefront categories before they expire"
+    )
+    scheduler.register(
+        "rebuild_daily_sales", constants.SCHEDULE_DAILY_SALES_REBUILD,
+        sales_rollup_service.rebuild_recent, jitter,
+        "Recompute the last few days of the daily_sales rollup from orders"
+    )
+    scheduler.register(
+        "rebuild_customer_metrics", constants.SCHEDULE_CUSTOMER_METRICS_REBUILD,
+        customer_metrics_service.rebuild_all, jitter,
+        "Recompute per-customer order metrics from orders"
+    )
+    return scheduler
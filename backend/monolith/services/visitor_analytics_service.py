@@ -0,0 +1,140 @@
+"""
+Storefront traffic: unique visitors, page views and product views.
+
+Recorded in Redis under one set of keys per UTC day, each of a fixed size
+however busy the day is:
+- analytics:visitors:{day}: HyperLogLog of visitor ids (PFADD). At most
+  12 KB, with about 0.81% standard error.
+- analytics:pageviews:{day}: a plain counter.
+- analytics:product_views:{day}: count-min sketch of product views. Its
+  VISITOR_CMS_DEPTH rows of VISITOR_CMS_WIDTH saturating 32-bit counters
+  sit in one string (32 KB). A view increments one counter per row in a
+  single BITFIELD call; a product's estimate is the smallest of its
+  counters. Estimates never undercount; they overcount only where products
+  share counters.
+
+Ranges are answered from the day keys. PFCOUNT over several keys counts
+their union, so someone visiting on three days counts once; sketch
+estimates are summed per day. Keys expire after
+VISITOR_ANALYTICS_RETENTION_DAYS. Without Redis nothing is recorded and
+the readers return None.
+"""
+import hashlib
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+import redis
+
+from utils import constants
+from utils.cache import async_redis_client, redis_client
+
+logger = logging.getLogger(__name__)
+
+PAGE_VIEW = "page_view"
+PRODUCT_VIEW = "product_view"
+
+
+def _visitors_key(day: date) -> str:
+    return f"analytics:visitors:{day.isoformat()}"
+
+
+def _pageviews_key(day: date) -> str:
+    return f"analytics:pageviews:{day.isoformat()}"
+
+
+def _product_views_key(day: date) -> str:
+    return f"analytics:product_views:{day.isoformat()}"
+
+
+def _days(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=n) for n in range((end - start).days + 1)]
+
+
+def sketch_positions(product_id: int) -> List[int]:
+    """Counter index of `product_id` in each sketch row"""
+    digest = hashlib.blake2b(str(product_id).encode(), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "big")
+    h2 = int.from_bytes(digest[8:], "big") | 1
+    width = constants.VISITOR_CMS_WIDTH
+    return [row * width + (h1 + row * h2) % width for row in range(constants.VISITOR_CMS_DEPTH)]
+
+
+async def record(visitor_id: str, events: Iterable[Dict]) -> bool:
+    """Add a batch of storefront events for one visitor; False if not recorded"""
+    if async_redis_client is None:
+        return False
+    today = datetime.now(timezone.utc).date()
+    keys = {_visitors_key(today)}
+    pipe = async_redis_client.pipeline(transaction=False)
+    pipe.pfadd(_visitors_key(today), visitor_id)
+    for event in events:
+        if event["type"] == PAGE_VIEW:
+            pipe.incr(_pageviews_key(today))
+            keys.add(_pageviews_key(today))
+        elif event["type"] == PRODUCT_VIEW:
+            increments = []
+            for position in sketch_positions(event["product_id"]):
+                increments += ["INCRBY", "u32", f"#{position}", 1]
+            pipe.execute_command("BITFIELD", _product_views_key(today), "OVERFLOW", "SAT", *increments)
+            keys.add(_product_views_key(today))
+    ttl = constants.VISITOR_ANALYTICS_RETENTION_DAYS * 86400
+    for key in keys:
+        pipe.expire(key, ttl)
+    try:
+        await pipe.execute()
+        return True
+    except redis.RedisError as e:
+        logger.warning(f"Visitor analytics not recorded: {e}")
+        return False
+
+
+def unique_visitors(start: date, end: date) -> Optional[int]:
+    """Distinct visitors from `start` to `end` (UTC days, inclusive)"""
+    if redis_client is None:
+        return None
+    try:
+        return redis_client.pfcount(*[_visitors_key(day) for day in _days(start, end)])
+    except redis.RedisError as e:
+        logger.warning(f"Visitor analytics unavailable: {e}")
+        return None
+
+
+def page_views(start: date, end: date) -> Optional[int]:
+    if redis_client is None:
+        return None
+    try:
+        values = redis_client.mget([_pageviews_key(day) for day in _days(start, end)])
+    except redis.RedisError as e:
+        logger.warning(f"Visitor analytics unavailable: {e}")
+        return None
+    return sum(int(value) for value in values if value)
+
+
+def product_views(product_ids: List[int], start: date, end: date) -> Optional[Dict[int, int]]:
+    """Estimated views per product from `start` to `end` (UTC days, inclusive)"""
+    if redis_client is None:
+        return None
+    if not product_ids:
+        return {}
+    positions = {product_id: sketch_positions(product_id) for product_id in product_ids}
+    reads = []
+    for product_id in product_ids:
+        for position in positions[product_id]:
+            reads += ["GET", "u32", f"#{position}"]
+
+    pipe = redis_client.pipeline(transaction=False)
+    for day in _days(start, end):
+        pipe.execute_command("BITFIELD", _product_views_key(day), *reads)  # zeros for days without a key
+    try:
+        results = pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Visitor analytics unavailable: {e}")
+        return None
+
+    depth = constants.VISITOR_CMS_DEPTH
+    views = dict.fromkeys(product_ids, 0)
+    for counters in results:
+        for n, product_id in enumerate(product_ids):
+            views[product_id] += min(counters[n * depth:(n + 1) * depth])
+    return views
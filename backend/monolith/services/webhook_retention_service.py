@@ -0,0 +1,177 @@
+"""
+Partition maintenance and retention for webhook_events.
+
+webhook_events is range-partitioned by month on created_at. This service
+keeps partitions created ahead of time (so inserts never fall into the
+default partition) and drops whole partitions once they are older than the
+retention window, which is a metadata operation instead of a row-by-row
+DELETE. webhook_event_keys only needs to cover Paystack's retry window and
+is pruned in small batches.
+
+If maintenance falls behind, a month's rows land in the default partition,
+and PostgreSQL then refuses to create that month's partition. Such a month
+is built as a standalone table, its rows are moved out of the default
+partition, and the table is attached. Each month is its own transaction, so
+one failing month is reported without holding back the others.
+"""
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from utils import constants
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "webhook_events"
+PARTITION_PATTERN = re.compile(r"^webhook_events_p(\d{4})_(\d{2})$")
+
+
+def month_start(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(start: datetime, months: int) -> datetime:
+    index = start.year * 12 + start.month - 1 + months
+    return start.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(start: datetime) -> str:
+    return f"{PARENT_TABLE}_p{start:%Y_%m}"
+
+
+def list_partitions(db: Session) -> List[str]:
+    """Names of the monthly partitions currently attached to webhook_events"""
+    rows = db.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :parent
+    """), {"parent": PARENT_TABLE}).scalars().all()
+    return sorted(name for name in rows if PARTITION_PATTERN.match(name))
+
+
+def default_partition(db: Session) -> Optional[str]:
+    return db.execute(text("""
+        SELECT partdefid::regclass::text FROM pg_partitioned_table
+        WHERE partrelid = CAST(:parent AS regclass) AND partdefid <> 0
+    """), {"parent": PARENT_TABLE}).scalar()
+
+
+def _create_partition(db: Session, lower: datetime) -> int:
+    """Create the partition for the month starting at `lower`; returns rows moved into it"""
+    name = partition_name(lower)
+    bounds = f"FROM ('{lower.isoformat()}') TO ('{add_months(lower, 1).isoformat()}')"
+    in_range = "created_at >= :lower AND created_at < :upper"
+    params = {"lower": lower, "upper": add_months(lower, 1)}
+
+    default = default_partition(db)
+    stray = default and db.execute(text(f"SELECT 1 FROM {default} WHERE {in_range} LIMIT 1"), params).first()
+    if not stray:
+        db.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} FOR VALUES {bounds}"))
+        return 0
+
+    columns = ", ".join(db.execute(text("""
+        SELECT quote_ident(attname) FROM pg_attribute
+        WHERE attrelid = CAST(:parent AS regclass) AND attnum > 0 AND NOT attisdropped
+        ORDER BY attnum
+    """), {"parent": PARENT_TABLE}).scalars())
+    db.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = db.execute(text(f"""
+        WITH moved AS (DELETE FROM {default} WHERE {in_range} RETURNING {columns})
+        INSERT INTO {name} ({columns}) SELECT {columns} FROM moved
+    """), params).rowcount
+    db.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+    return moved
+
+
+def ensure_partitions(db: Session, months_ahead: int = constants.WEBHOOK_PARTITION_MONTHS_AHEAD) -> List[str]:
+    """
+    Create this month's partition and the next `months_ahead` if missing.
+    Raises RuntimeError after trying every month if any could not be created.
+    """
+    existing = set(list_partitions(db))
+    created, failed = [], []
+    start = month_start(datetime.now(timezone.utc))
+    for offset in range(months_ahead + 1):
+        lower = add_months(start, offset)
+        name = partition_name(lower)
+        if name in existing:
+            continue
+        try:
+            moved = _create_partition(db, lower)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception(f"Could not create webhook_events partition {name}")
+            failed.append(name)
+            continue
+        created.append(name)
+        if moved:
+            logger.warning(f"Moved {moved} webhook_events rows from the default partition into {name}")
+    if created:
+        logger.info(f"Created webhook_events partitions: {created}")
+    if failed:
+        raise RuntimeError(f"Could not create webhook_events partitions: {failed}")
+    return created
+
+
+def drop_expired_partitions(db: Session, retention_months: int = constants.WEBHOOK_RETENTION_MONTHS) -> List[str]:
+    """Drop monthly partitions whose whole range is older than the retention window"""
+    cutoff = add_months(month_start(datetime.now(timezone.utc)), -retention_months)
+    dropped = []
+    for name in list_partitions(db):
+        year, month = PARTITION_PATTERN.match(name).groups()
+        upper = add_months(datetime(int(year), int(month), 1, tzinfo=timezone.utc), 1)
+        if upper <= cutoff:
+            db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+    db.commit()
+    if dropped:
+        logger.info(f"Dropped expired webhook_events partitions: {dropped}")
+    return dropped
+
+
+def prune_event_keys(db: Session, retention_days: int = constants.WEBHOOK_KEY_RETENTION_DAYS,
+                     batch_size: int = constants.WEBHOOK_KEY_PRUNE_BATCH) -> int:
+    """Delete dedupe keys older than the replay window, one short transaction per batch"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    total = 0
+    while True:
+        deleted = db.execute(text("""
+            DELETE FROM webhook_event_keys
+            WHERE event_id IN (
+                SELECT event_id FROM webhook_event_keys
+                WHERE created_at < :cutoff
+                LIMIT :batch_size
+            )
+        """), {"cutoff": cutoff, "batch_size": batch_size}).rowcount
+        db.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+def run_retention() -> Dict[str, object]:
+    """Create upcoming partitions, drop expired ones and prune old keys"""
+    db = SessionLocal()
+    try:
+        # Creation last: it raises after any month that failed, which must
+        # not hold back the rest of the maintenance
+        summary = {
+            "dropped": drop_expired_partitions(db),
+            "keys_pruned": prune_event_keys(db)
+        }
+        summary["created"] = ensure_partitions(db)
+        return summary
+    except Exception:
+        db.rollback()
+        logger.exception("webhook_events retention failed")
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,174 @@
+"""
+Batched processing of queued Paystack webhook events.
+
+In "queue" ingest mode the webhook endpoint only stores the event (status
+"queued") and acknowledges. This worker drains queued charge.success events
+in micro-batches through order_service.create_orders_batch, which resolves
+pending checkouts, existing orders, customers and stock for the whole batch
+with a handful of set-based queries; the batch is committed once.
+
+If a batch fails as a whole (a malformed payload, a statement timeout), it
+is rolled back and its events are retried one at a time, each in its own
+transaction, so one bad event cannot hold back the paid orders queued
+behind it. An event that fails on its own has its attempts counted and is
+marked "failed" after WEBHOOK_MAX_ATTEMPTS.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+import models
+from config import settings
+from database import SessionLocal
+from services import order_service
+from utils import constants
+
+logger = logging.getLogger(__name__)
+
+# Wakes the in-process worker as soon as the webhook endpoint queues an event
+_new_events: Optional[asyncio.Event] = None
+
+
+def _wake_event() -> asyncio.Event:
+    global _new_events
+    if _new_events is None:
+        _new_events = asyncio.Event()
+    return _new_events
+
+
+def notify_new_events() -> None:
+    """Signal the worker that queued events are waiting (call from the event loop)"""
+    _wake_event().set()
+
+
+def claim_queued_events(db: Session, limit: int) -> List[models.WebhookEvent]:
+    """Lock up to `limit` queued events; concurrent workers skip each other's rows"""
+    return db.query(models.WebhookEvent).filter(
+        models.WebhookEvent.status == "queued"
+    ).order_by(
+        models.WebhookEvent.id
+    ).limit(limit).with_for_update(skip_locked=True).all()
+
+
+def _claim_event(db: Session, key: Tuple[int, datetime]) -> Optional[models.WebhookEvent]:
+    """Lock one still-queued event by primary key (None if settled or taken)"""
+    event_id, created_at = key
+    return db.query(models.WebhookEvent).filter(
+        models.WebhookEvent.id == event_id,
+        models.WebhookEvent.created_at == created_at,
+        models.WebhookEvent.status == "queued"
+    ).with_for_update(skip_locked=True).one_or_none()
+
+
+def process_charge_success_batch(db: Session, events: List[models.WebhookEvent]) -> Dict[str, int]:
+    """
+    Create orders for a batch of charge.success events and commit once.
+
+    Each event ends up "processed" (order created or already existed) or
+    "failed" (expired, not found, amount mismatch, stock, bad payload).
+    """
+    summary = defaultdict(int)
+
+    # Parse payloads, keeping the first event per reference
+    by_reference: Dict[str, models.WebhookEvent] = {}
+    amounts: Dict[str, Any] = {}
+    for event in events:
+        data = event.raw_data.get("data") if isinstance(event.raw_data, dict) else None
+        data = data if isinstance(data, dict) else {}
+        reference = data.get("reference")
+        if not reference or str(data.get("currency") or "").upper() != "NGN":
+            logger.error(f"Rejecting webhook event {event.event_id}: missing reference or non-NGN currency")
+            event.status = "failed"
+            summary["invalid"] += 1
+        elif reference in by_reference:
+            event.status = "processed"
+            summary["already_processed"] += 1
+        else:
+            by_reference[reference] = event
+            amounts[reference] = data.get("amount")
+
+    outcomes = order_service.create_orders_batch(db, amounts) if amounts else {}
+    for reference, outcome in outcomes.items():
+        by_reference[reference].status = "processed" if outcome in ("created", "already_processed") else "failed"
+        summary[outcome] += 1
+
+    db.commit()
+    return dict(summary)
+
+
+def _record_failed_attempt(db: Session, key: Tuple[int, datetime], error: Exception) -> None:
+    event = _claim_event(db, key)
+    if event is None:
+        db.rollback()
+        return
+    event.attempts += 1
+    if event.attempts >= constants.WEBHOOK_MAX_ATTEMPTS:
+        event.status = "failed"
+        logger.error(f"Giving up on webhook event {event.event_id} after {event.attempts} attempts: {error}")
+    else:
+        logger.warning(f"Webhook event {event.event_id} failed (attempt {event.attempts}): {error}")
+    db.commit()
+
+
+def process_events_individually(db: Session, keys: List[Tuple[int, datetime]]) -> Dict[str, int]:
+    """Process events one per transaction, counting an attempt for each that fails"""
+    summary = defaultdict(int)
+    for key in keys:
+        event = _claim_event(db, key)
+        if event is None:
+            db.rollback()
+            continue
+        try:
+            for outcome, count in process_charge_success_batch(db, [event]).items():
+                summary[outcome] += count
+        except Exception as e:
+            db.rollback()
+            summary["error"] += 1
+            _record_failed_attempt(db, key, e)
+    return dict(summary)
+
+
+def drain_once(batch_size: Optional[int] = None) -> Dict[str, int]:
+    """Claim and process one micro-batch in its own session"""
+    db = SessionLocal()
+    try:
+        events = claim_queued_events(db, batch_size or settings.WEBHOOK_BATCH_SIZE)
+        if not events:
+            db.rollback()
+            return {}
+        keys = [(event.id, event.created_at) for event in events]
+        try:
+            summary = process_charge_success_batch(db, events)
+        except Exception:
+            db.rollback()
+            logger.exception(f"Webhook batch of {len(events)} failed; retrying its events one at a time")
+            summary = process_events_individually(db, keys)
+        logger.info(f"Processed webhook batch of {len(events)}: {summary}")
+        return summary
+    except Exception:
+        db.rollback()
+        logger.exception("Error processing webhook batch")
+        return {"error": 1}
+    finally:
+        db.close()
+
+
+async def run_batch_worker(stop: asyncio.Event) -> None:
+    """Drain queued webhook events until `stop` is set"""
+    wake = _wake_event()
+    logger.info("Webhook batch worker started")
+    while not stop.is_set():
+        summary = await asyncio.to_thread(drain_once)
+        if summary and "error" not in summary:
+            # A full batch may mean more is waiting; go again immediately
+            continue
+        wake.clear()
+        try:
+            await asyncio.wait_for(wake.wait(), timeout=constants.WEBHOOK_WORKER_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+    logger.info("Webhook batch worker stopped")
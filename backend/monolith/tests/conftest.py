@@ -0,0 +1,111 @@
+"""
+Shared fixtures.
+
+fake_redis swaps the cache's Redis client for an in-memory stand-in.
+
+sqlite_db(tables) opens a session on a throwaway SQLite file holding only the
+given models' tables, for code that runs on any backend. Seed data in the
+test module.
+
+pg_db is a session on a scratch PostgreSQL database holding the full schema,
+for code that relies on JSONB, SKIP LOCKED or partitioning. Set
+TEST_POSTGRES_URL to a superuser connection URI to run those tests; they are
+skipped otherwise.
+"""
+import os
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+def postgres_url_for(database: str) -> str:
+    base, _, query = TEST_POSTGRES_URL.partition("?")
+    return f"{base.rsplit('/', 1)[0]}/{database}" + (f"?{query}" if query else "")
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    from database import Base
+
+    sessions = []
+
+    def make(tables):
+        engine = create_engine(f"sqlite:///{tmp_path / f'sqlite_{len(sessions)}.db'}")
+        Base.metadata.create_all(engine, tables=[model.__table__ for model in tables])
+        sessions.append(sessionmaker(bind=engine)())
+        return sessions[-1]
+
+    yield make
+    for session in sessions:
+        session.close()
+        session.get_bind().dispose()
+
+
+@pytest.fixture
+def pg_engine():
+    if not TEST_POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL is required")
+    import models  # noqa: F401  (registers every table)
+    from database import Base
+
+    name = f"test_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(TEST_POSTGRES_URL, isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        conn.execute(text(f"CREATE DATABASE {name}"))
+    engine = create_engine(postgres_url_for(name))
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+    with admin.connect() as conn:
+        conn.execute(text(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)"))
+    admin.dispose()
+
+
+@pytest.fixture
+def pg_sessionmaker(pg_engine):
+    return sessionmaker(bind=pg_engine)
+
+
+@pytest.fixture
+def pg_db(pg_sessionmaker):
+    session = pg_sessionmaker()
+    yield session
+    session.close()
+
+
+class DictRedis:
+    """GET / SET NX / SETEX / INCR over a dict"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        return True
+
+    def setex(self, key, expire, value):
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    from services import analytics_cache_service
+    from utils import cache
+
+    client = DictRedis()
+    monkeypatch.setattr(cache, "redis_client", client)
+    monkeypatch.setattr(analytics_cache_service, "redis_client", client)
+    return client
@@ -0,0 +1,161 @@
+"""
+Local Paystack stub server for tests and manual runs.
+
+Run standalone and point the app at it:
+    python tests/paystack_stub.py --port 8099
+    PAYSTACK_BASE_URL=http://127.0.0.1:8099 uvicorn main:app
+
+Behaviour is driven by the payment reference:
+- "flaky-<n>-..."   fails with 503 for the first <n> calls, then succeeds
+- "down-..."        always fails with 500
+- "unknown-..."     fails with 400 "Transaction reference not found" (the
+                    checkout was never initialized with Paystack)
+- "slow-<ms>-..."   sleeps <ms> milliseconds before answering
+- "failed-..."      verifies as a failed charge
+- "abandoned-..."   verifies as an abandoned (never paid) charge
+- anything else     verifies as a successful charge of `amounts[reference]`
+                    kobo (default 10000)
+"""
+import json
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class PaystackStub:
+    """In-process stub of the Paystack REST API"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.calls = defaultdict(int)
+        self.amounts = {}
+        self.peers = set()  # client (host, port) of every verify call
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, payload: dict):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if not self.path.startswith("/transaction/verify/"):
+                    return self._send(404, {"status": False, "message": "Not found"})
+                reference = self.path.rsplit("/", 1)[-1]
+                with stub._lock:
+                    stub.peers.add(self.client_address)
+                self._send(*stub.verify(reference))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if self.path != "/transaction/initialize":
+                    return self._send(404, {"status": False, "message": "Not found"})
+                reference = payload.get("reference", "")
+                with stub._lock:
+                    stub.calls[f"init:{reference}"] += 1
+                    stub.amounts[reference] = payload.get("amount", 0)
+                if reference.startswith("down-"):
+                    return self._send(500, {"status": False, "message": "Gateway error"})
+                self._send(200, {
+                    "status": True,
+                    "message": "Authorization URL created",
+                    "data": {
+                        "authorization_url": f"https://checkout.paystack.com/{reference}",
+                        "access_code": f"access_{reference}",
+                        "reference": reference
+                    }
+                })
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def verify(self, reference: str):
+        with self._lock:
+            self.calls[reference] += 1
+            count = self.calls[reference]
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return self._verify(reference, count)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _verify(self, reference: str, count: int):
+        if reference.startswith("slow-"):
+            time.sleep(int(reference.split("-")[1]) / 1000)
+        if reference.startswith("down-"):
+            return 500, {"status": False, "message": "Gateway error"}
+        if reference.startswith("unknown-"):
+            return 400, {"status": False, "message": "Transaction reference not found"}
+        if reference.startswith("flaky-") and count <= int(reference.split("-")[1]):
+            return 503, {"status": False, "message": "Service unavailable"}
+
+        if reference.startswith("failed-"):
+            charge_status = "failed"
+        elif reference.startswith("abandoned-"):
+            charge_status = "abandoned"
+        else:
+            charge_status = "success"
+
+        return 200, {
+            "status": True,
+            "message": "Verification successful",
+            "data": {
+                "reference": reference,
+                "amount": self.amounts.get(reference, 10000),
+                "currency": "NGN",
+                "status": charge_status,
+                "paid_at": "2025-01-01T00:00:00.000Z" if charge_status == "success" else None,
+                "channel": "card",
+                "customer": {"email": "stub@example.com"}
+            }
+        }
+
+    def start(self) -> "PaystackStub":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local Paystack stub server")
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+
+    stub = PaystackStub(port=args.port)
+    print(f"Paystack stub listening on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
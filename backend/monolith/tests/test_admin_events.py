@@ -0,0 +1,33 @@
+import asyncio
+import json
+
+from services.admin_events_service import RESYNC, AdminEventBroker, format_sse, new_event
+from utils import constants
+
+
+def test_broker_fans_out_and_resyncs_a_stalled_client():
+    async def scenario():
+        broker = AdminEventBroker()
+        with broker.subscribe() as reader, broker.subscribe() as stalled:
+            assert broker.subscriber_count == 2
+            for n in range(constants.ADMIN_EVENTS_QUEUE_SIZE + 1):
+                broker._on_notify(None, 0, constants.ADMIN_EVENTS_CHANNEL, json.dumps(new_event("order.created", {"n": n})))
+                if n < constants.ADMIN_EVENTS_QUEUE_SIZE:
+                    assert (await reader.get())["data"] == {"n": n}
+            # reader kept up; stalled overflowed, so its backlog became one resync
+            assert (await reader.get())["data"] == {"n": constants.ADMIN_EVENTS_QUEUE_SIZE}
+            assert stalled.qsize() == 1 and stalled.get_nowait()["type"] == RESYNC
+            broker._on_notify(None, 0, constants.ADMIN_EVENTS_CHANNEL, "not json")
+            assert reader.empty()
+        assert broker.subscriber_count == 0
+
+    asyncio.run(scenario())
+
+
+def test_sse_frame():
+    frame = format_sse(new_event("stock.low", {"variant_id": 3}), 7)
+    lines = frame.split("\n")
+
+    assert frame.endswith("\n\n")
+    assert lines[0:2] == ["id: 7", "event: stock.low"]
+    assert json.loads(lines[2][len("data: "):])["data"] == {"variant_id": 3}
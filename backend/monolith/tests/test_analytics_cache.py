@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from services import analytics_cache_service
+from utils import cache
+
+
+def test_reports_are_reused_until_an_orders_change_commits(fake_redis):
+    calls = []
+
+    @analytics_cache_service.cached_report("sales")
+    def sales(range: str = "30d", db=None, current_user=None):
+        calls.append(range)
+        return [{"revenue": len(calls)}]
+
+    assert sales(range="30d", db=object(), current_user=object()) == [{"revenue": 1}]
+    assert sales(range="30d", db=object(), current_user=object()) == [{"revenue": 1}]
+    sales(range="7d", db=object(), current_user=object())
+    assert calls == ["30d", "7d"]
+
+    session = Session(create_engine("sqlite://"))
+    session.connection()
+    analytics_cache_service.mark_orders_changed(session)
+    session.rollback()
+    assert not session.info
+    assert sales(range="30d", db=object(), current_user=object()) == [{"revenue": 1}]
+
+    analytics_cache_service.mark_orders_changed(session)
+    session.commit()
+    assert sales(range="30d", db=object(), current_user=object()) == [{"revenue": 3}]
+    assert calls == ["30d", "7d", "30d"]
+
+
+def test_without_redis_reports_are_computed_every_time(monkeypatch):
+    monkeypatch.setattr(cache, "redis_client", None)
+    monkeypatch.setattr(analytics_cache_service, "redis_client", None)
+    calls = []
+
+    @analytics_cache_service.cached_report("inventory-alerts", params=())
+    def alerts(db=None):
+        calls.append(1)
+        return []
+
+    alerts(db=object())
+    alerts(db=object())
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("cached", [True, False])
+def test_cache_fills_read_from_the_primary(monkeypatch, fake_redis, cached):
+    from contextlib import contextmanager
+    from types import SimpleNamespace
+
+    from routers.admin import analytics
+
+    if not cached:
+        monkeypatch.setattr(analytics_cache_service, "redis_client", None)
+    routed = []
+
+    @contextmanager
+    def read_session(prefer_primary, statement_timeout_ms=None):
+        routed.append(prefer_primary)
+        yield None
+
+    monkeypatch.setattr(analytics, "read_session", read_session)
+    list(analytics.get_cached_report_db(SimpleNamespace(cookies={})))
+    # A replica may not have replayed the commit behind the latest version bump
+    assert routed == [cached]
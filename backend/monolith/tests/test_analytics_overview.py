@@ -0,0 +1,40 @@
+import time
+from types import SimpleNamespace
+
+from routers.admin import analytics
+
+SECTIONS = {
+    "stats_report": "stats",
+    "sales_report": "sales",
+    "top_products_report": "topProducts",
+    "inventory_alerts_report": "inventoryAlerts",
+    "customer_analytics_report": "customerAnalytics",
+    "revenue_by_category_report": "revenueByCategory",
+}
+
+
+def test_overview_runs_sections_concurrently_and_isolates_failures(monkeypatch):
+    def slow(name):
+        def builder(db, **params):
+            time.sleep(0.2)
+            return {"section": name, **params}
+        return builder
+
+    def broken(db, **params):
+        raise RuntimeError("boom")
+
+    for builder_name, section in SECTIONS.items():
+        monkeypatch.setattr(analytics, builder_name, slow(section))
+    monkeypatch.setattr(analytics, "customer_analytics_report", broken)
+
+    started = time.perf_counter()
+    overview = analytics.get_overview(
+        request=SimpleNamespace(cookies={}), range="7d", limit=3, current_user=None
+    )
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.2 * 3  # sequentially this would take 1s
+    assert overview["topProducts"] == {"section": "topProducts", "range": "7d", "limit": 3}
+    assert overview["inventoryAlerts"] == {"section": "inventoryAlerts"}
+    assert overview["customerAnalytics"] is None
+    assert overview["errors"] == ["customerAnalytics"]
@@ -0,0 +1,270 @@
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select, text
+
+import models
+from services import analytics_service, customer_metrics_service, sales_rollup_service
+
+
+@pytest.fixture
+def db(sqlite_db):
+    return sqlite_db([
+        models.Category, models.Product, models.ProductVariant, models.Customer, models.Order,
+        models.OrderItem, models.DailySales, models.CustomerMetrics,
+    ])
+
+
+@pytest.fixture
+def catalog(db):
+    return seed_catalog(db)
+
+
+def seed_catalog(db):
+    db.add(models.Category(name="Shirts", slug="shirts"))
+    db.flush()
+    tee = models.Product(name="Tee", category="shirts")
+    cap = models.Product(name="Cap")
+    db.add_all([tee, cap])
+    db.flush()
+    variants = {
+        "tee": models.ProductVariant(size="M", price=Decimal("20"), sku="TEE-M", product_id=tee.id, stock_quantity=7),
+        "cap": models.ProductVariant(size="OS", price=Decimal("15"), sku="CAP", product_id=cap.id, stock_quantity=3),
+    }
+    customer = models.Customer(email="a@example.com")
+    db.add_all([*variants.values(), customer])
+    db.flush()
+    return {"variants": variants, "customer": customer, "tee": tee, "cap": cap}
+
+
+def add_order(db, catalog, n, days_ago, items, payment_status="paid", shipping=Decimal("0"), customer=None):
+    """items: [(variant key, quantity)]; total = item prices + shipping"""
+    customer = customer or catalog["customer"]
+    variants = catalog["variants"]
+    order_items = [
+        models.OrderItem(variant_id=variants[key].id, quantity=qty, unit_price=variants[key].price,
+                         total_price=variants[key].price * qty)
+        for key, qty in items
+    ]
+    order = models.Order(
+        order_number=f"ORD-{n}", customer_id=customer.id, customer_name="A",
+        customer_email="a@example.com", customer_phone="0", shipping_address="Lagos",
+        total_amount=sum(item.total_price for item in order_items) + shipping,
+        payment_status=payment_status, created_at=datetime.now() - timedelta(days=days_ago),
+        items=order_items,
+    )
+    db.add(order)
+    db.flush()
+    return order
+
+
+def rollup(db):
+    return sorted(
+        (r.sales_date, r.product_id, r.category, r.revenue, r.units, r.order_count)
+        for r in db.scalars(select(models.DailySales)) if r.order_count
+    )
+
+
+def test_period_totals_split_both_windows_in_one_row(db, catalog):
+    now = datetime.now()
+    db.add_all([
+        models.Customer(email=f"c{days}@example.com", created_at=now - timedelta(days=days))
+        for days in (2, 40, 100)
+    ])
+    add_order(db, catalog, 1, 1, [("tee", 5)], shipping=Decimal("0.50"))
+    add_order(db, catalog, 2, 29, [("cap", 2), ("tee", 1)])
+    add_order(db, catalog, 3, 31, [("cap", 1)])
+    add_order(db, catalog, 4, 2, [("tee", 40)], payment_status="pending")
+    add_order(db, catalog, 5, 61, [("cap", 1)])  # older than both periods
+    sales_rollup_service.rebuild(db)
+
+    start = now - timedelta(days=30)
+    previous_start = start - timedelta(days=30)
+    assert analytics_service.order_period_totals(db, start, previous_start) == {
+        "current_revenue": Decimal("150.50"), "current_orders": 2,
+        "previous_revenue": Decimal("15.00"), "previous_orders": 1,
+    }
+    assert analytics_service.customer_period_totals(db, start, previous_start)["previous_customers"] == 1
+
+    top = analytics_service.top_products(db, start, limit=5)
+    assert [(p["name"], p["revenue"], p["units_sold"], p["stock"]) for p in top] == [
+        ("Tee", Decimal("120.00"), 6, 7), ("Cap", Decimal("30.00"), 2, 3)
+    ]
+    by_category = {c["category"]: c["revenue"] for c in analytics_service.revenue_by_category(db, start)}
+    assert by_category == {"shirts": Decimal("120.00"), "": Decimal("30.00")}
+    assert analytics_service.average_order_value(db, start) == Decimal("75.25")
+    assert [s["order_count"] for s in analytics_service.sales_by_date(db, start)] == [1, 1]
+
+
+def test_incremental_updates_match_a_full_rebuild(db, catalog):
+    first = add_order(db, catalog, 1, 3, [("tee", 2), ("cap", 1)])
+    sales_rollup_service.record_orders(db, [first.id])
+    second = add_order(db, catalog, 2, 3, [("tee", 1)])
+    sales_rollup_service.record_orders(db, [second.id])
+    pending = add_order(db, catalog, 3, 1, [("cap", 4)], payment_status="pending")
+
+    # Refund the first order, pay the pending one
+    first.payment_status = "refunded"
+    sales_rollup_service.payment_status_changed(db, first.id, "paid", "refunded")
+    pending.payment_status = "paid"
+    sales_rollup_service.payment_status_changed(db, pending.id, "pending", "paid")
+    db.commit()
+
+    incremental = rollup(db)
+    sales_rollup_service.rebuild(db)
+    assert incremental == rollup(db)
+    assert analytics_service.total_revenue(db) == Decimal("80.00")
+
+
+def test_refund_after_recategorising_reverses_the_same_rows(db, catalog):
+    order = add_order(db, catalog, 1, 3, [("tee", 2)])
+    sales_rollup_service.record_orders(db, [order.id])
+    db.add(models.Category(name="Tops", slug="tops"))
+    sales_rollup_service.product_recategorised(db, catalog["tee"].id, "tops")
+    catalog["tee"].category = "tops"
+    db.flush()
+
+    order.payment_status = "refunded"
+    sales_rollup_service.payment_status_changed(db, order.id, "paid", "refunded")
+    db.commit()
+
+    assert rollup(db) == []
+    assert all(r.revenue == 0 for r in db.scalars(select(models.DailySales)))
+
+
+def test_order_totals_row_is_only_locked_at_commit(pg_sessionmaker):
+    first_db, second_db = pg_sessionmaker(), pg_sessionmaker()
+    try:
+        catalog = seed_catalog(first_db)
+        other = models.Customer(email="b@example.com")
+        first_db.add(other)
+        first_db.commit()
+
+        first = add_order(first_db, catalog, 1, 0, [("tee", 1)])
+        sales_rollup_service.record_orders(first_db, [first.id])
+        # A concurrent checkout for the same day commits while the first is still open
+        second_db.execute(text("SET lock_timeout = '2s'"))
+        second = add_order(second_db, catalog, 2, 0, [("cap", 1)], customer=other)
+        sales_rollup_service.record_orders(second_db, [second.id])
+        second_db.commit()
+        first_db.commit()
+
+        totals = first_db.scalar(select(models.DailySales).where(
+            models.DailySales.product_id == sales_rollup_service.ORDER_TOTALS_PRODUCT_ID
+        ))
+        assert (totals.order_count, totals.revenue) == (2, Decimal("35.00"))
+    finally:
+        first_db.close()
+        second_db.close()
+
+
+def test_savepoint_rollback_discards_its_deferred_totals(pg_db):
+    catalog = seed_catalog(pg_db)
+    kept = add_order(pg_db, catalog, 1, 2, [("tee", 1)])
+    sales_rollup_service.record_orders(pg_db, [kept.id])
+    pg_db.commit()
+
+    with pg_db.begin_nested() as savepoint:
+        kept.payment_status = "refunded"
+        sales_rollup_service.payment_status_changed(pg_db, kept.id, "paid", "refunded")
+        savepoint.rollback()
+    with pg_db.begin_nested() as savepoint:
+        dropped = add_order(pg_db, catalog, 2, 2, [("cap", 1)])
+        sales_rollup_service.record_orders(pg_db, [dropped.id])
+        savepoint.rollback()
+    added = add_order(pg_db, catalog, 3, 2, [("cap", 2)])
+    sales_rollup_service.record_orders(pg_db, [added.id])
+    pg_db.commit()
+
+    incremental = rollup(pg_db)
+    sales_rollup_service.rebuild(pg_db)
+    assert incremental == rollup(pg_db)
+    assert analytics_service.total_revenue(pg_db) == Decimal("50.00")
+
+
+def test_period_totals_without_orders_are_zero(db):
+    now = datetime.now()
+    totals = analytics_service.order_period_totals(db, now - timedelta(days=7), now - timedelta(days=14))
+    assert totals == {"current_revenue": 0, "current_orders": 0, "previous_revenue": 0, "previous_orders": 0}
+
+
+def customer_rows(db):
+    return sorted(
+        (m.customer_id, m.order_count, m.total_spent)
+        for m in db.scalars(select(models.CustomerMetrics))
+    )
+
+
+def test_customer_metrics_follow_orders_and_refunds(db, catalog):
+    other = models.Customer(email="b@example.com")
+    db.add(other)
+    db.flush()
+    first = add_order(db, catalog, 1, 40, [("tee", 1)])
+    second = add_order(db, catalog, 2, 5, [("cap", 2)])
+    third = add_order(db, catalog, 3, 2, [("tee", 1)], customer=other)
+    sales_rollup_service.record_orders(db, [first.id, second.id, third.id])
+
+    summary = customer_metrics_service.customer_summary(db, datetime.now() - timedelta(days=30))
+    assert (summary["active_customers"], summary["repeat_customers"], summary["repeat_rate"]) == (2, 1, 50)
+    assert summary["lifetime_value"] == Decimal("35")
+
+    # Refunding the only paid order removes the customer; refunding a first order moves first_order_at
+    third.payment_status = "refunded"
+    sales_rollup_service.payment_status_changed(db, third.id, "paid", "refunded")
+    first.payment_status = "refunded"
+    sales_rollup_service.payment_status_changed(db, first.id, "paid", "refunded")
+    db.commit()
+
+    incremental = customer_rows(db)
+    assert incremental == [(catalog["customer"].id, 1, Decimal("30.00"))]
+    assert db.scalar(select(models.CustomerMetrics.first_order_at)).date() == second.created_at.date()
+    customer_metrics_service.rebuild(db)
+    assert customer_rows(db) == incremental
+
+
+def test_concurrent_orders_for_one_customer_are_both_counted(pg_sessionmaker):
+    first_db, second_db = pg_sessionmaker(), pg_sessionmaker()
+    try:
+        catalog = seed_catalog(first_db)
+        first_db.commit()
+
+        first = add_order(first_db, catalog, 1, 1, [("tee", 1)])
+        customer_metrics_service.refresh_for_orders(first_db, [first.id])
+        second = add_order(second_db, catalog, 2, 0, [("cap", 1)])
+        # Waits for the first transaction, then recomputes including its order
+        refresh = threading.Thread(target=customer_metrics_service.refresh_for_orders, args=(second_db, [second.id]))
+        refresh.start()
+        refresh.join(timeout=0.5)
+        assert refresh.is_alive()
+        first_db.commit()
+        refresh.join(timeout=5)
+        second_db.commit()
+
+        assert customer_rows(first_db) == [(catalog["customer"].id, 2, Decimal("35.00"))]
+    finally:
+        first_db.close()
+        second_db.close()
+
+
+def test_cohort_retention_and_rfm_segments(db, catalog):
+    customers = [models.Customer(email=f"c{i}@example.com") for i in range(5)]
+    db.add_all(customers)
+    db.flush()
+    n = 0
+    for customer, days in zip(customers, ([0], [1, 2, 3, 4], [100], [101, 130], [3])):
+        for days_ago in days:
+            n += 1
+            add_order(db, catalog, n, days_ago, [("cap", 1)], customer=customer)
+    customer_metrics_service.rebuild(db)
+
+    cohorts = customer_metrics_service.cohort_retention(db, months=12)
+    assert sum(c["customers"] for c in cohorts) == 5
+    assert all(c["retention"][0] == 100.0 for c in cohorts)
+
+    segments = {s["segment"]: s for s in customer_metrics_service.rfm_segments(db)}
+    assert sum(s["customers"] for s in segments.values()) == 5
+    assert segments["champions"]["customers"] == 1  # four recent orders
+    assert segments["at_risk"]["revenue"] == Decimal("30.00")  # repeat buyer last seen 101 days ago
+    assert segments["hibernating"]["revenue"] == Decimal("15.00")  # one-time buyer last seen 100 days ago
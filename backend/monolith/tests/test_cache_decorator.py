@@ -0,0 +1,43 @@
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+from pydantic import BaseModel
+
+from utils import cache_decorator
+
+
+class Item(BaseModel):
+    price: Decimal
+    created_at: datetime
+
+
+def test_async_endpoints_are_cached_as_json(monkeypatch):
+    store = {}
+
+    async def fake_get(key):
+        return store.get(key)
+
+    async def fake_set(key, data, expire=3600):
+        store[key] = data
+
+    monkeypatch.setattr(cache_decorator, "async_get_from_cache", fake_get)
+    monkeypatch.setattr(cache_decorator, "async_set_cache", fake_set)
+    calls = []
+
+    @cache_decorator.cached("items", expire=60)
+    async def list_items(min_price: Decimal = None, db=None):
+        calls.append(min_price)
+        return [Item(price=Decimal("12.50"), created_at=datetime(2025, 1, 1))]
+
+    async def scenario():
+        first = await list_items(min_price=Decimal("10"), db=object())
+        second = await list_items(min_price=Decimal("10"), db=object())
+        other = await list_items(min_price=Decimal("20"), db=object())
+        return first, second, other
+
+    first, second, other = asyncio.run(scenario())
+    assert asyncio.iscoroutinefunction(list_items)
+    assert first == second == [{"price": "12.50", "created_at": "2025-01-01T00:00:00"}]
+    assert calls == [Decimal("10"), Decimal("20")]
+    assert len(store) == 2
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+import models
+from services import checkout_service
+
+
+def _add(db, count, prefix, expires_in, status="pending"):
+    expires = datetime.now(timezone.utc) + expires_in
+    for n in range(count):
+        db.add(models.PendingCheckout(idempotency_key=f"idem-{prefix}-{n}", payment_reference=f"{prefix}-{n}",
+                                      checkout_data={}, status=status, expires_at=expires))
+    db.commit()
+
+
+def _statuses(db):
+    db.expire_all()
+    return dict(db.query(models.PendingCheckout.payment_reference, models.PendingCheckout.status))
+
+
+def test_expire_chunk_flips_only_overdue_pending_rows(pg_db):
+    _add(pg_db, 3, "overdue", timedelta(minutes=-5))
+    _add(pg_db, 2, "live", timedelta(minutes=30))
+    _add(pg_db, 1, "paid", timedelta(minutes=-5), status="completed")
+
+    assert checkout_service.expire_chunk(pg_db, batch_size=2) == 2
+    assert checkout_service.expire_chunk(pg_db, batch_size=2) == 1
+    assert checkout_service.expire_chunk(pg_db, batch_size=2) == 0
+
+    statuses = _statuses(pg_db)
+    assert {ref for ref, status in statuses.items() if status == "expired"} == {"overdue-0", "overdue-1", "overdue-2"}
+    assert statuses["live-0"] == statuses["live-1"] == "pending"
+    assert statuses["paid-0"] == "completed"
+
+
+def test_expire_chunk_skips_rows_locked_by_another_session(pg_db, pg_sessionmaker):
+    _add(pg_db, 4, "overdue", timedelta(minutes=-5))
+
+    # e.g. the webhook worker completing these checkouts right now
+    other = pg_sessionmaker()
+    try:
+        locked = other.execute(
+            select(models.PendingCheckout.payment_reference)
+            .order_by(models.PendingCheckout.id).limit(2).with_for_update()
+        ).scalars().all()
+
+        assert checkout_service.expire_chunk(pg_db, batch_size=10) == 2
+    finally:
+        other.rollback()
+        other.close()
+
+    statuses = _statuses(pg_db)
+    assert [statuses[ref] for ref in locked] == ["pending", "pending"]
+    assert sorted(statuses.values()) == ["expired", "expired", "pending", "pending"]
+    # Picked up on the next pass once the lock is gone
+    assert checkout_service.expire_chunk(pg_db, batch_size=10) == 2
+
+
+def test_cleanup_runs_chunks_until_the_backlog_is_gone(pg_db):
+    _add(pg_db, 7, "overdue", timedelta(minutes=-5))
+
+    result = checkout_service.cleanup_expired_checkouts(pg_db, batch_size=3)
+
+    assert (result["status"], result["expired_count"], result["batches"]) == ("success", 7, 3)
+    assert set(_statuses(pg_db).values()) == {"expired"}
@@ -0,0 +1,98 @@
+"""
+Read routing against SQLite stand-ins for a primary and two replicas, with
+replication lag simulated through the router's probe.
+"""
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
+
+import database
+from utils import constants, db_routing
+
+
+def _database(tmp_path, name):
+    engine = create_engine(f"sqlite:///{tmp_path / name}.db")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE marker (name TEXT)"))
+        conn.execute(text("INSERT INTO marker VALUES (:name)"), {"name": name})
+    return engine
+
+
+@pytest.fixture
+def lag():
+    return {"replica-1": 0.0, "replica-2": 0.0}
+
+
+@pytest.fixture
+def router(tmp_path, lag, monkeypatch):
+    def probe(replica):
+        if lag[replica.name] is Exception:
+            raise ConnectionError("replica unreachable")
+        return lag[replica.name]
+
+    replicas = [db_routing.Replica(name, _database(tmp_path, name)) for name in lag]
+    replica_router = db_routing.ReplicaRouter(replicas, max_lag_seconds=5, probe=probe)
+    monkeypatch.setattr(database, "replica_router", replica_router)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=_database(tmp_path, "primary")))
+    return replica_router
+
+
+@pytest.fixture
+def client(router):
+    app = FastAPI()
+    app.add_middleware(db_routing.ReadYourWritesMiddleware, path_prefixes=["/api/admin/"])
+
+    @app.get("/read")
+    def read(db: Session = Depends(database.get_read_db)):
+        return db.execute(text("SELECT name FROM marker")).scalar()
+
+    @app.post("/api/admin/products")
+    def write():
+        return {}
+
+    return TestClient(app)
+
+
+def test_reads_round_robin_across_caught_up_replicas(client, router):
+    assert client.get("/read").json() == "primary"  # lag not probed yet
+
+    router.refresh()
+    served = {client.get("/read").json() for _ in range(4)}
+    assert served == {"replica-1", "replica-2"}
+    assert router.routed == {"replica": 4, "primary_fallback": 1, "primary_sticky": 0}
+
+
+def test_lagging_or_unreachable_replicas_fall_back_to_primary(client, router, lag):
+    lag["replica-1"] = 30.0
+    router.refresh()
+    assert {client.get("/read").json() for _ in range(3)} == {"replica-2"}
+
+    lag["replica-2"] = Exception
+    router.refresh()
+    assert client.get("/read").json() == "primary"
+
+    lag["replica-1"] = 1.0
+    router.refresh()
+    assert client.get("/read").json() == "replica-1"
+    assert [r["usable"] for r in router.get_metrics()["replicas"]] == [True, False]
+
+
+def test_admin_write_pins_reads_to_primary(client, router):
+    router.refresh()
+    assert client.get("/read").json().startswith("replica")
+
+    response = client.post("/api/admin/products")
+    assert constants.READ_PRIMARY_COOKIE in response.headers["set-cookie"]
+    assert client.get("/read").json() == "primary"
+    assert router.routed["primary_sticky"] == 1
+
+    client.cookies.clear()
+    assert client.get("/read").json().startswith("replica")
+
+
+def test_stale_cookie_is_ignored():
+    assert db_routing.wants_primary({constants.READ_PRIMARY_COOKIE: "1"}) is False
+    assert db_routing.wants_primary({constants.READ_PRIMARY_COOKIE: "junk"}) is False
+    assert db_routing.wants_primary({}) is False
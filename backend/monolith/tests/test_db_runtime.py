@@ -0,0 +1,47 @@
+import logging
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import QueuePool
+
+from utils import db_runtime
+
+
+@pytest.fixture
+def fresh_stats():
+    return db_runtime.DatabaseStats()
+
+
+def test_pool_records_waits_and_timeouts(tmp_path, fresh_stats):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=db_runtime.instrumented_pool_class(QueuePool, fresh_stats),
+        pool_size=1, max_overflow=0, pool_timeout=0.05
+    )
+    held = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    held.close()
+    with engine.connect():
+        pass
+
+    metrics = db_runtime.get_pool_metrics(engine, fresh_stats)
+    assert metrics["pool_timeouts"] == 1
+    assert metrics["checkouts"] == 2
+    assert metrics["size"] == 1 and metrics["checked_out"] == 0
+
+
+def test_slow_queries_are_logged_and_counted(tmp_path, fresh_stats, caplog):
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    db_runtime.install_instrumentation(engine, slow_query_ms=0, engine_stats=fresh_stats)
+
+    with caplog.at_level(logging.WARNING, logger="utils.db_runtime"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            with pytest.raises(exc.OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+            conn.execute(text("SELECT 2"))
+
+    assert fresh_stats.queries == 3
+    assert fresh_stats.slow_queries == 3
+    assert "failed): SELECT * FROM missing_table" in caplog.text and "SELECT 2" in caplog.text
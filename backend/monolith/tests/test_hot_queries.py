@@ -0,0 +1,35 @@
+from decimal import Decimal
+
+import pytest
+
+import models
+from utils import hot_queries
+
+
+@pytest.fixture
+def db(sqlite_db):
+    session = sqlite_db([models.Category, models.Product, models.ProductVariant, models.AdminUser])
+    product = models.Product(name="Tee")
+    session.add(product)
+    session.flush()
+    session.add_all([
+        models.ProductVariant(size=size, price=Decimal("10"), sku=f"TEE-{size}", product_id=product.id,
+                              is_active=size != "XL")
+        for size in ("S", "M", "L", "XL")
+    ] + [
+        models.AdminUser(email=f"{name}@example.com", hashed_password="x") for name in ("a", "b")
+    ])
+    session.commit()
+    return session
+
+
+def test_cached_statements_bind_new_values_each_call(db):
+    # Same lambda, different closure values: must not reuse the first call's parameters
+    assert hot_queries.admin_by_email(db, "a@example.com").email == "a@example.com"
+    assert hot_queries.admin_by_email(db, "b@example.com").email == "b@example.com"
+    assert hot_queries.admin_by_email(db, "c@example.com") is None
+
+    assert sorted(hot_queries.active_variants_by_id(db, [1, 2])) == [1, 2]
+    # Different list length reuses the statement via an expanding parameter; XL (id 4) is inactive
+    assert sorted(hot_queries.active_variants_by_id(db, [3, 4, 99, 3])) == [3]
+    assert hot_queries.active_variants_by_id(db, []) == {}
@@ -0,0 +1,175 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from utils.idempotency import IdempotencyMiddleware, MemoryIdempotencyStore
+
+
+def make_app():
+    app = FastAPI()
+    app.state.calls = 0
+    app.add_middleware(IdempotencyMiddleware, path_prefixes=["/api/orders/"], store=MemoryIdempotencyStore())
+
+    @app.post("/api/orders/checkout")
+    async def checkout(request: Request):
+        payload = await request.json()
+        app.state.calls += 1
+        await asyncio.sleep(0.05)
+        return {"call": app.state.calls, "total": payload.get("total")}
+
+    return app
+
+
+async def post(app, json, headers=None):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post("/api/orders/checkout", json=json, headers=headers)
+
+
+def test_replay_returns_stored_response_without_running_handler():
+    app = make_app()
+
+    async def run():
+        first = await post(app, {"total": 10}, {"Idempotency-Key": "abc"})
+        second = await post(app, {"total": 10}, {"Idempotency-Key": "abc"})
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.json() == second.json() == {"call": 1, "total": 10}
+    assert second.headers["idempotent-replayed"] == "true"
+    assert app.state.calls == 1
+
+
+def test_key_from_json_body_and_mismatched_reuse():
+    app = make_app()
+
+    async def run():
+        await post(app, {"total": 10, "idempotency_key": "body-key"})
+        return await post(app, {"total": 99, "idempotency_key": "body-key"})
+
+    response = asyncio.run(run())
+    assert response.status_code == 422
+    assert app.state.calls == 1
+
+
+def test_concurrent_duplicates_wait_for_first_request():
+    app = make_app()
+
+    async def run():
+        return await asyncio.gather(*[
+            post(app, {"total": 5}, {"Idempotency-Key": "same"}) for _ in range(5)
+        ])
+
+    responses = asyncio.run(run())
+    assert {r.json()["call"] for r in responses} == {1}
+    assert app.state.calls == 1
+
+
+def test_requests_without_key_pass_through():
+    app = make_app()
+
+    async def run():
+        await post(app, {"total": 1})
+        await post(app, {"total": 1})
+
+    asyncio.run(run())
+    assert app.state.calls == 2
+
+
+def test_non_json_bodies_stream_through_unbuffered():
+    received = []
+
+    async def app(scope, receive, send):
+        while True:
+            message = await receive()
+            received.append(message["body"])
+            if not message.get("more_body"):
+                break
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = IdempotencyMiddleware(app, path_prefixes=["/api/admin/"], store=MemoryIdempotencyStore())
+    chunks = [b"part-1", b"part-2", b"part-3"]
+
+    async def run(headers):
+        messages = iter([{"type": "http.request", "body": c, "more_body": i < 2} for i, c in enumerate(chunks)])
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            pass
+
+        scope = {"type": "http", "method": "POST", "path": "/api/admin/upload", "headers": headers}
+        await middleware(scope, receive, send)
+
+    asyncio.run(run([(b"content-type", b"multipart/form-data; boundary=x")]))
+    asyncio.run(run([(b"content-type", b"multipart/form-data; boundary=x"), (b"idempotency-key", b"upload-1")]))
+    assert received == chunks * 2
+
+
+def test_auth_failures_are_not_stored():
+    app = FastAPI()
+    app.state.calls = 0
+    app.add_middleware(IdempotencyMiddleware, path_prefixes=["/api/orders/"], store=MemoryIdempotencyStore())
+
+    @app.post("/api/orders/checkout")
+    async def checkout():
+        app.state.calls += 1
+        return JSONResponse({"detail": "Not authenticated"}, status_code=401 if app.state.calls == 1 else 200)
+
+    async def run():
+        first = await post(app, {"total": 1}, {"Idempotency-Key": "auth"})
+        second = await post(app, {"total": 1}, {"Idempotency-Key": "auth"})
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert (first.status_code, second.status_code) == (401, 200)
+    assert app.state.calls == 2
+
+
+def test_lock_release_is_owner_checked():
+    store = MemoryIdempotencyStore()
+    stale = store.acquire("lock", ttl=60)
+    store._data.clear()  # the first holder's lock expired
+    current = store.acquire("lock", ttl=60)
+
+    store.release("lock", stale)
+    assert store.acquire("lock", ttl=60) is None
+    store.release("lock", current)
+    assert store.acquire("lock", ttl=60)
+
+
+def test_responses_are_scoped_to_the_caller_and_cookies_are_not_replayed():
+    app = FastAPI()
+    app.state.calls = 0
+    app.add_middleware(IdempotencyMiddleware, path_prefixes=["/api/admin/"], store=MemoryIdempotencyStore())
+
+    @app.post("/api/admin/products")
+    async def create_product(request: Request):
+        app.state.calls += 1
+        response = JSONResponse({"call": app.state.calls, "admin": request.cookies.get("admin_token")})
+        response.set_cookie("read_primary_until", "1")
+        return response
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def create(headers):
+                return await client.post("/api/admin/products", json={"name": "Runner"},
+                                         headers={"Idempotency-Key": "create-1", **headers})
+            return [
+                await create({"Cookie": "admin_token=alice"}),
+                await create({"Cookie": "admin_token=alice"}),
+                await create({"Cookie": "admin_token=mallory"}),
+                await create({}),
+                await create({"Authorization": "Bearer alice"}),
+            ]
+
+    first, replay, other, anonymous, bearer = asyncio.run(run())
+    assert first.json() == replay.json() == {"call": 1, "admin": "alice"}
+    assert replay.headers["idempotent-replayed"] == "true"
+    assert "set-cookie" in first.headers and "set-cookie" not in replay.headers
+    assert [r.json()["call"] for r in (other, anonymous, bearer)] == [2, 3, 4]
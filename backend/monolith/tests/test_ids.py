@@ -0,0 +1,38 @@
+import threading
+
+from utils import ids
+
+
+def test_ids_are_unique_and_sorted_within_a_process():
+    generated = [ids.new_ulid() for _ in range(50_000)]
+    assert len(set(generated)) == len(generated)
+    assert generated == sorted(generated)
+    assert all(len(value) == 26 for value in generated[:10])
+
+
+def test_ids_are_unique_across_threads():
+    results = []
+
+    def worker():
+        results.extend(ids.new_order_number() for _ in range(10_000))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(results)) == 80_000
+
+
+def test_ordering_survives_clock_going_backwards(monkeypatch):
+    generator = ids.ULIDGenerator()
+    clock = iter([2_000_000_000_000, 1_000_000_000_000, 1_000_000_000_000])
+    monkeypatch.setattr(ids.time, "time_ns", lambda: next(clock) * 1_000_000)
+    first, second, third = generator.new(), generator.new(), generator.new()
+    assert first < second < third
+
+
+def test_prefixes():
+    assert ids.new_order_number().startswith("ORD-")
+    assert ids.new_payment_reference().startswith("MADRUSH-")
+    assert ids.new_refund_reference().startswith("REFUND-")
@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+import pytest
+
+import models
+from services import inventory_service, low_stock_service
+
+
+@pytest.fixture
+def db(sqlite_db):
+    # outbox_events uses JSONB, so alerts are checked as pending objects in the session
+    session = sqlite_db([models.Category, models.Product, models.ProductVariant, models.AdminUser])
+    session.add_all([
+        models.Category(name="Shoes", slug="shoes", low_stock_threshold=4),
+        models.Category(name="Tees", slug="tees"),
+        models.AdminUser(email="owner@example.com", hashed_password="x"),
+    ])
+    session.flush()
+    shoe = models.Product(name="Runner", category="shoes")
+    tee = models.Product(name="Tee", category="tees")
+    session.add_all([shoe, tee])
+    session.flush()
+    session.add_all([
+        models.ProductVariant(id=1, product_id=shoe.id, size="42", price=Decimal("50"), sku="RUN-42", stock_quantity=8),
+        models.ProductVariant(id=2, product_id=tee.id, size="M", price=Decimal("20"), sku="TEE-M", stock_quantity=12),
+        models.ProductVariant(id=3, product_id=tee.id, size="L", price=Decimal("20"), sku="TEE-L", stock_quantity=3,
+                              low_stock_threshold=2),
+        models.ProductVariant(id=4, product_id=tee.id, size="S", price=Decimal("20"), sku="TEE-S", stock_quantity=40),
+    ])
+    session.commit()
+    return session
+
+
+def pending_alerts(db):
+    return sorted(
+        (obj.payload["variant_id"], obj.payload["level"]) for obj in db.new
+        if isinstance(obj, models.OutboxEvent) and obj.event_type == low_stock_service.LOW_STOCK_ALERT
+    )
+
+
+def test_report_uses_variant_then_category_then_default_threshold(db):
+    alerts = {alert["variantSku"]: alert for alert in low_stock_service.inventory_alerts(db)}
+
+    assert set(alerts) == {"RUN-42", "TEE-M", "TEE-L"}  # TEE-S has 40
+    assert (alerts["TEE-L"]["threshold"], alerts["TEE-L"]["status"]) == (2, "warning")
+    assert (alerts["RUN-42"]["threshold"], alerts["RUN-42"]["status"]) == (4, "warning")
+    assert (alerts["TEE-M"]["threshold"], alerts["TEE-M"]["status"]) == (10, "warning")
+
+
+def test_reservation_alerts_only_on_crossing(db):
+    inventory_service.reserve_stock(db, [
+        {"variant_id": 1, "quantity": 4},  # 8 -> 4: crosses into low
+        {"variant_id": 2, "quantity": 1},  # 12 -> 11: still warning
+        {"variant_id": 4, "quantity": 1},
+    ])
+    assert pending_alerts(db) == [(1, "low")]
+    db.rollback()
+
+    inventory_service.reserve_stock(db, [
+        {"variant_id": 1, "quantity": 6},  # 8 -> 2: straight to critical
+        {"variant_id": 3, "quantity": 1},  # 3 -> 2: low for its own threshold of 2
+    ])
+    assert pending_alerts(db) == [(1, "critical"), (3, "low")]
+    db.rollback()
+
+
+def test_digest_sends_one_message_with_current_stock(db, monkeypatch):
+    sent = []
+    monkeypatch.setattr(low_stock_service, "send_low_stock_alert",
+                        lambda items, emails, phone: sent.append((items, emails)) or True)
+    db.query(models.ProductVariant).filter(models.ProductVariant.id == 1).update({"stock_quantity": 2})
+    events = [
+        models.OutboxEvent(id=10, event_type=low_stock_service.LOW_STOCK_ALERT, payload={"variant_id": 1}),
+        models.OutboxEvent(id=11, event_type=low_stock_service.LOW_STOCK_ALERT, payload={"variant_id": 4}),
+    ]
+
+    assert low_stock_service.send_low_stock_digest(db, events) == {10: True, 11: True}
+    items, emails = sent[0]
+    assert len(sent) == 1 and emails == ["owner@example.com"]
+    assert [(item["sku"], item["stock"], item["level"]) for item in items] == [("RUN-42", 2, "critical")]
@@ -0,0 +1,92 @@
+import csv
+import io
+import uuid
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from xml.etree import ElementTree
+
+import pytest
+
+import models
+from services import order_export_service
+from utils.export_stream import stream_csv, stream_xlsx
+
+SHEET_NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def read_sheet(data: bytes):
+    with zipfile.ZipFile(io.BytesIO(data)) as workbook:
+        root = ElementTree.fromstring(workbook.read("xl/worksheets/sheet1.xml"))
+    rows = []
+    for row in root.iterfind(".//s:row", SHEET_NS):
+        values = []
+        for cell in row.iterfind("s:c", SHEET_NS):
+            text = cell.find("s:is/s:t", SHEET_NS)
+            number = cell.find("s:v", SHEET_NS)
+            values.append(text.text if text is not None else number.text if number is not None else None)
+        rows.append(values)
+    return rows
+
+
+def test_xlsx_streams_in_chunks_and_round_trips():
+    # Random references so deflate has to emit output as it goes
+    rows = [(f"ORD-{i}", Decimal("12.50"), i, uuid.uuid4().hex, "<A & B>\x01") for i in range(2500)]
+    chunks = list(stream_xlsx(["Order", "Total", "Qty", "Reference", "Name"], iter(rows), batch=1000))
+
+    assert len([c for c in chunks if c]) > 2  # data leaves before the last row is read
+    sheet = read_sheet(b"".join(chunks))
+    assert sheet[0] == ["Order", "Total", "Qty", "Reference", "Name"]
+    assert sheet[1] == ["ORD-0", "12.50", "0", rows[0][3], "<A & B>"]
+    assert len(sheet) == 2501
+
+
+def test_csv_neutralises_formulas_but_keeps_phone_numbers():
+    chunks = list(stream_csv(["Name", "Phone", "When"], [
+        ("=HYPERLINK(\"http://x\")", "+2348012345678", datetime(2025, 1, 2, 3, 4, 5)),
+        ("Ada", "-", date(2025, 1, 2)),
+    ], batch=1))
+
+    assert len(chunks) == 3
+    text = b"".join(chunks).decode("utf-8")
+    assert text.startswith("\ufeff")
+    assert list(csv.reader(io.StringIO(text.lstrip("\ufeff")))) == [
+        ["Name", "Phone", "When"],
+        ["'=HYPERLINK(\"http://x\")", "+2348012345678", "2025-01-02 03:04:05"],
+        ["Ada", "-", "2025-01-02"],
+    ]
+
+
+@pytest.fixture
+def db(sqlite_db):
+    return sqlite_db([
+        models.Category, models.Product, models.ProductVariant, models.Customer, models.Order, models.OrderItem,
+    ])
+
+
+def test_export_rows_filter_by_date_range_and_status(db):
+    product = models.Product(name="Tee")
+    customer = models.Customer(email="a@example.com")
+    db.add_all([product, customer])
+    db.flush()
+    variant = models.ProductVariant(size="M", price=Decimal("20"), sku="TEE-M", product_id=product.id)
+    db.add(variant)
+    db.flush()
+    today = date.today()
+    for n, (days_ago, payment_status) in enumerate([(0, "paid"), (3, "paid"), (3, "pending"), (40, "paid")]):
+        db.add(models.Order(
+            order_number=f"ORD-{n}", customer_id=customer.id, customer_name="A", customer_email="a@example.com",
+            customer_phone="0", shipping_address="Lagos", total_amount=Decimal("40"),
+            payment_status=payment_status,
+            created_at=datetime.combine(today - timedelta(days=days_ago), datetime.min.time()) + timedelta(hours=12),
+            items=[models.OrderItem(variant_id=variant.id, quantity=2, unit_price=Decimal("20"),
+                                    total_price=Decimal("40"))],
+        ))
+    db.commit()
+
+    query = order_export_service.export_query(today - timedelta(days=30), today, payment_status="paid")
+    rows = list(order_export_service.iter_rows(db, query))
+
+    assert [row[0] for row in rows] == ["ORD-1", "ORD-0"]
+    assert len(rows[0]) == len(order_export_service.EXPORT_HEADER)
+    assert rows[0][9:14] == ("Tee", "TEE-M", "M", None, 2)
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+import models
+from services import order_listing_service, sales_rollup_service
+
+
+@pytest.fixture
+def db(sqlite_db):
+    session = sqlite_db([models.Customer, models.Order])
+    customer = models.Customer(email="a@example.com")
+    session.add(customer)
+    session.flush()
+    start = datetime(2025, 1, 1, 12)
+    for n in range(23):
+        session.add(models.Order(
+            order_number=f"ORD-{n:03d}", customer_id=customer.id, customer_name="Ada" if n % 2 else "Bola",
+            customer_email="a@example.com", customer_phone="0", shipping_address="Lagos",
+            total_amount=Decimal("10"), status="pending" if n % 3 else "delivered",
+            created_at=start + timedelta(hours=n // 2),  # pairs share a timestamp
+        ))
+    session.commit()
+    return session
+
+
+def test_cursor_pages_cover_every_order_once_newest_first(db):
+    expected = [o.id for o in db.query(models.Order).order_by(
+        models.Order.created_at.desc(), models.Order.id.desc()
+    )]
+
+    seen, cursor = [], None
+    while True:
+        orders, cursor = order_listing_service.page(db, db.query(models.Order), limit=5, cursor=cursor)
+        seen.extend(o.id for o in orders)
+        if cursor is None:
+            break
+
+    assert seen == expected
+    offset_page, _ = order_listing_service.page(db, db.query(models.Order), limit=5, skip=5)
+    assert [o.id for o in offset_page] == expected[5:10]
+
+
+def test_filters_and_total_count(db):
+    conditions = order_listing_service.order_filters(status="pending", search="ada")
+    orders, cursor = order_listing_service.page(db, db.query(models.Order).filter(*conditions), limit=100)
+
+    assert cursor is None
+    assert all(o.status == "pending" and o.customer_name == "Ada" for o in orders)
+    assert order_listing_service.total_count(db, conditions, status="pending", search="ada") == len(orders) == 7
+
+
+def test_malformed_cursor_is_rejected(db):
+    with pytest.raises(ValueError):
+        order_listing_service.page(db, db.query(models.Order), limit=5, cursor="not-a-cursor")
+
+
+def test_payment_status_moves_outside_paid_refresh_cached_counts(db, fake_redis):
+    conditions = order_listing_service.order_filters(payment_status="pending")
+    assert order_listing_service.total_count(db, conditions, payment_status="pending") == 23
+
+    order = db.query(models.Order).first()
+    order.payment_status = "failed"
+    sales_rollup_service.payment_status_changed(db, order.id, "pending", "failed")
+    db.commit()
+
+    assert order_listing_service.total_count(db, conditions, payment_status="pending") == 22
@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+import models
+from services import outbox_service
+from utils import constants
+
+FLAKY = "test_flaky"
+
+
+def _add(db, count=1, **fields):
+    events = [outbox_service.enqueue(db, FLAKY, {"n": n}) for n in range(count)]
+    for event in events:
+        for name, value in fields.items():
+            setattr(event, name, value)
+    db.commit()
+    return events
+
+
+@pytest.fixture
+def deliveries(monkeypatch):
+    """Handler for FLAKY events; set `ok` to choose the outcome"""
+    state = {"ok": False, "calls": 0}
+
+    def handler(db, events):
+        state["calls"] += 1
+        return {event.id: state["ok"] for event in events}
+
+    monkeypatch.setitem(outbox_service.HANDLERS, FLAKY, handler)
+    return state
+
+
+def test_retry_delay_doubles_up_to_the_cap():
+    delays = [outbox_service._retry_delay(n).total_seconds() for n in range(1, 10)]
+
+    assert delays[:3] == [constants.OUTBOX_RETRY_BASE_SECONDS * m for m in (1, 2, 4)]
+    assert max(delays) == constants.OUTBOX_RETRY_MAX_SECONDS
+    assert delays == sorted(delays)
+
+
+def test_claim_skips_rows_that_are_not_due(pg_db):
+    due = _add(pg_db, count=2)
+    _add(pg_db, available_at=datetime.now(timezone.utc) + timedelta(minutes=5))
+    _add(pg_db, status="sent")
+    _add(pg_db, status="failed")
+
+    claimed = outbox_service.claim_due_events(pg_db, limit=10)
+
+    assert [event.id for event in claimed] == [event.id for event in due]
+    assert [event.id for event in outbox_service.claim_due_events(pg_db, limit=1)] == [due[0].id]
+
+
+def test_claim_skips_rows_locked_by_another_worker(pg_db, pg_sessionmaker):
+    events = _add(pg_db, count=3)
+    ids = [event.id for event in events]
+
+    other = pg_sessionmaker()
+    try:
+        first = [event.id for event in outbox_service.claim_due_events(other, limit=2)]
+        second = [event.id for event in outbox_service.claim_due_events(pg_db, limit=10)]
+    finally:
+        other.rollback()
+        other.close()
+
+    assert first == ids[:2]
+    assert second == ids[2:]
+
+
+def test_failed_delivery_is_rescheduled_with_backoff(pg_db, deliveries):
+    event, = _add(pg_db)
+
+    before = datetime.now(timezone.utc)
+    assert outbox_service.process_batch(pg_db, outbox_service.claim_due_events(pg_db, 10)) == \
+        {"sent": 0, "retry": 1, "failed": 0}
+    pg_db.refresh(event)
+    assert (event.status, event.attempts, event.last_error) == ("pending", 1, "Delivery failed")
+    first_wait = event.available_at - before
+    assert timedelta(seconds=constants.OUTBOX_RETRY_BASE_SECONDS) <= first_wait \
+        < timedelta(seconds=constants.OUTBOX_RETRY_BASE_SECONDS + 5)
+    # Not due again until the backoff has passed
+    assert outbox_service.claim_due_events(pg_db, 10) == []
+    pg_db.rollback()
+
+    pg_db.execute(update(models.OutboxEvent).values(available_at=datetime.now(timezone.utc)))
+    pg_db.commit()
+    before = datetime.now(timezone.utc)
+    outbox_service.process_batch(pg_db, outbox_service.claim_due_events(pg_db, 10))
+    pg_db.refresh(event)
+    assert event.attempts == 2
+    assert event.available_at - before >= timedelta(seconds=2 * constants.OUTBOX_RETRY_BASE_SECONDS)
+
+
+def test_delivery_after_a_retry_marks_the_row_sent(pg_db, deliveries):
+    event, = _add(pg_db, attempts=2, last_error="smtp timeout")
+    deliveries["ok"] = True
+
+    assert outbox_service.process_batch(pg_db, outbox_service.claim_due_events(pg_db, 10)) == \
+        {"sent": 1, "retry": 0, "failed": 0}
+    pg_db.refresh(event)
+    assert (event.status, event.attempts, event.last_error) == ("sent", 3, None)
+    assert event.processed_at is not None
+
+
+def test_row_fails_permanently_after_max_attempts(pg_db, deliveries):
+    event, = _add(pg_db)
+
+    for attempt in range(1, constants.OUTBOX_MAX_ATTEMPTS + 1):
+        pg_db.execute(update(models.OutboxEvent).values(available_at=datetime.now(timezone.utc)))
+        pg_db.commit()
+        summary = outbox_service.process_batch(pg_db, outbox_service.claim_due_events(pg_db, 10))
+        expected = "failed" if attempt == constants.OUTBOX_MAX_ATTEMPTS else "retry"
+        assert summary[expected] == 1
+
+    pg_db.refresh(event)
+    assert (event.status, event.attempts) == ("failed", constants.OUTBOX_MAX_ATTEMPTS)
+    assert event.processed_at is not None
+    assert deliveries["calls"] == constants.OUTBOX_MAX_ATTEMPTS
+
+    pg_db.execute(update(models.OutboxEvent).values(available_at=datetime.now(timezone.utc)))
+    pg_db.commit()
+    assert outbox_service.claim_due_events(pg_db, 10) == []
+
+
+def test_handler_errors_and_unknown_types_are_retried(pg_db, monkeypatch):
+    def broken(db, events):
+        raise RuntimeError("provider down")
+
+    monkeypatch.setitem(outbox_service.HANDLERS, FLAKY, broken)
+    crashed, = _add(pg_db)
+    unknown = outbox_service.enqueue(pg_db, "no_such_type", {})
+    pg_db.commit()
+
+    assert outbox_service.process_batch(pg_db, outbox_service.claim_due_events(pg_db, 10)) == \
+        {"sent": 0, "retry": 2, "failed": 0}
+    pg_db.refresh(crashed)
+    pg_db.refresh(unknown)
+    assert crashed.last_error == "provider down"
+    assert unknown.last_error == "No handler for no_such_type"
+
+
+def test_one_failing_send_does_not_resend_the_rest_of_the_batch(pg_db, monkeypatch):
+    customer = models.Customer(email="ada@example.com")
+    pg_db.add(customer)
+    pg_db.flush()
+    orders = [models.Order(order_number=f"ORD-{n}", customer_id=customer.id, customer_name="Ada Obi",
+                           customer_email="ada@example.com", customer_phone="0800", shipping_address="Lagos",
+                           total_amount=50) for n in range(3)]
+    pg_db.add_all(orders)
+    pg_db.flush()
+    for order in orders:
+        outbox_service.enqueue(pg_db, outbox_service.ORDER_CONFIRMATION_EMAIL, {"order_id": order.id})
+    pg_db.commit()
+
+    sent = []
+
+    def send(order):
+        if order.order_number == "ORD-1":
+            raise RuntimeError("mailgun 502")
+        sent.append(order.order_number)
+        return True
+
+    monkeypatch.setitem(outbox_service.HANDLERS, outbox_service.ORDER_CONFIRMATION_EMAIL,
+                        outbox_service._order_sender(send))
+
+    assert outbox_service.process_batch(pg_db, outbox_service.claim_due_events(pg_db, 10)) == \
+        {"sent": 2, "retry": 1, "failed": 0}
+    pg_db.execute(update(models.OutboxEvent).values(available_at=datetime.now(timezone.utc)))
+    pg_db.commit()
+    outbox_service.process_batch(pg_db, outbox_service.claim_due_events(pg_db, 10))
+
+    assert sent == ["ORD-0", "ORD-2"]
+    retried, = pg_db.query(models.OutboxEvent).filter(models.OutboxEvent.status == "pending")
+    assert (retried.payload["order_id"], retried.attempts, retried.last_error) == (orders[1].id, 2, "mailgun 502")
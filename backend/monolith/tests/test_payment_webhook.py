@@ -0,0 +1,87 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+
+import models
+from database import get_db
+from routers import payment_webhook
+from utils.webhook_dedupe import WebhookDeduplicator
+
+
+def _fail_once(method):
+    calls = {"n": 0}
+
+    def wrapper(*args, **kwargs):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise OperationalError("statement", {}, Exception("server closed the connection unexpectedly"))
+        return method(*args, **kwargs)
+    return wrapper
+
+
+@pytest.fixture
+def webhook(pg_db, pg_sessionmaker, monkeypatch):
+    """Client for the webhook route, with the original delivery of evt-1 already stored"""
+    monkeypatch.setattr(payment_webhook.paystack_client, "verify_webhook_signature", lambda body, signature: True)
+    dedupe = WebhookDeduplicator(redis_client=None, capacity=1000)
+    monkeypatch.setattr(payment_webhook, "webhook_deduplicator", dedupe)
+
+    pg_db.add(models.WebhookEventKey(event_id="evt-1"))
+    pg_db.add(models.WebhookEvent(event_id="evt-1", event_type="charge.success", payment_reference="ref-1",
+                                  status="processed", raw_data={"id": "evt-1"}))
+    pg_db.commit()
+
+    request_db = pg_sessionmaker()
+    app = FastAPI()
+    app.include_router(payment_webhook.router, prefix="/api/payment")
+    app.dependency_overrides[get_db] = lambda: request_db
+    yield TestClient(app), request_db, dedupe
+    request_db.close()
+
+
+def _deliver(client, event_id="evt-1"):
+    body = {"event": "charge.success", "id": event_id, "data": {"reference": "ref-1", "amount": 5000, "currency": "NGN"}}
+    return client.post("/api/payment/webhook", content=json.dumps(body), headers={"x-paystack-signature": "sig"})
+
+
+def _stored(db, event_id="evt-1"):
+    db.expire_all()
+    return (db.query(models.WebhookEventKey).filter_by(event_id=event_id).count(),
+            db.query(models.WebhookEvent).filter_by(event_id=event_id).count())
+
+
+def test_duplicate_whose_commit_fails_keeps_the_original_key(webhook, pg_db, monkeypatch):
+    client, request_db, _ = webhook
+    # This process has never seen evt-1, so the duplicate reaches the INSERT
+    monkeypatch.setattr(request_db, "commit", _fail_once(request_db.commit))
+
+    assert _deliver(client).status_code == 500
+    assert _stored(pg_db) == (1, 1)
+
+
+def test_duplicate_whose_key_lookup_fails_keeps_the_original_key(webhook, pg_db, monkeypatch):
+    client, request_db, dedupe = webhook
+    dedupe.mark_seen("evt-1")  # Bloom positive: confirmed with a SELECT, which fails
+    monkeypatch.setattr(request_db, "query", _fail_once(request_db.query))
+
+    assert _deliver(client).status_code == 500
+    assert _stored(pg_db) == (1, 1)
+    assert _deliver(client).json()["status"] == "duplicate"
+
+
+def test_failure_after_storing_clears_the_event_for_retry(webhook, pg_db, monkeypatch):
+    client, _, dedupe = webhook
+    monkeypatch.setattr(payment_webhook.settings, "WEBHOOK_INGEST_MODE", "inline")
+
+    def broken(data, db):
+        raise RuntimeError("order creation failed")
+
+    monkeypatch.setattr(payment_webhook, "handle_successful_payment", broken)
+
+    assert _deliver(client, "evt-2").status_code == 500
+    assert _stored(pg_db, "evt-2") == (0, 0)
+    assert dedupe.is_new("evt-2") is None  # confirmed against the (now empty) key table
+    assert _stored(pg_db) == (1, 1)
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+from paystack_stub import PaystackStub
+
+from utils.http_client import CircuitBreaker
+from utils.payment import AsyncPaystackClient, PaystackAPIError, PaystackClient
+
+
+@pytest.fixture
+def stub():
+    with PaystackStub() as server:
+        yield server
+
+
+def make_client(stub, cls=PaystackClient, **kwargs):
+    client = cls(base_url=stub.url, **kwargs)
+    client.secret_key = "sk_test_stub"
+    return client
+
+
+def test_verify_payment_reuses_pooled_connection(stub):
+    client = make_client(stub)
+    try:
+        for i in range(3):
+            response = client.verify_payment(f"ref-{i}")
+            assert response["data"]["status"] == "success"
+        metrics = client.get_metrics()["endpoints"]["/transaction/verify/{reference}"]
+        assert metrics["calls"] == 3
+        assert metrics["errors"] == 0
+        assert len(stub.peers) == 1  # all three calls over one kept-alive connection
+    finally:
+        client.close()
+
+
+def test_verify_payment_retries_transient_errors(stub, monkeypatch):
+    monkeypatch.setattr("utils.payment.backoff_delay", lambda attempt: 0)
+    client = make_client(stub, max_retries=3)
+    try:
+        response = client.verify_payment("flaky-2-abc")
+        assert response["status"] is True
+        assert stub.calls["flaky-2-abc"] == 3
+        assert client.get_metrics()["endpoints"]["/transaction/verify/{reference}"]["retries"] == 2
+    finally:
+        client.close()
+
+
+def test_initialize_payment_is_not_retried(stub, monkeypatch):
+    monkeypatch.setattr("utils.payment.backoff_delay", lambda attempt: 0)
+    client = make_client(stub, max_retries=3)
+    try:
+        with pytest.raises(PaystackAPIError):
+            client.initialize_payment(amount=100, email="a@b.com", reference="down-init")
+        assert stub.calls["init:down-init"] == 1
+    finally:
+        client.close()
+
+
+def test_circuit_opens_after_repeated_failures(stub, monkeypatch):
+    monkeypatch.setattr("utils.payment.backoff_delay", lambda attempt: 0)
+    client = make_client(stub, max_retries=0)
+    client.breaker.failure_threshold = 2
+    try:
+        for _ in range(2):
+            with pytest.raises(PaystackAPIError):
+                client.verify_payment("down-1")
+        with pytest.raises(PaystackAPIError, match="circuit open"):
+            client.verify_payment("ref-ok")
+        # The short-circuited call never reached the gateway
+        assert stub.calls["ref-ok"] == 0
+    finally:
+        client.close()
+
+
+def test_async_client_verifies_concurrently(stub):
+    async def run():
+        client = make_client(stub, cls=AsyncPaystackClient)
+        try:
+            results = await asyncio.gather(*[
+                client.verify_payment(f"slow-50-{i}") for i in range(5)
+            ])
+        finally:
+            await client.aclose()
+        return results
+
+    results = asyncio.run(run())
+    assert [r["data"]["status"] for r in results] == ["success"] * 5
+
+
+def test_cancelled_trial_does_not_wedge_half_open_circuit(stub, monkeypatch):
+    async def run():
+        client = make_client(stub, cls=AsyncPaystackClient, max_retries=0)
+        client.breaker.failure_threshold = 1
+        client.breaker.reset_timeout = 0
+        try:
+            with pytest.raises(PaystackAPIError):
+                await client.verify_payment("down-1")
+            # The half-open trial is cancelled mid-flight (client went away)
+            trial = asyncio.create_task(client.verify_payment("slow-300-trial"))
+            await asyncio.sleep(0.05)
+            trial.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await trial
+            assert client.breaker.state != CircuitBreaker.CLOSED
+            return await client.verify_payment("ref-after")
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run())["data"]["status"] == "success"
+
+
+def test_unreported_trial_is_given_up_after_reset_timeout(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("utils.http_client.time.monotonic", lambda: clock[0])
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+
+    clock[0] += 30
+    assert breaker.allow_request()  # the trial, which never reports back
+    assert not breaker.allow_request()
+    clock[0] += 30
+    assert breaker.allow_request()
@@ -0,0 +1,133 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from paystack_stub import PaystackStub
+
+import models
+from services import reconciliation_service
+from services.reconciliation_service import verify_references
+from utils.payment import AsyncPaystackClient
+
+
+@pytest.fixture
+def stub():
+    with PaystackStub() as server:
+        yield server
+
+
+def test_verify_references_bounds_concurrency(stub):
+    async def run():
+        client = AsyncPaystackClient(base_url=stub.url)
+        client.secret_key = "sk_test_stub"
+        try:
+            return await verify_references(client, [f"slow-40-{i}" for i in range(12)], concurrency=3)
+        finally:
+            await client.aclose()
+
+    results = asyncio.run(run())
+    assert len(results) == 12
+    assert all(result["status"] == "success" for result in results.values())
+    assert stub.max_in_flight <= 3
+
+
+def test_verify_references_maps_gateway_outcomes(stub, monkeypatch):
+    monkeypatch.setattr("utils.payment.backoff_delay", lambda attempt: 0)
+    stub.amounts["paid-1"] = 250000
+
+    async def run():
+        client = AsyncPaystackClient(base_url=stub.url, max_retries=0)
+        client.secret_key = "sk_test_stub"
+        try:
+            return await verify_references(
+                client, ["paid-1", "failed-1", "abandoned-1", "unknown-1", "down-1"], concurrency=4
+            )
+        finally:
+            await client.aclose()
+
+    results = asyncio.run(run())
+    assert results["paid-1"] == {"status": "success", "amount": 250000, "currency": "NGN"}
+    assert results["failed-1"]["status"] == "failed"
+    assert results["abandoned-1"]["status"] == "abandoned"
+    assert results["unknown-1"]["status"] == "not_found"
+    assert results["down-1"]["status"] == "error"
+
+
+@pytest.fixture
+def stale_checkouts(pg_db, pg_sessionmaker, stub, monkeypatch):
+    """Checkouts whose webhook never came, a mix of live and expired ones"""
+    monkeypatch.setattr(reconciliation_service, "SessionLocal", pg_sessionmaker)
+    monkeypatch.setattr("utils.payment.backoff_delay", lambda attempt: 0)
+    pg_db.add(models.Category(name="Shoes", slug="shoes"))
+    pg_db.flush()
+    product = models.Product(name="Runner", category="shoes")
+    pg_db.add(product)
+    pg_db.flush()
+    variant = models.ProductVariant(product_id=product.id, size="42", price=Decimal("50"), sku="RUN-42",
+                                    stock_quantity=10)
+    pg_db.add(variant)
+    pg_db.flush()
+
+    now = datetime.now(timezone.utc)
+    live, expired = now + timedelta(minutes=30), now - timedelta(minutes=5)
+    for reference, expires_at in [("paid-1", expired), ("failed-1", live), ("abandoned-live", live),
+                                  ("abandoned-old", expired), ("unknown-live", live), ("unknown-old", expired),
+                                  ("down-1", live)]:
+        data = {
+            "checkout_data": {
+                "idempotency_key": f"idem-{reference}", "payment_method": "paystack", "customer_name": "Ada Obi",
+                "customer_email": "ada@example.com", "customer_phone": "0800", "shipping_address": "Lagos",
+            },
+            "cart_items": [{"variant_id": variant.id, "quantity": 1, "unit_price": "50", "total_price": "50"}],
+            "total_amount": "50",
+        }
+        pg_db.add(models.PendingCheckout(idempotency_key=f"idem-{reference}", payment_reference=reference,
+                                         checkout_data=data, created_at=now - timedelta(hours=1),
+                                         expires_at=expires_at))
+    pg_db.commit()
+    stub.amounts["paid-1"] = 5000
+    return pg_db
+
+
+def _reconcile(stub):
+    async def run():
+        client = AsyncPaystackClient(base_url=stub.url, max_retries=0)
+        client.secret_key = "sk_test_stub"
+        try:
+            return await reconciliation_service.reconcile(client, page_size=3, concurrency=4)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def _statuses(db):
+    db.expire_all()
+    return dict(db.query(models.PendingCheckout.payment_reference, models.PendingCheckout.status))
+
+
+def test_reconcile_creates_orders_and_closes_dead_checkouts(stale_checkouts, stub):
+    summary = _reconcile(stub)
+
+    assert summary == {"checked": 7, "confirmed": 1, "created": 1, "closed_failed": 1, "closed_abandoned": 2,
+                       "unresolved": 2, "error": 1}
+    assert _statuses(stale_checkouts) == {
+        "paid-1": "completed", "failed-1": "failed", "abandoned-old": "abandoned", "unknown-old": "abandoned",
+        "abandoned-live": "pending", "unknown-live": "pending", "down-1": "pending",
+    }
+    assert [order.payment_reference for order in stale_checkouts.query(models.Order)] == ["paid-1"]
+
+    run = stale_checkouts.query(models.ReconciliationRun).one()
+    assert (run.status, run.checked, run.confirmed, run.orders_created, run.closed, run.errors) == \
+        ("completed", 7, 1, 1, 3, 1)
+    assert run.details == {"paid-1": "created", "failed-1": "closed_failed", "abandoned-old": "closed_abandoned",
+                           "unknown-old": "closed_abandoned", "down-1": "error"}
+
+
+def test_reconcile_only_rechecks_unresolved_checkouts(stale_checkouts, stub):
+    _reconcile(stub)
+
+    assert _reconcile(stub)["checked"] == 3
+    assert stub.calls["unknown-old"] == stub.calls["paid-1"] == 1
+    assert stub.calls["unknown-live"] == stub.calls["down-1"] == 2
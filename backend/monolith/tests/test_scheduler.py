@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import text
+
+from utils.scheduler import CronSchedule, Scheduler
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_cron_next_after():
+    assert CronSchedule("*/15 * * * *").next_after(utc(2025, 1, 1, 10, 7)) == utc(2025, 1, 1, 10, 15)
+    assert CronSchedule("*/15 * * * *").next_after(utc(2025, 1, 1, 10, 45)) == utc(2025, 1, 1, 11, 0)
+    assert CronSchedule("17 3 * * *").next_after(utc(2025, 1, 31, 3, 17)) == utc(2025, 2, 1, 3, 17)
+    assert CronSchedule("0 0 29 2 *").next_after(utc(2025, 3, 1)) == utc(2028, 2, 29, 0, 0)
+    # 2025-01-05 is a Sunday; 7 is accepted as Sunday too
+    assert CronSchedule("30 9 * * 7").next_after(utc(2025, 1, 1)) == utc(2025, 1, 5, 9, 30)
+    assert CronSchedule("0 8 * * 1-5").next_after(utc(2025, 1, 4, 12)) == utc(2025, 1, 6, 8, 0)
+    # Day-of-month and day-of-week both restricted: either matches
+    assert CronSchedule("0 0 15 * 1").next_after(utc(2025, 1, 1)) == utc(2025, 1, 6, 0, 0)
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "* 24 * * *", "*/0 * * * *", "5-2 * * * *", "a * * * *"])
+def test_cron_rejects_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_trigger_records_metrics_and_prevents_overlap():
+    calls = []
+
+    async def scenario():
+        scheduler = Scheduler()
+        release = asyncio.Event()
+
+        async def slow_job():
+            calls.append("slow")
+            await release.wait()
+
+        def failing_job():
+            raise RuntimeError("boom")
+
+        scheduler.register("slow", "0 0 1 1 *", slow_job)
+        scheduler.register("failing", "0 0 1 1 *", failing_job)
+
+        assert scheduler.trigger("slow")
+        await asyncio.sleep(0)
+        assert not scheduler.trigger("slow")
+        release.set()
+        assert scheduler.trigger("failing")
+        await asyncio.gather(*scheduler._tasks)
+        return {job["name"]: job for job in scheduler.list_jobs()}
+
+    jobs = asyncio.run(scenario())
+    assert calls == ["slow"]
+    assert jobs["slow"]["runs"] == 1 and jobs["slow"]["last_status"] == "success"
+    assert jobs["slow"]["running"] is False
+    assert jobs["failing"]["failures"] == 1 and jobs["failing"]["last_error"] == "boom"
+    assert jobs["failing"]["max_duration_ms"] >= 0
+
+
+def test_run_fires_due_jobs_until_stopped():
+    async def scenario():
+        scheduler = Scheduler(max_sleep=0.05)
+        fired = asyncio.Event()
+        job = scheduler.register("every_minute", "* * * * *", fired.set)
+        stop = asyncio.Event()
+        runner = asyncio.create_task(scheduler.run(stop))
+        await asyncio.sleep(0.01)
+        # Pretend the next slot is already due
+        job.fire_at = datetime.now(timezone.utc)
+        await asyncio.wait_for(fired.wait(), timeout=2)
+        stop.set()
+        await runner
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.runs == 1
+    assert job.next_slot > datetime.now(timezone.utc)
+
+
+def _advisory_locks(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT count(*) FROM pg_locks WHERE locktype = 'advisory'")).scalar()
+
+
+def test_failed_release_does_not_pool_a_connection_holding_the_lock(pg_engine):
+    scheduler = Scheduler(pg_engine)
+    job = scheduler.register("nightly", "0 3 * * *", lambda: None)
+    lease = scheduler._acquire(job, utc(2025, 1, 1, 3))
+    assert lease is not None and _advisory_locks(pg_engine) == 1
+
+    # The lease UPDATE fails, so the unlock never runs on that session
+    with pg_engine.begin() as conn:
+        conn.execute(text("DROP TABLE scheduler_leases"))
+    scheduler._release(lease, job)
+
+    assert _advisory_locks(pg_engine) == 0
+    other = Scheduler(pg_engine)
+    assert other._acquire(other.register("nightly", "0 3 * * *", lambda: None), None) is not None
+
+
+def test_reconciliation_is_only_scheduled_with_a_paystack_key(monkeypatch):
+    from services import scheduled_jobs
+
+    monkeypatch.setattr(scheduled_jobs.settings, "PAYSTACK_SECRET_KEY", "")
+    assert "reconcile_payments" not in scheduled_jobs.build_scheduler().jobs
+    monkeypatch.setattr(scheduled_jobs.settings, "PAYSTACK_SECRET_KEY", "sk_test_x")
+    assert "reconcile_payments" in scheduled_jobs.build_scheduler().jobs
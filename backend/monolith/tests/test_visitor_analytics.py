@@ -0,0 +1,122 @@
+import asyncio
+import random
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+import pytest
+from pydantic import ValidationError
+
+import schemas
+from services import visitor_analytics_service
+from utils import constants
+
+
+class SketchRedis:
+    """PFADD/PFCOUNT (exact), INCR, MGET, EXPIRE and BITFIELD u32 #n over dicts"""
+
+    def __init__(self):
+        self.sets = defaultdict(set)
+        self.values = {}
+        self.fields = defaultdict(Counter)
+
+    def pfadd(self, key, *items):
+        self.sets[key].update(items)
+
+    def pfcount(self, *keys):
+        return len(set().union(*(self.sets.get(key, set()) for key in keys)))
+
+    def incr(self, key):
+        self.values[key] = self.values.get(key, 0) + 1
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def expire(self, key, ttl):
+        pass
+
+    def execute_command(self, command, key, *args):
+        assert command == "BITFIELD"
+        args, results = list(args), []
+        while args:
+            op = args.pop(0)
+            if op == "OVERFLOW":
+                args.pop(0)
+                continue
+            assert args.pop(0) == "u32"
+            index = int(args.pop(0).lstrip("#"))
+            if op == "INCRBY":
+                self.fields[key][index] += args.pop(0)
+            results.append(self.fields[key][index])
+        return results
+
+    def pipeline(self, transaction=True):
+        return Pipeline(self)
+
+
+class Pipeline:
+    def __init__(self, client):
+        self.client, self.calls = client, []
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, args))
+
+    def execute(self):
+        calls, self.calls = self.calls, []
+        return [getattr(self.client, name)(*args) for name, args in calls]
+
+
+class AsyncPipeline(Pipeline):
+    async def execute(self):
+        return Pipeline.execute(self)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = SketchRedis()
+    async_client = type("AsyncSketchRedis", (), {"pipeline": lambda self, transaction=True: AsyncPipeline(client)})()
+    monkeypatch.setattr(visitor_analytics_service, "redis_client", client)
+    monkeypatch.setattr(visitor_analytics_service, "async_redis_client", async_client)
+    return client
+
+
+def test_visitors_page_views_and_product_views(fake_redis):
+    today = datetime.now(timezone.utc).date()
+    page, product = visitor_analytics_service.PAGE_VIEW, visitor_analytics_service.PRODUCT_VIEW
+    for visitor, events in [
+        ("v1", [{"type": page}, {"type": product, "product_id": 1}, {"type": product, "product_id": 1}]),
+        ("v2", [{"type": page}, {"type": product, "product_id": 2}]),
+        ("v1", [{"type": page}, {"type": product, "product_id": 1}]),
+    ]:
+        assert asyncio.run(visitor_analytics_service.record(visitor, events))
+
+    assert visitor_analytics_service.unique_visitors(today, today) == 2
+    assert visitor_analytics_service.page_views(today, today) == 3
+    assert visitor_analytics_service.product_views([1, 2, 3], today, today) == {1: 3, 2: 1, 3: 0}
+
+
+def test_sketch_never_undercounts(fake_redis, monkeypatch):
+    monkeypatch.setattr(constants, "VISITOR_CMS_WIDTH", 16)  # force collisions
+    today = datetime.now(timezone.utc).date()
+    rng = random.Random(7)
+    views = Counter(rng.randint(1, 200) for _ in range(2000))
+    events = [{"type": visitor_analytics_service.PRODUCT_VIEW, "product_id": p} for p, n in views.items() for _ in range(n)]
+    asyncio.run(visitor_analytics_service.record("v1", events))
+
+    estimates = visitor_analytics_service.product_views(list(views), today, today)
+    assert all(estimates[p] >= n for p, n in views.items())
+    assert all(len(set(p // 16 for p in visitor_analytics_service.sketch_positions(pid))) == constants.VISITOR_CMS_DEPTH
+               for pid in views)  # one counter per row
+
+
+def test_readers_return_none_without_redis(monkeypatch):
+    monkeypatch.setattr(visitor_analytics_service, "redis_client", None)
+    today = datetime.now(timezone.utc).date()
+    assert visitor_analytics_service.unique_visitors(today, today) is None
+    assert visitor_analytics_service.product_views([1], today, today) is None
+
+
+def test_product_view_needs_a_product():
+    with pytest.raises(ValidationError):
+        schemas.VisitorEventBatch(events=[{"type": "product_view"}])
+    with pytest.raises(ValidationError):
+        schemas.VisitorEventBatch(events=[{"type": "page_view"}] * (constants.VISITOR_EVENTS_MAX_BATCH + 1))
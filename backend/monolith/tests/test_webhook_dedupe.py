@@ -0,0 +1,63 @@
+from utils.webhook_dedupe import BloomFilter, WebhookDeduplicator
+
+
+class DictRedis:
+    """Minimal SET NX / EXISTS / DELETE semantics for exercising the Redis tier"""
+
+    def __init__(self):
+        self.data = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    for i in range(10_000):
+        bloom.add(f"evt-{i}")
+    assert all(f"evt-{i}" in bloom for i in range(10_000))
+    false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+    assert false_positives < 300
+
+
+def test_without_redis_new_ids_skip_the_database_and_repeats_are_confirmed():
+    dedupe = WebhookDeduplicator(redis_client=None, capacity=1000)
+    assert dedupe.is_new("evt-1") is True
+    dedupe.mark_seen("evt-1")
+    # Bloom positive: caller must confirm against webhook_event_keys
+    assert dedupe.is_new("evt-1") is None
+
+
+def test_redis_tier_rejects_duplicates_and_release_allows_retry():
+    dedupe = WebhookDeduplicator(redis_client=DictRedis(), capacity=1000)
+    assert dedupe.is_new("evt-1") is True
+    dedupe.mark_seen("evt-1")
+    assert dedupe.is_new("evt-1") is False
+    dedupe.release("evt-1")
+    assert dedupe.is_new("evt-1") is True
+    assert dedupe.get_stats()["duplicate"] == 1
+
+
+def test_checking_reserves_nothing_until_the_event_is_marked_seen():
+    # A delivery that dies between the check and its commit must not turn
+    # Paystack's retries away as duplicates
+    for redis_client in (DictRedis(), None):
+        dedupe = WebhookDeduplicator(redis_client=redis_client, capacity=1000)
+        assert dedupe.is_new("evt-1") is True
+        assert dedupe.is_new("evt-1") is True
+
+
+def test_filter_rotation_bounds_memory():
+    dedupe = WebhookDeduplicator(redis_client=None, capacity=100)
+    for i in range(1000):
+        dedupe.mark_seen(f"evt-{i}")
+    assert dedupe.get_stats()["bloom_items"] <= 200
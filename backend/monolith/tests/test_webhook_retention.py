@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from services import webhook_retention_service as retention
+
+PARTITIONED_SCHEMA = """
+    DROP TABLE webhook_events;
+    CREATE TABLE webhook_events (
+        id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+        event_id VARCHAR(255) NOT NULL,
+        status VARCHAR(50),
+        raw_data JSONB NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at);
+    CREATE INDEX ix_webhook_events_event_id ON webhook_events (event_id);
+    CREATE TABLE webhook_events_default PARTITION OF webhook_events DEFAULT;
+"""
+
+
+@pytest.fixture
+def db(pg_db):
+    pg_db.execute(text(PARTITIONED_SCHEMA))
+    pg_db.commit()
+    return pg_db
+
+
+def _months(count):
+    start = retention.month_start(datetime.now(timezone.utc))
+    return [retention.add_months(start, n) for n in range(count)]
+
+
+def _rows_by_table(db):
+    return dict(db.execute(text(
+        "SELECT tableoid::regclass::text, count(*) FROM webhook_events GROUP BY 1"
+    )).all())
+
+
+def test_creates_upcoming_partitions_once(db):
+    expected = [retention.partition_name(month) for month in _months(3)]
+
+    assert retention.ensure_partitions(db, months_ahead=2) == expected
+    assert retention.list_partitions(db) == expected
+    assert retention.ensure_partitions(db, months_ahead=2) == []
+
+
+def test_rows_in_the_default_partition_are_moved_into_the_new_month(db):
+    # Maintenance fell behind: this month's events went to the default partition
+    db.execute(text("""
+        INSERT INTO webhook_events (event_id, raw_data, created_at)
+        SELECT 'evt-' || g, jsonb_build_object('n', g), now() - make_interval(secs => g)
+        FROM generate_series(1, 25) g
+    """))
+    db.commit()
+    this_month = retention.partition_name(_months(1)[0])
+
+    assert this_month in retention.ensure_partitions(db, months_ahead=1)
+    assert _rows_by_table(db) == {this_month: 25}
+    # Attached like any other partition: inserts and the parent's indexes reach it
+    db.execute(text("INSERT INTO webhook_events (event_id, raw_data) VALUES ('evt-new', '{}')"))
+    assert _rows_by_table(db) == {this_month: 26}
+    assert db.execute(text(
+        "SELECT count(*) FROM pg_indexes WHERE tablename = :name"
+    ), {"name": this_month}).scalar() == 2
+
+
+def test_a_failing_month_does_not_block_later_ones(db, monkeypatch):
+    months = _months(3)
+    create = retention._create_partition
+
+    def flaky(session, lower):
+        if lower == months[1]:
+            raise RuntimeError("lock timeout")
+        return create(session, lower)
+
+    monkeypatch.setattr(retention, "_create_partition", flaky)
+    with pytest.raises(RuntimeError, match=retention.partition_name(months[1])):
+        retention.ensure_partitions(db, months_ahead=2)
+    assert retention.list_partitions(db) == [retention.partition_name(months[0]), retention.partition_name(months[2])]
+
+
+def test_expired_partitions_are_dropped(db):
+    start = retention.month_start(datetime.now(timezone.utc))
+    for offset in (-8, -7, -6, -1, 0):
+        retention._create_partition(db, retention.add_months(start, offset))
+    db.commit()
+
+    dropped = retention.drop_expired_partitions(db, retention_months=6)
+
+    assert dropped == [retention.partition_name(retention.add_months(start, n)) for n in (-8, -7)]
+    assert len(retention.list_partitions(db)) == 3
+
+
+def test_old_event_keys_are_pruned_in_batches(db):
+    now = datetime.now(timezone.utc)
+    db.execute(text("""
+        INSERT INTO webhook_event_keys (event_id, created_at)
+        SELECT 'old-' || g, :old FROM generate_series(1, 7) g
+        UNION ALL SELECT 'new-' || g, :new FROM generate_series(1, 3) g
+    """), {"old": now - timedelta(days=40), "new": now - timedelta(days=1)})
+    db.commit()
+
+    assert retention.prune_event_keys(db, retention_days=30, batch_size=3) == 7
+    assert db.execute(text("SELECT count(*) FROM webhook_event_keys")).scalar() == 3
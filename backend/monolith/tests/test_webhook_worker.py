@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+import models
+from services import webhook_service
+from utils import constants
+
+
+def _checkout(reference, variant_id):
+    return {
+        "checkout_data": {
+            "idempotency_key": f"idem-{reference}", "payment_method": "paystack", "customer_name": "Ada Obi",
+            "customer_email": f"{reference}@example.com", "customer_phone": "0800", "shipping_address": "Lagos",
+        },
+        "cart_items": [{"variant_id": variant_id, "quantity": 1, "unit_price": "50", "total_price": "50"}],
+        "total_amount": "50",
+    }
+
+
+def _event(reference, currency="NGN"):
+    return models.WebhookEvent(
+        event_id=f"evt-{reference}", event_type="charge.success", payment_reference=reference, status="queued",
+        raw_data={"event": "charge.success", "data": {"reference": reference, "amount": 5000, "currency": currency}},
+    )
+
+
+@pytest.fixture
+def queue(pg_db, pg_sessionmaker, monkeypatch):
+    monkeypatch.setattr(webhook_service, "SessionLocal", pg_sessionmaker)
+    pg_db.add(models.Category(name="Shoes", slug="shoes"))
+    pg_db.flush()
+    product = models.Product(name="Runner", category="shoes")
+    pg_db.add(product)
+    pg_db.flush()
+    variant = models.ProductVariant(product_id=product.id, size="42", price=Decimal("50"), sku="RUN-42",
+                                    stock_quantity=10)
+    pg_db.add(variant)
+    pg_db.flush()
+
+    expires = datetime.now(timezone.utc) + timedelta(hours=1)
+    for reference in ("good-1", "poison", "good-2", "no-currency"):
+        data = _checkout(reference, variant.id)
+        if reference == "poison":
+            del data["checkout_data"]  # passes the amount check, then breaks order creation
+        pg_db.add(models.PendingCheckout(idempotency_key=f"idem-{reference}", payment_reference=reference,
+                                         checkout_data=data, expires_at=expires))
+    # The poison event sits between two good ones, in claim (id) order
+    for event in (_event("good-1"), _event("poison"), _event("good-2"), _event("no-currency", currency=None)):
+        pg_db.add(event)
+        pg_db.flush()
+    pg_db.commit()
+    return pg_db
+
+
+def _statuses(db):
+    db.expire_all()
+    return {event.payment_reference: (event.status, event.attempts) for event in db.query(models.WebhookEvent)}
+
+
+def test_poison_event_does_not_hold_back_the_batch(queue):
+    summary = webhook_service.drain_once(batch_size=10)
+
+    assert summary == {"created": 2, "invalid": 1, "error": 1}
+    assert _statuses(queue) == {
+        "good-1": ("processed", 0), "good-2": ("processed", 0),
+        "no-currency": ("failed", 0), "poison": ("queued", 1),
+    }
+    assert {order.payment_reference for order in queue.query(models.Order)} == {"good-1", "good-2"}
+    assert queue.query(models.ProductVariant.stock_quantity).scalar() == 8
+
+
+def test_poison_event_is_failed_after_max_attempts(queue):
+    for _ in range(constants.WEBHOOK_MAX_ATTEMPTS):
+        webhook_service.drain_once(batch_size=10)
+
+    assert _statuses(queue)["poison"] == ("failed", constants.WEBHOOK_MAX_ATTEMPTS)
+    assert webhook_service.drain_once(batch_size=10) == {}
@@ -10,6 +10,7 @@ from database import get_db
 from sqlalchemy.orm import Session
 import models
 from utils.constants import ADMIN_ROLE
+from utils.hot_queries import admin_by_email
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
@@ -78,7 +79,7 @@ def verify_token(token: str) -> Optional[Dict[str, Any]]:
 
 def authenticate_admin(email: str, password: str, db: Session) -> Optional[models.AdminUser]:
     """Authenticate admin user against the database"""
-    admin_user = db.query(models.AdminUser).filter(models.AdminUser.email == email).first()
+    admin_user = admin_by_email(db, email)
     if admin_user and verify_password(password, admin_user.hashed_password):
         return admin_user
     return None
@@ -92,7 +93,7 @@ def get_current_admin_from_cookie(token: str = Cookie(None, alias="admin_token")
     if not email:
         raise HTTPException(status_code=401, detail="Invalid token payload")
     
-    admin_user = db.query(models.AdminUser).filter(models.AdminUser.email == email).first()
+    admin_user = admin_by_email(db, email)
     if not admin_user or not admin_user.is_active:
         raise HTTPException(status_code=401, detail="Admin user not found or inactive")
 
@@ -132,7 +133,7 @@ def get_current_admin_user(token: str = Cookie(None, alias="admin_token"), db: S
         )
     
     # Query the admin user from database
-    admin_user = db.query(models.AdminUser).filter(models.AdminUser.email == email).first()
+    admin_user = admin_by_email(db, email)
     if not admin_user or not admin_user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,6 +1,7 @@
 # file: utils/cache.py
 import logging
 import redis
+import redis.asyncio
 import json
 from typing import Optional
 from config import settings
@@ -19,6 +20,14 @@ except redis.ConnectionError:
     redis_client = None
     print("Warning: Redis not available, caching disabled")
 
+# Same server for routes running on the event loop; connects lazily
+async_redis_client = redis.asyncio.Redis(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=settings.REDIS_DB,
+    decode_responses=True
+) if redis_client else None
+
 def get_cache_key(prefix: str, **kwargs) -> str:
     """Generate cache key from prefix and parameters"""
     params = "_".join([f"{k}:{v}" for k, v in sorted(kwargs.items())])
@@ -43,6 +52,25 @@ def set_cache(key: str, data: dict, expire: int = 3600) -> None:
     except redis.RedisError:
         pass
 
+async def async_get_from_cache(key: str) -> Optional[dict]:
+    """Get data from Redis cache without blocking the event loop"""
+    if not async_redis_client:
+        return None
+    try:
+        data = await async_redis_client.get(key)
+        return json.loads(data) if data else None
+    except (json.JSONDecodeError, redis.RedisError):
+        return None
+
+async def async_set_cache(key: str, data: dict, expire: int = 3600) -> None:
+    """Set data in Redis cache with expiration, without blocking the event loop"""
+    if not async_redis_client:
+        return
+    try:
+        await async_redis_client.setex(key, expire, json.dumps(data, default=str))
+    except redis.RedisError:
+        pass
+
 def invalidate_cache(product_id: Optional[int] = None):
     """Invalidate product-related cache entries"""
     if not redis_client:
@@ -1,8 +1,15 @@
 from functools import wraps
 from typing import Callable, Any, Optional
 import hashlib
+import inspect
 import json
-from .cache import get_from_cache, set_cache
+
+from fastapi.encoders import jsonable_encoder
+
+from .cache import get_from_cache, set_cache, async_get_from_cache, async_set_cache
+
+# Session arguments never take part in the cache key
+SESSION_ARGS = ("db",)
 
 def cached(
     prefix: str,
@@ -10,39 +17,57 @@ def cached(
     key_builder: Optional[Callable] = None
 ):
     """
-    Cache decorator for FastAPI endpoints
-    
+    Cache decorator for FastAPI endpoints (sync or async)
+
+    Results are stored as their JSON-compatible form (jsonable_encoder), so
+    endpoints should return Pydantic models or plain data, not ORM objects.
+    Async endpoints use the asyncio Redis client.
+
     Usage:
         @cached("products", expire=3600)
         def get_products(db: Session, skip: int = 0, limit: int = 100):
             ...
     """
     def decorator(func: Callable) -> Callable:
+        def build_key(*args, **kwargs) -> str:
+            if key_builder:
+                return key_builder(*args, **kwargs)
+            # Default: hash function name + args
+            kwargs_for_key = {k: v for k, v in kwargs.items() if k not in SESSION_ARGS}
+            key_data = f"{func.__name__}:{json.dumps(kwargs_for_key, sort_keys=True, default=str)}"
+            key_hash = hashlib.md5(key_data.encode()).hexdigest()
+            return f"{prefix}:{key_hash}"
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs) -> Any:
+                cache_key = build_key(*args, **kwargs)
+                cached_data = await async_get_from_cache(cache_key)
+                if cached_data is not None:
+                    return cached_data
+
+                result = jsonable_encoder(await func(*args, **kwargs))
+                await async_set_cache(cache_key, result, expire)
+                return result
+
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:
-            # Build cache key from function args
-            if key_builder:
-                cache_key = key_builder(*args, **kwargs)
-            else:
-                # Default: hash function name + args
-                # Exclude 'db' (Session) from kwargs for cache key generation
-                kwargs_for_key = {k: v for k, v in kwargs.items() if k != 'db'}
-                key_data = f"{func.__name__}:{json.dumps(kwargs_for_key, sort_keys=True)}"
-                key_hash = hashlib.md5(key_data.encode()).hexdigest()
-                cache_key = f"{prefix}:{key_hash}"
-            
+            cache_key = build_key(*args, **kwargs)
+
             # Try cache first
             cached_data = get_from_cache(cache_key)
             if cached_data is not None:
                 return cached_data
-            
+
             # Execute function
-            result = func(*args, **kwargs)
-            
+            result = jsonable_encoder(func(*args, **kwargs))
+
             # Cache result
             set_cache(cache_key, result, expire)
-            
+
             return result
-        
+
         return wrapper
     return decorator
@@ -2,21 +2,125 @@
 DB_POOL_SIZE = 10
 DB_MAX_OVERFLOW = 20
 DB_POOL_TIMEOUT = 30
+DB_ASYNC_POOL_SIZE = 10  # asyncpg pool for async routes, separate from the sync pool
+DB_ASYNC_MAX_OVERFLOW = 10
+DB_ASYNC_STATEMENT_CACHE_SIZE = 500  # prepared statements kept per asyncpg connection
+DB_POOL_RECYCLE = 1800  # seconds
+DB_STATEMENT_TIMEOUT_MS = 15000  # default for every connection
+DB_CHECKOUT_STATEMENT_TIMEOUT_MS = 5000  # customer-facing writes: fail fast
+DB_REPORT_STATEMENT_TIMEOUT_MS = 60000  # admin dashboards and exports
+DB_SLOW_QUERY_MS = 500
+DB_REPLICA_MAX_LAG_SECONDS = 5  # replicas further behind than this are skipped
+DB_REPLICA_CHECK_SECONDS = 5  # how often replica lag is probed
+READ_PRIMARY_COOKIE = "read_primary_until"
+READ_YOUR_WRITES_SECONDS = 15  # reads stay on the primary this long after an admin write
 
 # Cache
 CACHE_DEFAULT_TTL = 3600  # 1 hour
 CACHE_PRODUCT_TTL = 1800  # 30 minutes
 CACHE_ORDER_TTL = 300     # 5 minutes
+ANALYTICS_CACHE_TTL = 3600  # upper bound; entries are normally retired by a version bump
+ANALYTICS_ORDERS_VERSION_KEY = "analytics:orders_version"
+ANALYTICS_OVERVIEW_WORKERS = 6  # report queries run at once across all /overview requests
 
 # Payment
 PAYSTACK_KOBO_MULTIPLIER = 100
 PAYSTACK_MIN_AMOUNT = 100  # ₦1.00 in kobo
 PAYSTACK_MAX_AMOUNT = 10000000  # ₦100,000 in kobo
 
+# Webhook batch worker
+WEBHOOK_WORKER_POLL_SECONDS = 2
+WEBHOOK_MAX_ATTEMPTS = 5  # an event that keeps failing on its own is then marked failed
+
+# Webhook replay protection (Paystack retries for up to 72 hours)
+WEBHOOK_DEDUPE_TTL_SECONDS = 4 * 86400
+WEBHOOK_BLOOM_CAPACITY = 100000
+WEBHOOK_BLOOM_ERROR_RATE = 0.001
+
+# webhook_events partitioning and retention
+WEBHOOK_PARTITION_MONTHS_AHEAD = 2
+WEBHOOK_RETENTION_MONTHS = 6
+WEBHOOK_KEY_RETENTION_DAYS = 30
+WEBHOOK_KEY_PRUNE_BATCH = 5000
+
+# Outbox (post-order notifications)
+OUTBOX_BATCH_SIZE = 20
+OUTBOX_MAX_ATTEMPTS = 6
+OUTBOX_POLL_SECONDS = 2
+OUTBOX_RETRY_BASE_SECONDS = 30
+OUTBOX_RETRY_MAX_SECONDS = 3600
+
+# Expired checkout cleanup
+CHECKOUT_CLEANUP_BATCH_SIZE = 1000
+
+# Payment reconciliation (checkouts whose webhook never arrived)
+RECONCILE_STALE_MINUTES = 15
+RECONCILE_LOOKBACK_HOURS = 48
+RECONCILE_PAGE_SIZE = 100
+RECONCILE_CONCURRENCY = 8
+
+# In-process scheduler (cron expressions are UTC)
+SCHEDULER_JITTER_SECONDS = 30
+SCHEDULE_CHECKOUT_CLEANUP = "*/5 * * * *"
+SCHEDULE_RECONCILE_PAYMENTS = "*/15 * * * *"
+SCHEDULE_WEBHOOK_RETENTION = "17 3 * * *"
+SCHEDULE_DATABASE_BACKUP = "0 2 * * *"
+SCHEDULE_INCREMENTAL_BACKUP = "30 * * * *"
+SCHEDULE_CACHE_WARMING = "*/4 * * * *"
+SCHEDULE_DAILY_SALES_REBUILD = "40 3 * * *"
+SCHEDULE_CUSTOMER_METRICS_REBUILD = "50 3 * * *"
+
+# Catalog cache warming
+CATEGORIES_CACHE_KEY = "categories:active"
+CATEGORIES_CACHE_TTL = 300
+
+# daily_sales rollup: the nightly job recomputes this many recent days
+DAILY_SALES_REBUILD_DAYS = 3
+
+# Admin order listing and export
+ADMIN_ORDERS_MAX_LIMIT = 500
+ORDER_EXPORT_BATCH_SIZE = 1000  # rows per server-side cursor fetch and per streamed chunk
+ORDER_EXPORT_DEFAULT_DAYS = 31
+
+# Customer analytics
+CUSTOMER_COHORT_MONTHS = 6  # default number of monthly cohorts
+CUSTOMER_COHORT_MAX_MONTHS = 24
+
+# Low-stock alerts. A variant is "low" at or below its threshold, "critical"
+# at half of it and "warning" up to twice it (the default gives 5/10/20)
+LOW_STOCK_DEFAULT_THRESHOLD = 10  # when neither the variant nor its category sets one
+LOW_STOCK_MAX_THRESHOLD = 50
+LOW_STOCK_INDEX_CEILING = 100  # partial index bound: covers the warning band of the max threshold
+LOW_STOCK_ALERT_WINDOW_SECONDS = 300  # crossings within a window go out as one message
+
+# Live admin events (Server-Sent Events fed by LISTEN/NOTIFY)
+ADMIN_EVENTS_CHANNEL = "admin_events"
+ADMIN_EVENTS_HEARTBEAT_SECONDS = 15  # comment line so proxies keep idle streams open
+ADMIN_EVENTS_QUEUE_SIZE = 100  # per client; a client this far behind is told to resync
+ADMIN_EVENTS_RECONNECT_SECONDS = 5  # listener reconnect delay, also the browser's retry hint
+
+# Storefront visitor analytics: per-UTC-day Redis keys (HyperLogLog of
+# visitors, page view counter, count-min sketch of product views). Changing
+# the sketch width or depth makes the days already recorded unreadable.
+VISITOR_ANALYTICS_RETENTION_DAYS = 400
+VISITOR_CMS_WIDTH = 2048  # counters per row: overcount <= e/width of the day's views
+VISITOR_CMS_DEPTH = 4  # rows: that bound holds with probability 1 - e^-depth (98%)
+VISITOR_EVENTS_MAX_BATCH = 50
+VISITOR_COOKIE = "mr_vid"
+VISITOR_COOKIE_MAX_AGE = 365 * 86400
+PRODUCT_CONVERSION_LIMIT = 20
+
+# Idempotency-key response cache
+IDEMPOTENCY_TTL_SECONDS = 86400  # 24 hours
+IDEMPOTENCY_LOCK_SECONDS = 60
+IDEMPOTENCY_WAIT_SECONDS = 30
+IDEMPOTENCY_MAX_BODY_BYTES = 256 * 1024
+
 # Rate Limiting
 RATE_LIMIT_AUTH = "5/minute"
 RATE_LIMIT_CHECKOUT = "3/minute"
 RATE_LIMIT_API = "100/minute"
+RATE_LIMIT_VISITOR_EVENTS = "120/minute"
 
 # User Roles
 ADMIN_ROLE = "admin"
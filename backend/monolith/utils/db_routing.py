@@ -0,0 +1,247 @@
+# file: utils/db_routing.py
+"""
+Read-replica routing for read-only session dependencies.
+
+- Each replica's replication lag is probed in the background
+  (run_lag_monitor). Routes using the read dependencies in database.py get
+  a replica that is healthy and within the lag budget, chosen round-robin.
+  When none qualifies they fall back to the primary. A replica whose lag is
+  unknown (not probed yet, probe failed) is never used.
+- Read-your-writes: after a successful admin mutation, ReadYourWritesMiddleware
+  sets a short-lived cookie. While it is present, that browser's reads go to
+  the primary, so an admin never sees a replica that has not caught up with
+  their own edit.
+"""
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from starlette.responses import Response
+
+from utils import constants
+from utils.db_runtime import DatabaseStats, get_pool_metrics
+
+logger = logging.getLogger(__name__)
+
+# 0 on a primary, or on a replica that is streaming and has replayed
+# everything it received; otherwise the age of the last replayed transaction
+# (NULL if unknown). A replica that lost its WAL stream has also "replayed
+# everything it received", so it is judged by that age and ages out of
+# rotation. The status column is only visible to superusers and
+# pg_read_all_stats members (e.g. pg_monitor); without it every replica
+# falls back to the age check, which only errs towards the primary.
+LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+             AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class Replica:
+    """A read replica with its sync engine, optional asyncpg engine and last probe result"""
+
+    def __init__(self, name: str, engine: Engine, async_engine=None,
+                 engine_stats: Optional[DatabaseStats] = None,
+                 async_engine_stats: Optional[DatabaseStats] = None):
+        self.name = name
+        self.engine = engine
+        self.async_engine = async_engine
+        self.engine_stats = engine_stats or DatabaseStats()
+        self.async_engine_stats = async_engine_stats or DatabaseStats()
+        self.lag_seconds: Optional[float] = None
+        self.healthy = False
+        self.last_checked: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+
+def probe_lag(replica: Replica) -> Optional[float]:
+    with replica.engine.connect() as conn:
+        lag = conn.execute(LAG_QUERY).scalar()
+    return None if lag is None else max(float(lag), 0.0)
+
+
+class ReplicaRouter:
+    """
+    Picks a replica for read-only sessions.
+
+    Args:
+        replicas: Configured replicas (an empty list routes everything to the primary)
+        max_lag_seconds: Replicas further behind than this are skipped
+        check_interval: Seconds between lag probes in run_lag_monitor
+        probe: Returns a replica's lag in seconds (None if unknown); raises if unreachable
+    """
+
+    def __init__(self, replicas: Iterable[Replica],
+                 max_lag_seconds: float = constants.DB_REPLICA_MAX_LAG_SECONDS,
+                 check_interval: float = constants.DB_REPLICA_CHECK_SECONDS,
+                 probe: Callable[[Replica], Optional[float]] = probe_lag):
+        self.replicas: List[Replica] = list(replicas)
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.probe = probe
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self.routed = {"replica": 0, "primary_fallback": 0, "primary_sticky": 0}
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            self.routed[outcome] += 1
+
+    def _usable(self, replica: Replica) -> bool:
+        return (
+            replica.healthy
+            and replica.lag_seconds is not None
+            and replica.lag_seconds <= self.max_lag_seconds
+        )
+
+    def pick(self, prefer_primary: bool = False, need_async: bool = False) -> Optional[Replica]:
+        """Replica for the next read session, or None to use the primary"""
+        if not self.replicas:
+            return None
+        if prefer_primary:
+            self._count("primary_sticky")
+            return None
+        candidates = [
+            r for r in self.replicas
+            if self._usable(r) and (r.async_engine is not None or not need_async)
+        ]
+        if not candidates:
+            self._count("primary_fallback")
+            return None
+        self._count("replica")
+        return candidates[next(self._counter) % len(candidates)]
+
+    def mark_failed(self, replica: Replica, error: Exception) -> None:
+        """Take a replica out of rotation until its next successful probe"""
+        if replica.healthy:
+            logger.warning(f"Read replica {replica.name} failed, routing reads to primary: {error}")
+        replica.healthy = False
+        replica.last_error = str(error)
+
+    def check(self, replica: Replica) -> None:
+        try:
+            lag = self.probe(replica)
+        except Exception as e:
+            self.mark_failed(replica, e)
+        else:
+            if lag is not None and lag > self.max_lag_seconds and replica.healthy:
+                logger.warning(
+                    f"Read replica {replica.name} is {lag:.1f}s behind, routing reads to primary"
+                )
+            replica.lag_seconds = lag
+            replica.healthy = True
+            replica.last_error = None
+        replica.last_checked = time.time()
+
+    def refresh(self) -> None:
+        for replica in self.replicas:
+            self.check(replica)
+
+    async def run_lag_monitor(self, stop: asyncio.Event) -> None:
+        """Probe every replica each check_interval until `stop` is set"""
+        logger.info(f"Replica lag monitor started for {len(self.replicas)} replica(s)")
+        while not stop.is_set():
+            await asyncio.to_thread(self.refresh)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.check_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            routed = dict(self.routed)
+        return {
+            "max_lag_seconds": self.max_lag_seconds,
+            "routed_reads": routed,
+            "replicas": [
+                {
+                    "name": r.name,
+                    "healthy": r.healthy,
+                    "usable": self._usable(r),
+                    "lag_seconds": None if r.lag_seconds is None else round(r.lag_seconds, 2),
+                    "last_checked": r.last_checked,
+                    "last_error": r.last_error,
+                    "pool": get_pool_metrics(r.engine, r.engine_stats),
+                }
+                for r in self.replicas
+            ],
+        }
+
+    def dispose(self) -> None:
+        for replica in self.replicas:
+            replica.engine.dispose()
+
+    async def dispose_async(self) -> None:
+        for replica in self.replicas:
+            if replica.async_engine is not None:
+                await replica.async_engine.dispose()
+
+
+def wants_primary(cookies: Dict[str, str]) -> bool:
+    """True while the read-your-writes cookie set after an admin write is still fresh"""
+    value = cookies.get(constants.READ_PRIMARY_COOKIE)
+    if not value:
+        return False
+    try:
+        return float(value) > time.time()
+    except ValueError:
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware that pins a client's reads to the primary after a write.
+
+    Args:
+        app: Downstream ASGI app
+        path_prefixes: Successful mutating requests under these paths set the cookie
+        window_seconds: How long reads stay on the primary
+        cookie_options: Extra set_cookie arguments (secure, samesite, domain)
+    """
+
+    def __init__(self, app, path_prefixes: Iterable[str],
+                 window_seconds: int = constants.READ_YOUR_WRITES_SECONDS,
+                 cookie_options: Optional[Dict[str, Any]] = None):
+        self.app = app
+        self.path_prefixes = tuple(path_prefixes)
+        self.window_seconds = window_seconds
+        self.cookie_options = cookie_options or {}
+
+    def _cookie_header(self):
+        response = Response()
+        response.set_cookie(
+            constants.READ_PRIMARY_COOKIE,
+            str(int(time.time()) + self.window_seconds),
+            max_age=self.window_seconds,
+            path="/",
+            httponly=True,
+            **self.cookie_options
+        )
+        return response.raw_headers[-1]
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] in SAFE_METHODS
+            or not scope["path"].startswith(self.path_prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [self._cookie_header()]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
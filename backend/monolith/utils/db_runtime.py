@@ -0,0 +1,188 @@
+# file: utils/db_runtime.py
+"""
+Runtime instrumentation for the SQLAlchemy engine.
+
+- The instrumented pool classes time how long each checkout waits for a
+  free connection and count pool timeouts (sync and asyncpg engines keep
+  separate stats).
+- Connection errors that leave a socket unusable (Fly's proxy closing idle
+  connections, SSL resets) are flagged as disconnects, so SQLAlchemy
+  invalidates the pool. This replaces pool_pre_ping: healthy checkouts
+  skip the extra SELECT 1, and stale connections are retired by
+  pool_recycle or by the first error they raise.
+- Statements slower than the configured threshold are logged and counted.
+- Sessions can carry their own statement timeout in session.info. It is
+  applied with SET LOCAL at the start of every transaction.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Driver messages that mean the connection is gone but are not always
+# recognised as disconnects by the dialect
+DISCONNECT_MESSAGES = (
+    "ssl connection has been closed unexpectedly",
+    "ssl syscall error",
+    "server closed the connection unexpectedly",
+    "terminating connection due to administrator command",
+    "terminating connection due to idle-session timeout",
+    "connection has been closed unexpectedly",
+    "could not receive data from server",
+)
+
+# Slow query log lines are truncated to this many characters
+SLOW_QUERY_LOG_CHARS = 500
+
+
+class DatabaseStats:
+    """Thread-safe counters shared by the pool and engine event hooks"""
+
+    WAIT_THRESHOLD_MS = 1.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0  # checkouts that waited more than WAIT_THRESHOLD_MS
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.pool_timeouts = 0
+        self.disconnects = 0
+        self.queries = 0
+        self.slow_queries = 0
+        self.slowest_ms = 0.0
+
+    def record_checkout(self, wait_ms: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_ms_total += wait_ms
+            if wait_ms > self.WAIT_THRESHOLD_MS:
+                self.waits += 1
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+    def record_pool_timeout(self) -> None:
+        with self._lock:
+            self.pool_timeouts += 1
+
+    def record_query(self, elapsed_ms: float, slow: bool) -> None:
+        with self._lock:
+            self.queries += 1
+            if slow:
+                self.slow_queries += 1
+            self.slowest_ms = max(self.slowest_ms, elapsed_ms)
+
+    def record_disconnect(self) -> None:
+        with self._lock:
+            self.disconnects += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "waited_checkouts": self.waits,
+                "avg_wait_ms": round(self.wait_ms_total / self.checkouts, 2) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.wait_ms_max, 2),
+                "pool_timeouts": self.pool_timeouts,
+                "disconnects": self.disconnects,
+                "queries": self.queries,
+                "slow_queries": self.slow_queries,
+                "slowest_query_ms": round(self.slowest_ms, 2),
+            }
+
+
+stats = DatabaseStats()
+async_stats = DatabaseStats()
+
+
+class _WaitTimingMixin:
+    """Records how long callers wait for a connection into the class's `stats`"""
+
+    stats: DatabaseStats
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_pool_timeout()
+            logger.error(
+                f"Database pool exhausted: size={self.size()} overflow={self.overflow()} "
+                f"checked_out={self.checkedout()}"
+            )
+            raise
+        self.stats.record_checkout((time.perf_counter() - started) * 1000)
+        return connection
+
+
+def instrumented_pool_class(base: type, pool_stats: DatabaseStats) -> type:
+    """QueuePool (or AsyncAdaptedQueuePool) subclass reporting into `pool_stats`"""
+    return type(f"Instrumented{base.__name__}", (_WaitTimingMixin, base), {"stats": pool_stats})
+
+
+def install_instrumentation(engine: Engine, slow_query_ms: float, engine_stats: DatabaseStats = stats) -> None:
+    """Attach slow-query timing and disconnect classification to `engine` (a sync Engine)"""
+
+    def finish_timer(conn, statement: str, failed: bool) -> None:
+        timers = conn.info.get("query_started") if conn is not None else None
+        if not timers:
+            return
+        elapsed_ms = (time.perf_counter() - timers.pop()) * 1000
+        slow = elapsed_ms >= slow_query_ms
+        engine_stats.record_query(elapsed_ms, slow)
+        if slow:
+            logger.warning(
+                f"Slow query ({elapsed_ms:.0f} ms{', failed' if failed else ''}): "
+                f"{' '.join((statement or '').split())[:SLOW_QUERY_LOG_CHARS]}"
+            )
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        finish_timer(conn, statement, failed=False)
+
+    @event.listens_for(engine, "handle_error")
+    def _classify_error(context):
+        finish_timer(context.connection, context.statement, failed=True)
+        message = str(context.original_exception).lower()
+        if not context.is_disconnect and any(pattern in message for pattern in DISCONNECT_MESSAGES):
+            context.is_disconnect = True
+        if context.is_disconnect:
+            engine_stats.record_disconnect()
+            logger.warning(f"Database connection lost, invalidating pool: {context.original_exception}")
+
+
+def install_session_timeouts(session_factory, dialect_name: str) -> None:
+    """Apply session.info['statement_timeout_ms'] to every transaction the session begins"""
+    if dialect_name != "postgresql":
+        return
+
+    @event.listens_for(session_factory, "after_begin")
+    def _apply_timeout(session: Session, transaction, connection):
+        timeout_ms: Optional[int] = session.info.get("statement_timeout_ms")
+        if timeout_ms is not None:
+            connection.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+
+
+def get_pool_metrics(engine: Engine, engine_stats: DatabaseStats = stats) -> Dict[str, Any]:
+    pool = engine.pool
+    metrics: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        metrics.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        })
+    metrics.update(engine_stats.snapshot())
+    return metrics
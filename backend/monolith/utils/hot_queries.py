@@ -0,0 +1,48 @@
+# file: utils/hot_queries.py
+"""
+Cached statements for the queries that run on nearly every request.
+
+A regular select() is rebuilt on each call, and SQLAlchemy then walks the
+whole construct to compute its cache key before it can reuse the compiled
+SQL. lambda_stmt() caches the construct itself, keyed on the lambda's code
+location. Later calls only pull the closure variables out as bound
+parameters. Keep the lambdas free of Python branching on those values.
+Anything that changes the SQL shape must be a separate lambda.
+
+Lists used with in_() become expanding parameters, so one cached statement
+serves carts of any size.
+"""
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+
+import models
+
+
+def admin_by_email(db: Session, email: str) -> Optional[models.AdminUser]:
+    stmt = lambda_stmt(lambda: select(models.AdminUser).where(models.AdminUser.email == email))
+    return db.scalars(stmt).first()
+
+
+def active_variants_by_id(db: Session, variant_ids: Iterable[int]) -> Dict[int, models.ProductVariant]:
+    """Active variants among `variant_ids` in one round trip, keyed by id"""
+    ids = list(set(variant_ids))
+    stmt = lambda_stmt(lambda: select(models.ProductVariant).where(
+        models.ProductVariant.id.in_(ids),
+        models.ProductVariant.is_active
+    ))
+    return {variant.id: variant for variant in db.scalars(stmt)}
+
+
+async def active_product(db: AsyncSession, product_id: int) -> Optional[models.Product]:
+    """Active product with variants and images loaded"""
+    stmt = lambda_stmt(lambda: select(models.Product).options(
+        selectinload(models.Product.variants),
+        selectinload(models.Product.images)
+    ).where(
+        models.Product.id == product_id,
+        models.Product.is_active
+    ))
+    return await db.scalar(stmt)
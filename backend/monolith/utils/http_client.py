@@ -0,0 +1,132 @@
+# file: utils/http_client.py
+"""
+Resilience helpers shared by outbound API clients (Paystack, etc.)
+
+- CircuitBreaker: stops hammering an upstream that keeps failing
+- EndpointMetrics: per-endpoint latency/error counters
+- backoff_delay: exponential backoff with full jitter for retries
+"""
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Minimal closed -> open -> half-open circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    are rejected until `reset_timeout` seconds have passed. The next call is
+    then let through as a trial; success closes the circuit, failure re-opens it.
+    A trial that never reports back (its caller died mid-call) is given up on
+    after another `reset_timeout`, and a new trial is let through.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if a call may proceed right now"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state != self.CLOSED and time.monotonic() - self._opened_at >= self.reset_timeout:
+                # Let exactly one trial request through (per reset_timeout)
+                self._state = self.HALF_OPEN
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class EndpointMetrics:
+    """Thread-safe latency and error counters keyed by endpoint label"""
+
+    def __init__(self, window: int = 256):
+        self._window = window
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, endpoint: str, latency_ms: float, success: bool, retries: int = 0) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, {
+                "calls": 0,
+                "errors": 0,
+                "retries": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "recent": deque(maxlen=self._window),
+            })
+            stats["calls"] += 1
+            stats["retries"] += retries
+            stats["total_ms"] += latency_ms
+            stats["max_ms"] = max(stats["max_ms"], latency_ms)
+            stats["recent"].append(latency_ms)
+            if not success:
+                stats["errors"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return a JSON-serializable copy of the current metrics"""
+        with self._lock:
+            result = {}
+            for endpoint, stats in self._stats.items():
+                recent = sorted(stats["recent"])
+                result[endpoint] = {
+                    "calls": stats["calls"],
+                    "errors": stats["errors"],
+                    "retries": stats["retries"],
+                    "avg_ms": round(stats["total_ms"] / stats["calls"], 2) if stats["calls"] else 0.0,
+                    "max_ms": round(stats["max_ms"], 2),
+                    "p50_ms": round(_percentile(recent, 0.50), 2),
+                    "p95_ms": round(_percentile(recent, 0.95), 2),
+                }
+            return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+def _percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def backoff_delay(attempt: int, base: float = 0.25, cap: float = 4.0) -> float:
+    """Exponential backoff with full jitter (attempt starts at 1)"""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
@@ -0,0 +1,343 @@
+# file: utils/idempotency.py
+"""
+Idempotency-key response cache for mutating endpoints.
+
+A request carrying an ``Idempotency-Key`` header (or, for JSON bodies, an
+``idempotency_key`` field) is executed once; the response is stored with a
+hash of the request and replayed for retries with the same key from the
+same caller. Keys are scoped to the caller's credentials (Authorization
+header or admin cookie), so one client's stored response is never replayed
+to another, and cookies set by the original response are not replayed.
+Concurrent duplicates wait on a short lock for the first request to finish
+instead of racing into the database. Reusing a key with a different request
+body is rejected with 422.
+
+Only JSON bodies are buffered (to find a body key and fingerprint the
+request); other bodies, such as multipart uploads, stream straight through
+and a header-keyed one is fingerprinted by its content type and length.
+
+Responses are kept in Redis when available, otherwise in process memory
+(sufficient for a single machine; the DB-level idempotency checks in the
+checkout flow remain the durable backstop).
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import time
+import uuid
+from http.cookies import CookieError, SimpleCookie
+from typing import Dict, Iterable, Optional, Tuple
+
+from utils import constants
+from utils.cache import redis_client
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAY_HEADER = b"idempotent-replayed"
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# Never stored: transient (rate limits) or about the caller rather than the request
+UNSTORED_STATUSES = {401, 403, 429}
+# Belong to the original caller's session, never replayed
+UNSTORED_HEADERS = {b"set-cookie"}
+# Credentials that identify the caller, in order of preference
+AUTH_HEADER = b"authorization"
+AUTH_COOKIE = "admin_token"
+
+# Delete the lock only if it still holds our token (it may have expired and
+# been taken by another request)
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class MemoryIdempotencyStore:
+    """Process-local store used when Redis is not configured"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[float, str]] = {}
+
+    def _purge(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._data.items() if expires <= now]:
+            del self._data[key]
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        self._purge()
+        self._data[key] = (time.monotonic() + ttl, value)
+
+    def acquire(self, key: str, ttl: int) -> Optional[str]:
+        """Take the lock; returns its owner token, or None if already held"""
+        if self.get(key) is not None:
+            return None
+        token = uuid.uuid4().hex
+        self.set(key, token, ttl)
+        return token
+
+    def release(self, key: str, token: str) -> None:
+        if self.get(key) == token:
+            self._data.pop(key, None)
+
+
+class RedisIdempotencyStore:
+    """Shared store so every API machine sees the same keys"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key: str) -> Optional[str]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        self.client.set(key, value, ex=ttl)
+
+    def acquire(self, key: str, ttl: int) -> Optional[str]:
+        token = uuid.uuid4().hex
+        return token if self.client.set(key, token, nx=True, ex=ttl) else None
+
+    def release(self, key: str, token: str) -> None:
+        self.client.eval(RELEASE_LOCK_SCRIPT, 1, key, token)
+
+
+def default_store():
+    return RedisIdempotencyStore(redis_client) if redis_client else MemoryIdempotencyStore()
+
+
+def _json_response(status: int, content: dict) -> Tuple[int, list, bytes]:
+    body = json.dumps(content).encode()
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    return status, headers, body
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware that makes the configured mutating endpoints idempotent.
+
+    Args:
+        app: Downstream ASGI app
+        path_prefixes: Only requests whose path starts with one of these are handled
+        store: Storage backend (Redis or in-memory by default)
+    """
+
+    def __init__(self, app, path_prefixes: Iterable[str], store=None,
+                 ttl: int = constants.IDEMPOTENCY_TTL_SECONDS,
+                 lock_ttl: int = constants.IDEMPOTENCY_LOCK_SECONDS,
+                 wait_timeout: float = constants.IDEMPOTENCY_WAIT_SECONDS):
+        self.app = app
+        self.path_prefixes = tuple(path_prefixes)
+        self.store = store or default_store()
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+
+    async def _call_store(self, method: str, *args):
+        """Run a store call without blocking the event loop on network I/O"""
+        func = getattr(self.store, method)
+        if isinstance(self.store, MemoryIdempotencyStore):
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in MUTATING_METHODS
+            or not scope["path"].startswith(self.path_prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers", []))
+        key = self._header_key(headers)
+        is_json = b"json" in headers.get(b"content-type", b"")
+        if not key and not is_json:
+            await self.app(scope, receive, send)
+            return
+
+        if is_json:
+            body = await self._read_body(receive)
+            key = key or self._body_key(body)
+            if not key:
+                await self.app(scope, self._replay_receive(body, receive), send)
+                return
+            downstream_receive = self._replay_receive(body, receive)
+        else:
+            body = b"%s:%s" % (headers.get(b"content-type", b""), headers.get(b"content-length", b""))
+            downstream_receive = receive
+
+        request_hash = hashlib.sha256(
+            b"\n".join([scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body])
+        ).hexdigest()
+        principal = self._principal(headers)
+        scope_key = hashlib.sha256(f"{scope['method']}:{scope['path']}:{principal}:{key}".encode()).hexdigest()
+        response_key = f"idempotency:response:{scope_key}"
+        lock_key = f"idempotency:lock:{scope_key}"
+
+        try:
+            stored, lock_token = await self._wait_for_turn(response_key, lock_key)
+        except Exception as e:
+            # Store unavailable: fall through rather than fail the request
+            logger.error(f"Idempotency store error, processing without cache: {e}")
+            await self.app(scope, downstream_receive, send)
+            return
+
+        if stored == "locked":
+            await self._send(send, *_json_response(409, {
+                "detail": "A request with this Idempotency-Key is still being processed"
+            }))
+            return
+        if stored is not None:
+            await self._replay(send, stored, request_hash)
+            return
+
+        # We hold the lock: run the request and capture its response
+        captured = {"status": None, "headers": [], "body": bytearray(), "complete": False}
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                captured["status"] = message["status"]
+                captured["headers"] = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                captured["body"].extend(message.get("body", b""))
+                if not message.get("more_body", False):
+                    captured["complete"] = True
+            await send(message)
+
+        try:
+            await self.app(scope, downstream_receive, capture_send)
+        finally:
+            try:
+                if self._should_store(captured):
+                    record = json.dumps({
+                        "hash": request_hash,
+                        "status": captured["status"],
+                        "headers": [
+                            [k.decode("latin-1"), v.decode("latin-1")]
+                            for k, v in captured["headers"] if k.lower() not in UNSTORED_HEADERS
+                        ],
+                        "body": base64.b64encode(bytes(captured["body"])).decode()
+                    })
+                    await self._call_store("set", response_key, record, self.ttl)
+                await self._call_store("release", lock_key, lock_token)
+            except Exception as e:
+                logger.error(f"Failed to store idempotent response: {e}")
+
+    async def _wait_for_turn(self, response_key: str, lock_key: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Return (stored response, None), (None, lock token) once this request
+        holds the lock, or ("locked", None) if the first request did not
+        finish within the wait timeout.
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        delay = 0.05
+        while True:
+            stored = await self._call_store("get", response_key)
+            if stored is not None:
+                return stored, None
+            token = await self._call_store("acquire", lock_key, self.lock_ttl)
+            if token:
+                # Re-check: the first request may have stored and released in between
+                stored = await self._call_store("get", response_key)
+                if stored is not None:
+                    await self._call_store("release", lock_key, token)
+                    return stored, None
+                return None, token
+            if time.monotonic() >= deadline:
+                return "locked", None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    def _should_store(self, captured: dict) -> bool:
+        # Server errors and rate limits are transient; let the client retry them.
+        # Auth failures belong to the caller's credentials, not to the request.
+        status = captured["status"]
+        return (
+            captured["complete"]
+            and status is not None
+            and status < 500
+            and status not in UNSTORED_STATUSES
+            and len(captured["body"]) <= constants.IDEMPOTENCY_MAX_BODY_BYTES
+        )
+
+    async def _replay(self, send, stored: str, request_hash: str) -> None:
+        record = json.loads(stored)
+        if record["hash"] != request_hash:
+            await self._send(send, *_json_response(422, {
+                "detail": "Idempotency-Key was already used with a different request"
+            }))
+            return
+        headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in record["headers"]]
+        headers.append((REPLAY_HEADER, b"true"))
+        await self._send(send, record["status"], headers, base64.b64decode(record["body"]))
+
+    @staticmethod
+    async def _send(send, status: int, headers: list, body: bytes) -> None:
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    @staticmethod
+    def _replay_receive(body: bytes, receive):
+        sent = False
+
+        async def replay():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Body already consumed; later calls only ever see the disconnect
+            return await receive()
+
+        return replay
+
+    @staticmethod
+    def _principal(headers: dict) -> str:
+        """Hash of the caller's credentials, or "" for an anonymous request"""
+        credential = headers.get(AUTH_HEADER, b"")
+        if not credential:
+            cookie = SimpleCookie()
+            try:
+                cookie.load(headers.get(b"cookie", b"").decode("latin-1"))
+            except CookieError:
+                pass
+            morsel = cookie.get(AUTH_COOKIE)
+            credential = morsel.value.encode() if morsel else b""
+        return hashlib.sha256(credential).hexdigest() if credential else ""
+
+    @staticmethod
+    def _header_key(headers: dict) -> Optional[str]:
+        key = headers.get(IDEMPOTENCY_HEADER)
+        if key:
+            return key.decode("latin-1").strip()[:constants.IDEMPOTENCY_KEY_MAX_LENGTH] or None
+        return None
+
+    @staticmethod
+    def _body_key(body: bytes) -> Optional[str]:
+        try:
+            payload = json.loads(body)
+        except (ValueError, UnicodeDecodeError):
+            return None
+        if isinstance(payload, dict) and isinstance(payload.get("idempotency_key"), str):
+            return payload["idempotency_key"][:constants.IDEMPOTENCY_KEY_MAX_LENGTH] or None
+        return None
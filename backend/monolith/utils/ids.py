@@ -0,0 +1,75 @@
+# file: utils/ids.py
+"""
+Identifier generation for orders, payment references and refunds.
+
+IDs are ULIDs: a 48-bit millisecond timestamp followed by 80 random bits,
+encoded as 26 Crockford base32 characters. They sort lexicographically in
+creation order, need no database round-trip, and are monotonic within a
+process: IDs issued in the same millisecond (or after the wall clock steps
+backwards) increment the random part instead of reusing the timestamp.
+"""
+import os
+import threading
+import time
+
+CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_RANDOM_BITS = 80
+_RANDOM_MAX = (1 << _RANDOM_BITS) - 1
+
+ORDER_NUMBER_PREFIX = "ORD-"
+PAYMENT_REFERENCE_PREFIX = "MADRUSH-"
+REFUND_REFERENCE_PREFIX = "REFUND-"
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, index = divmod(value, 32)
+        chars.append(CROCKFORD_ALPHABET[index])
+    return "".join(reversed(chars))
+
+
+class ULIDGenerator:
+    """Thread-safe, monotonic ULID generator"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._last_random = 0
+
+    def new(self) -> str:
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._last_random = int.from_bytes(os.urandom(10), "big")
+            else:
+                # Same millisecond or clock moved backwards: keep ordering
+                self._last_random += 1
+                if self._last_random > _RANDOM_MAX:
+                    self._last_ms += 1
+                    self._last_random = int.from_bytes(os.urandom(10), "big")
+            return _encode(self._last_ms, 10) + _encode(self._last_random, 16)
+
+
+_generator = ULIDGenerator()
+
+
+def new_ulid() -> str:
+    """Generate a new ULID string"""
+    return _generator.new()
+
+
+def new_order_number() -> str:
+    """Generate a unique order number, e.g. ORD-01J9Z3K5YQ8V6R1T2N4M7P0XWA"""
+    return ORDER_NUMBER_PREFIX + new_ulid()
+
+
+def new_payment_reference() -> str:
+    """Generate a unique Paystack transaction reference"""
+    return PAYMENT_REFERENCE_PREFIX + new_ulid()
+
+
+def new_refund_reference() -> str:
+    """Generate a unique refund reference"""
+    return REFUND_REFERENCE_PREFIX + new_ulid()
@@ -7,6 +7,7 @@ from typing import Optional, Dict
 from utils.mailgun import mailgun_client
 import logging
 import os
+from html import escape
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 
 logger = logging.getLogger(__name__)
@@ -172,26 +173,31 @@ def generate_order_confirmation_email(order: 'models.Order') -> tuple:
 
     return subject, html_content, text_content
 
-def send_order_confirmation(order):
-    """Send order confirmation email and WhatsApp"""
-    # Send email
+def send_order_confirmation_email(order) -> bool:
+    """Send the order confirmation email to the customer"""
     subject, html_content, text_content = generate_order_confirmation_email(order)
     
     # Add tags for better tracking
     tags = ["order-confirmation", f"order-{order.order_number}"]
     
-    send_email(
+    return send_email(
         to_email=order.customer_email,
         subject=subject,
         html_content=html_content,
         text_content=text_content,
         tags=tags
     )
-    
-    # Send WhatsApp notification to STORE OWNER (not customer)
-    # This is for manual shipping - owner needs to know about new orders
-    if settings.OWNER_PHONE_NUMBER:
-        owner_message = f"""🛍️ NEW ORDER ALERT!
+
+def send_owner_order_alert(order) -> bool:
+    """
+    Send WhatsApp notification to STORE OWNER (not customer)
+    This is for manual shipping - owner needs to know about new orders
+    """
+    if not settings.OWNER_PHONE_NUMBER:
+        logger.warning("OWNER_PHONE_NUMBER not configured - owner notification not sent")
+        return False
+
+    owner_message = f"""🛍️ NEW ORDER ALERT!
 
 Order: #{order.order_number}
 Customer: {order.customer_name}
@@ -208,9 +214,40 @@ Payment: {order.payment_status.upper()}
 Status: {order.status.upper()}
 
 👉 Check admin panel for full details"""
-        
-        send_whatsapp(settings.OWNER_PHONE_NUMBER, owner_message)
+    
+    sent = send_whatsapp(settings.OWNER_PHONE_NUMBER, owner_message)
+    if sent:
         logger.info(f"Owner notification sent for order {order.order_number}")
-    else:
-        logger.warning("OWNER_PHONE_NUMBER not configured - owner notification not sent")
+    return sent
+
+def send_low_stock_alert(items: list, emails: list, phone: Optional[str] = None) -> bool:
+    """
+    Send one low-stock digest to the admins (email) and the owner (WhatsApp).
+    `items` are dicts with product_name, sku, stock, threshold and level.
+    True if at least one recipient got it, so a retry doesn't repeat it to the others.
+    """
+    if not emails and not phone:
+        logger.warning("No admin emails or OWNER_PHONE_NUMBER configured - low-stock alert not sent")
+        return False
 
+    lines = [
+        f"{item['product_name']} ({item['sku']}): {item['stock']} left, threshold {item['threshold']} - {item['level'].upper()}"
+        for item in items
+    ]
+    subject = f"Low stock: {len(items)} variant{'s' if len(items) != 1 else ''} need restocking"
+    html_content = "<p>These variants are at or below their low-stock threshold:</p><ul>" + "".join(
+        f"<li>{escape(line)}</li>" for line in lines
+    ) + "</ul><p>Check the inventory page in the admin panel.</p>"
+    text_content = "These variants are at or below their low-stock threshold:\n\n" + "\n".join(f"- {line}" for line in lines)
+
+    sent = False
+    for email in emails:
+        sent = send_email(email, subject, html_content, text_content, tags=["low-stock"]) or sent
+    if phone:
+        message = "⚠️ LOW STOCK ALERT\n\n" + "\n".join(f"• {line}" for line in lines[:20])
+        if len(lines) > 20:
+            message += f"\n…and {len(lines) - 20} more"
+        sent = send_whatsapp(phone, message + "\n\n👉 Check admin panel for full details") or sent
+    if sent:
+        logger.info(f"Low-stock alert sent for {len(items)} variants")
+    return sent
@@ -1,48 +1,169 @@
-import requests
+import asyncio
 import json
 import hmac
 import hashlib
 import logging
+import threading
+import time
 from decimal import Decimal
 from typing import Dict, Any, Optional
+
+import httpx
+
 from config import settings
 from utils import constants
+from utils.http_client import CircuitBreaker, EndpointMetrics, backoff_delay
 
 logger = logging.getLogger(__name__)
 
-class PaystackClient:
-    """Paystack payment gateway client"""
+# Gateway responses worth retrying (rate limiting and upstream hiccups)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
 
-    BASE_URL = "https://api.paystack.co"
+class PaystackAPIError(Exception):
+    """Raised when a Paystack API call fails (after any retries)"""
 
-    def __init__(self):
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code  # HTTP status of the final response, if there was one
+
+
+class _PaystackTransport:
+    """
+    Connection settings, retry policy, circuit breaker and metrics shared by
+    the sync and async Paystack clients.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, max_retries: Optional[int] = None):
         self.secret_key = settings.PAYSTACK_SECRET_KEY
         self.public_key = settings.PAYSTACK_PUBLIC_KEY
+        self.base_url = (base_url or settings.PAYSTACK_BASE_URL).rstrip("/")
+        self.max_retries = settings.PAYSTACK_MAX_RETRIES if max_retries is None else max_retries
+        self.timeout = httpx.Timeout(
+            connect=settings.PAYSTACK_CONNECT_TIMEOUT,
+            read=settings.PAYSTACK_READ_TIMEOUT,
+            write=settings.PAYSTACK_READ_TIMEOUT,
+            pool=settings.PAYSTACK_CONNECT_TIMEOUT
+        )
+        self.limits = httpx.Limits(
+            max_connections=settings.PAYSTACK_POOL_SIZE,
+            max_keepalive_connections=settings.PAYSTACK_POOL_SIZE,
+            keepalive_expiry=30.0
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.PAYSTACK_CIRCUIT_FAILURES,
+            reset_timeout=settings.PAYSTACK_CIRCUIT_RESET_SECONDS
+        )
+        self.metrics = EndpointMetrics()
 
-    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Dict[str, Any]:
-        """Make HTTP request to Paystack API"""
+    def _client_options(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "timeout": self.timeout,
+            "limits": self.limits,
+            "headers": {
+                "Authorization": f"Bearer {self.secret_key}",
+                "Content-Type": "application/json"
+            }
+        }
+
+    def _prepare(self, method: str) -> int:
+        """Validate the call and return how many attempts it may use"""
         if not self.secret_key:
             raise ValueError("Paystack secret key not configured")
 
-        url = f"{self.BASE_URL}{endpoint}"
-        headers = {
-            "Authorization": f"Bearer {self.secret_key}",
-            "Content-Type": "application/json"
-        }
+        method = method.upper()
+        if method not in ("GET", "POST"):
+            raise ValueError(f"Unsupported HTTP method: {method}")
 
-        try:
-            if method.upper() == "GET":
-                response = requests.get(url, headers=headers)
-            elif method.upper() == "POST":
-                response = requests.post(url, headers=headers, json=data)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+        # Only idempotent reads are retried; a retried POST could double-charge
+        return self.max_retries + 1 if method == "GET" else 1
+
+    def _check_circuit(self, endpoint: str) -> None:
+        if not self.breaker.allow_request():
+            raise PaystackAPIError(f"Paystack API request failed: circuit open for {endpoint}")
 
+    def _handle_response(self, response: httpx.Response) -> Dict[str, Any]:
+        try:
             response.raise_for_status()
             return response.json()
+        except (httpx.HTTPStatusError, ValueError) as e:
+            raise PaystackAPIError(f"Paystack API request failed: {str(e)}",
+                                   status_code=response.status_code) from e
 
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Paystack API request failed: {str(e)}")
+    def get_metrics(self) -> Dict[str, Any]:
+        """Circuit state and per-endpoint latency metrics"""
+        return {
+            "circuit": self.breaker.state,
+            "endpoints": self.metrics.snapshot()
+        }
+
+
+class PaystackClient(_PaystackTransport):
+    """Paystack payment gateway client (pooled keep-alive connections)"""
+
+    def __init__(self, base_url: Optional[str] = None, max_retries: Optional[int] = None):
+        super().__init__(base_url=base_url, max_retries=max_retries)
+        self._client: Optional[httpx.Client] = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = httpx.Client(**self._client_options())
+        return self._client
+
+    def close(self) -> None:
+        """Close pooled connections"""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None,
+                      label: Optional[str] = None) -> Dict[str, Any]:
+        """Make HTTP request to Paystack API with timeouts, retries and circuit breaking"""
+        attempts = self._prepare(method)
+        label = label or endpoint
+        started = time.perf_counter()
+        retries = 0
+        success = False
+
+        try:
+            for attempt in range(1, attempts + 1):
+                self._check_circuit(label)
+                try:
+                    response = self.client.request(method.upper(), endpoint, json=data)
+                except httpx.TransportError as e:
+                    self.breaker.record_failure()
+                    if attempt < attempts:
+                        retries += 1
+                        logger.warning(f"Paystack {label} transport error (attempt {attempt}/{attempts}): {e}")
+                        time.sleep(backoff_delay(attempt))
+                        continue
+                    raise PaystackAPIError(f"Paystack API request failed: {str(e)}") from e
+                except BaseException:
+                    # Cancelled, redirect loop, undecodable body...: still settle
+                    # the breaker, or a half-open trial would never finish
+                    self.breaker.record_failure()
+                    raise
+
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    self.breaker.record_failure()
+                    if attempt < attempts:
+                        retries += 1
+                        logger.warning(f"Paystack {label} returned {response.status_code} (attempt {attempt}/{attempts})")
+                        time.sleep(backoff_delay(attempt))
+                        continue
+                else:
+                    self.breaker.record_success()
+
+                result = self._handle_response(response)
+                success = True
+                return result
+        finally:
+            self.metrics.record(label, (time.perf_counter() - started) * 1000, success, retries)
 
     def initialize_payment(self, amount: Decimal, email: str, reference: str,
                           callback_url: str = None, metadata: Dict = None) -> Dict[str, Any]:
@@ -86,7 +207,8 @@ class PaystackClient:
         Returns:
             Dict containing payment verification response
         """
-        return self._make_request("GET", f"/transaction/verify/{reference}")
+        return self._make_request("GET", f"/transaction/verify/{reference}",
+                                  label="/transaction/verify/{reference}")
 
     def get_payment_details(self, payment_id: str) -> Dict[str, Any]:
         """
@@ -98,7 +220,8 @@ class PaystackClient:
         Returns:
             Dict containing payment details
         """
-        return self._make_request("GET", f"/transaction/{payment_id}")
+        return self._make_request("GET", f"/transaction/{payment_id}",
+                                  label="/transaction/{id}")
 
     def list_banks(self, country: str = "nigeria", use_cursor: bool = False,
                    per_page: int = 50, next_cursor: str = None) -> Dict[str, Any]:
@@ -288,8 +411,94 @@ class PaystackClient:
             "reference": reference
         }
 
-# Global Paystack client instance
+class AsyncPaystackClient(_PaystackTransport):
+    """Async Paystack client for event-loop callers (bulk verification, async routes)"""
+
+    def __init__(self, base_url: Optional[str] = None, max_retries: Optional[int] = None):
+        super().__init__(base_url=base_url, max_retries=max_retries)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(**self._client_options())
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None,
+                            label: Optional[str] = None) -> Dict[str, Any]:
+        """Async counterpart of PaystackClient._make_request"""
+        attempts = self._prepare(method)
+        label = label or endpoint
+        started = time.perf_counter()
+        retries = 0
+        success = False
+
+        try:
+            for attempt in range(1, attempts + 1):
+                self._check_circuit(label)
+                try:
+                    response = await self.client.request(method.upper(), endpoint, json=data)
+                except httpx.TransportError as e:
+                    self.breaker.record_failure()
+                    if attempt < attempts:
+                        retries += 1
+                        logger.warning(f"Paystack {label} transport error (attempt {attempt}/{attempts}): {e}")
+                        await asyncio.sleep(backoff_delay(attempt))
+                        continue
+                    raise PaystackAPIError(f"Paystack API request failed: {str(e)}") from e
+                except BaseException:
+                    # Cancelled, redirect loop, undecodable body...: still settle
+                    # the breaker, or a half-open trial would never finish
+                    self.breaker.record_failure()
+                    raise
+
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    self.breaker.record_failure()
+                    if attempt < attempts:
+                        retries += 1
+                        logger.warning(f"Paystack {label} returned {response.status_code} (attempt {attempt}/{attempts})")
+                        await asyncio.sleep(backoff_delay(attempt))
+                        continue
+                else:
+                    self.breaker.record_success()
+
+                result = self._handle_response(response)
+                success = True
+                return result
+        finally:
+            self.metrics.record(label, (time.perf_counter() - started) * 1000, success, retries)
+
+    async def initialize_payment(self, amount: Decimal, email: str, reference: str,
+                                 callback_url: str = None, metadata: Dict = None) -> Dict[str, Any]:
+        """Initialize a payment transaction (amount in Naira)"""
+        payload = {
+            "amount": int(amount * constants.PAYSTACK_KOBO_MULTIPLIER),
+            "email": email,
+            "reference": reference,
+            "currency": "NGN"
+        }
+        if callback_url:
+            payload["callback_url"] = callback_url
+        if metadata:
+            payload["metadata"] = metadata
+
+        return await self._make_request("POST", "/transaction/initialize", payload)
+
+    async def verify_payment(self, reference: str) -> Dict[str, Any]:
+        """Verify a payment transaction"""
+        return await self._make_request("GET", f"/transaction/verify/{reference}",
+                                        label="/transaction/verify/{reference}")
+
+
+# Global Paystack client instances
 paystack_client = PaystackClient()
+async_paystack_client = AsyncPaystackClient()
 
 def process_payment(amount: Decimal, email: str, reference: str,
                    callback_url: str = None, metadata: Dict = None) -> dict:
@@ -0,0 +1,315 @@
+# file: utils/scheduler.py
+"""
+Lightweight in-process scheduler for recurring maintenance jobs.
+
+Jobs have 5-field cron schedules (minute hour day-of-month month
+day-of-week, UTC) and run inside the API's event loop; sync functions are
+moved to a worker thread. Every machine runs the scheduler, so each fire
+time ("slot") is claimed through Postgres before running:
+
+- a session advisory lock keyed by the job name prevents overlapping runs
+  across machines, and
+- a conditional upsert on scheduler_leases.last_slot lets exactly one
+  machine run each slot, even when jitter spreads machines apart.
+
+Random jitter keeps machines from hitting the database at the same instant.
+Manual triggers take the advisory lock but skip the slot claim. On
+databases without advisory locks (SQLite in development) every process
+runs every job.
+"""
+import asyncio
+import hashlib
+import inspect
+import logging
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+
+class CronSchedule:
+    """Minimal 5-field cron expression: numbers, '*', ranges, steps and lists"""
+
+    FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 7))
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(part, name, low, high) for part, (name, low, high) in zip(parts, self.FIELDS)
+        )
+        # Standard cron: if both day fields are restricted, either may match
+        self.day_restricted = parts[2] != "*"
+        self.weekday_restricted = parts[4] != "*"
+
+    @staticmethod
+    def _parse(field: str, name: str, low: int, high: int) -> Set[int]:
+        values: Set[int] = set()
+        for item in field.split(","):
+            step = 1
+            if "/" in item:
+                item, step_str = item.split("/", 1)
+                step = int(step_str)
+                if step < 1:
+                    raise ValueError(f"Invalid step in {name} field: {field!r}")
+            if item == "*":
+                start, end = low, high
+            elif "-" in item:
+                start, end = (int(v) for v in item.split("-", 1))
+            else:
+                start = end = int(item)
+                if step != 1:
+                    end = high
+            if start < low or end > high or start > end:
+                raise ValueError(f"Value out of range in {name} field: {field!r}")
+            values.update(range(start, end + 1, step))
+        if name == "weekday":
+            # 0 and 7 are both Sunday
+            values = {v % 7 for v in values}
+        return values
+
+    def _day_matches(self, dt: datetime) -> bool:
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.isoweekday() % 7) in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, dt: datetime) -> datetime:
+        """First matching minute strictly after `dt`"""
+        candidate = dt.astimezone(timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(year=candidate.year + year, month=month + 1, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError(f"Cron expression never matches: {self.expression!r}")
+
+
+class Job:
+    """A registered job plus its per-process run metrics"""
+
+    def __init__(self, name: str, schedule: str, func: Callable[[], Any], jitter_seconds: float = 0,
+                 description: str = ""):
+        self.name = name
+        self.schedule = CronSchedule(schedule)
+        self.func = func
+        self.jitter_seconds = jitter_seconds
+        self.description = description
+        self.lock_key = int.from_bytes(hashlib.blake2b(f"scheduler:{name}".encode(), digest_size=8).digest(), "big", signed=True)
+
+        self.next_slot: Optional[datetime] = None
+        self.fire_at: Optional[datetime] = None
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_started_at: Optional[datetime] = None
+        self.last_duration_ms: Optional[float] = None
+        self.last_status: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    def plan_next(self, now: datetime) -> None:
+        self.next_slot = self.schedule.next_after(now)
+        self.fire_at = self.next_slot + timedelta(seconds=random.uniform(0, self.jitter_seconds))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "schedule": self.schedule.expression,
+            "jitter_seconds": self.jitter_seconds,
+            "next_run": self.fire_at.isoformat() if self.fire_at else None,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+            "last_status": self.last_status,
+            "last_error": self.last_error,
+            "last_duration_ms": round(self.last_duration_ms, 1) if self.last_duration_ms is not None else None,
+            "avg_duration_ms": round(self.total_ms / self.runs, 1) if self.runs else None,
+            "max_duration_ms": round(self.max_ms, 1),
+        }
+
+
+class Scheduler:
+    """
+    Runs registered jobs on their cron schedules until stopped.
+
+    Args:
+        engine: SQLAlchemy engine used for leader election (None disables it)
+        max_sleep: Upper bound on a single idle wait, in seconds
+    """
+
+    def __init__(self, engine=None, max_sleep: float = 30):
+        self.engine = engine
+        self.max_sleep = max_sleep
+        self.jobs: Dict[str, Job] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def leader_election(self) -> bool:
+        return self.engine is not None and self.engine.dialect.name == "postgresql"
+
+    def register(self, name: str, schedule: str, func: Callable[[], Any], jitter_seconds: float = 0,
+                 description: str = "") -> Job:
+        if name in self.jobs:
+            raise ValueError(f"Job already registered: {name}")
+        job = Job(name, schedule, func, jitter_seconds, description)
+        self.jobs[name] = job
+        return job
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        return [job.snapshot() for job in self.jobs.values()]
+
+    def trigger(self, name: str) -> bool:
+        """Start a job now; False if it is already running in this process"""
+        job = self.jobs[name]
+        if job.running:
+            return False
+        self._start(job, slot=None)
+        return True
+
+    async def run(self, stop: asyncio.Event) -> None:
+        now = datetime.now(timezone.utc)
+        for job in self.jobs.values():
+            job.plan_next(now)
+        logger.info(f"Scheduler started with jobs: {', '.join(self.jobs) or 'none'}")
+
+        while not stop.is_set():
+            now = datetime.now(timezone.utc)
+            for job in self.jobs.values():
+                if job.fire_at <= now:
+                    slot = job.next_slot
+                    job.plan_next(now)
+                    if job.running:
+                        # Previous run still going: skip this slot rather than pile up
+                        job.skipped += 1
+                        continue
+                    self._start(job, slot)
+
+            if not self.jobs:
+                wait = self.max_sleep
+            else:
+                wait = (min(job.fire_at for job in self.jobs.values()) - datetime.now(timezone.utc)).total_seconds()
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=min(max(wait, 0.05), self.max_sleep))
+            except asyncio.TimeoutError:
+                pass
+
+        if self._tasks:
+            # Give in-flight jobs a moment to finish, then cancel them
+            _, pending = await asyncio.wait(self._tasks, timeout=10)
+            for task in pending:
+                task.cancel()
+        logger.info("Scheduler stopped")
+
+    def _start(self, job: Job, slot: Optional[datetime]) -> None:
+        job.running = True
+        task = asyncio.create_task(self._execute(job, slot))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, job: Job, slot: Optional[datetime]) -> None:
+        lease = None
+        try:
+            if self.leader_election:
+                lease = await asyncio.to_thread(self._acquire, job, slot)
+                if lease is None:
+                    job.skipped += 1
+                    return
+
+            job.last_started_at = datetime.now(timezone.utc)
+            started = time.perf_counter()
+            try:
+                if inspect.iscoroutinefunction(job.func):
+                    await job.func()
+                else:
+                    await asyncio.to_thread(job.func)
+                job.last_status = "success"
+                job.last_error = None
+            except Exception as e:
+                job.failures += 1
+                job.last_status = "error"
+                job.last_error = str(e)
+                logger.exception(f"Scheduled job {job.name} failed")
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            job.runs += 1
+            job.total_ms += elapsed_ms
+            job.max_ms = max(job.max_ms, elapsed_ms)
+            job.last_duration_ms = elapsed_ms
+            logger.info(f"Scheduled job {job.name} finished: {job.last_status} in {elapsed_ms:.0f} ms")
+        finally:
+            if lease is not None:
+                await asyncio.to_thread(self._release, lease, job)
+            job.running = False
+
+    def _acquire(self, job: Job, slot: Optional[datetime]):
+        """Advisory lock + per-slot claim; returns the held connection or None"""
+        conn = self.engine.connect()
+        try:
+            locked = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": job.lock_key}).scalar()
+            conn.commit()
+            if not locked:
+                conn.close()
+                return None
+            if slot is not None:
+                claimed = conn.execute(text("""
+                    INSERT INTO scheduler_leases (job_name, last_slot, last_started_at)
+                    VALUES (:name, :slot, now())
+                    ON CONFLICT (job_name) DO UPDATE
+                        SET last_slot = EXCLUDED.last_slot, last_started_at = now()
+                        WHERE scheduler_leases.last_slot < EXCLUDED.last_slot
+                    RETURNING job_name
+                """), {"name": job.name, "slot": slot}).first()
+                conn.commit()
+                if claimed is None:
+                    self._release(conn, job, record=False)
+                    return None
+            return conn
+        except Exception:
+            logger.exception(f"Leader election failed for job {job.name}")
+            # May hold the advisory lock; see _release
+            conn.invalidate()
+            conn.close()
+            return None
+
+    def _release(self, conn, job: Job, record: bool = True) -> None:
+        try:
+            if record:
+                conn.execute(text("""
+                    UPDATE scheduler_leases
+                    SET last_finished_at = now(), last_status = :status, last_duration_ms = :duration
+                    WHERE job_name = :name
+                """), {"name": job.name, "status": job.last_status, "duration": job.last_duration_ms})
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": job.lock_key})
+            conn.commit()
+        except Exception:
+            logger.exception(f"Failed to release scheduler lock for job {job.name}")
+            # The session may still hold the advisory lock. Returned to the
+            # pool it would keep it, and the job could never be elected
+            # again; discarding the connection ends the session and the lock.
+            conn.invalidate()
+        finally:
+            conn.close()
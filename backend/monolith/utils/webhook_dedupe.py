@@ -0,0 +1,153 @@
+# file: utils/webhook_dedupe.py
+"""
+Fast replay protection for Paystack webhooks.
+
+Tiers:
+1. Redis key per event id (``SET EX``), shared by every API machine.
+2. An in-process rotating Bloom filter, used when Redis is absent or
+   failing. A negative answer means this process has never seen the event;
+   a positive one only means "maybe" and is confirmed with a SELECT.
+3. The ``webhook_event_keys`` primary key (final guard, enforced by the
+   caller's INSERT).
+
+An event is only marked seen after its rows have committed. The unique key
+row is the authoritative guard, so a request that dies before its commit
+leaves nothing behind that would turn Paystack's retries away. Duplicates
+are answered without any database write.
+"""
+import hashlib
+import logging
+import math
+import threading
+from collections import Counter
+from typing import Optional
+
+from utils import constants
+from utils.cache import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over a bytearray"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        # Kirsch-Mitzenmacher double hashing
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class RotatingBloomFilter:
+    """
+    Two-generation Bloom filter with bounded memory. When the current
+    generation reaches capacity it becomes the previous one and a fresh
+    filter starts, so old ids age out instead of saturating the bits.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.current = BloomFilter(capacity, error_rate)
+        self.previous: Optional[BloomFilter] = None
+        self._lock = threading.Lock()
+
+    def add(self, item: str) -> None:
+        with self._lock:
+            if self.current.count >= self.capacity:
+                self.previous = self.current
+                self.current = BloomFilter(self.capacity, self.error_rate)
+            self.current.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return item in self.current or (self.previous is not None and item in self.previous)
+
+
+class WebhookDeduplicator:
+    """
+    Decides whether a webhook event id is new before any DB work happens.
+
+    `is_new` returns True (new, caller should process), False (duplicate) or
+    None (could not decide; the caller confirms against the database). It
+    reserves nothing: the caller calls `mark_seen` once the event's rows
+    have committed. Without Redis, or when Redis errors, the Bloom filter
+    answers alone: a negative skips the lookup entirely and only a positive
+    costs a SELECT.
+    """
+
+    KEY_PREFIX = "webhook:seen:"
+
+    def __init__(self, redis_client=None,
+                 ttl: int = constants.WEBHOOK_DEDUPE_TTL_SECONDS,
+                 capacity: int = constants.WEBHOOK_BLOOM_CAPACITY,
+                 error_rate: float = constants.WEBHOOK_BLOOM_ERROR_RATE):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.bloom = RotatingBloomFilter(capacity, error_rate)
+        self.stats = Counter()
+
+    def is_new(self, event_id: str) -> Optional[bool]:
+        if self.redis is not None:
+            try:
+                if self.redis.exists(self.KEY_PREFIX + event_id):
+                    self.stats["duplicate"] += 1
+                    return False
+                self.stats["new"] += 1
+                return True
+            except Exception as e:
+                # Degrade to the local filter; the unique key row still guards
+                logger.error(f"Webhook dedupe Redis error: {e}")
+                self.stats["redis_error"] += 1
+
+        if event_id in self.bloom:
+            # Possibly a false positive: let the caller check the table
+            self.stats["bloom_hit"] += 1
+            return None
+        self.stats["new"] += 1
+        return True
+
+    def mark_seen(self, event_id: str) -> None:
+        """Record an event whose rows have committed"""
+        self.bloom.add(event_id)
+        if self.redis is None:
+            return
+        try:
+            self.redis.set(self.KEY_PREFIX + event_id, "1", ex=self.ttl)
+        except Exception as e:
+            logger.error(f"Webhook dedupe Redis error on mark: {e}")
+            self.stats["redis_error"] += 1
+
+    def release(self, event_id: str) -> None:
+        """Forget an event whose processing failed so Paystack's retry is accepted"""
+        if self.redis is None:
+            return
+        try:
+            self.redis.delete(self.KEY_PREFIX + event_id)
+        except Exception as e:
+            logger.error(f"Webhook dedupe Redis error on release: {e}")
+
+    def get_stats(self) -> dict:
+        return {
+            **dict(self.stats),
+            "bloom_items": self.bloom.current.count + (self.bloom.previous.count if self.bloom.previous else 0),
+            "redis": self.redis is not None
+        }
+
+
+webhook_deduplicator = WebhookDeduplicator(redis_client)